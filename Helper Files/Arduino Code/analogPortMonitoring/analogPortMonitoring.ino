@@ -27,6 +27,20 @@ float readingADC;
 float readingEMG;
 String readingEMG_String;
 
+// Streaming Format: false = ASCII Lines ("SS.MMMMMM,VVVV"); true = Binary Frames (Decoded by arduinoInterface.binaryFrameDecoder)
+const bool binaryStreaming = false;
+// Binary Frame Layout (Little-Endian, No Padding): 10 Bytes per Sample Instead of ~16 ASCII Characters
+const byte numChannels = 1;
+const unsigned int syncWord = 0x5AA5;   // Sent as the Bytes 0xA5, 0x5A
+struct __attribute__((packed)) DataFrame {
+    uint16_t syncWord;                  // Marks the Start of a Frame
+    uint8_t sequenceNumber;             // Counts Frames (Wraps at 255); Gaps Mean Lost Frames
+    uint32_t deltaMicros;               // Microseconds Since the Previous Frame
+    uint16_t adcCounts[numChannels];    // Raw ADC Counts per Channel
+    uint8_t checksum;                   // Sum of All Bytes After the Sync Word (Mod 256)
+};
+DataFrame dataFrame;
+
 // ************************************************************************************** //
 // ********************************** Helper Functions ********************************** //
 
@@ -39,6 +53,25 @@ String padZeros(unsigned long number, int totalLength) {
     return finalNumber;
 }
 
+void sendDataFrame(unsigned long deltaMicros, unsigned int adcReading) {
+    // Fill in the Frame
+    dataFrame.syncWord = syncWord;
+    dataFrame.sequenceNumber += 1;
+    dataFrame.deltaMicros = deltaMicros;
+    dataFrame.adcCounts[0] = adcReading;
+
+    // Add the Checksum: Sum of the Bytes Between the Sync Word and the Checksum
+    byte* frameBytes = (byte*) &dataFrame;
+    byte checksum = 0;
+    for (unsigned int byteInd = sizeof(dataFrame.syncWord); byteInd < sizeof(DataFrame) - 1; byteInd++) {
+        checksum += frameBytes[byteInd];
+    }
+    dataFrame.checksum = checksum;
+
+    // Send the Raw Bytes
+    Serial.write(frameBytes, sizeof(DataFrame));
+}
+
 int readADC(byte channel) {
     // Throw out the first result
     analogReadFast(channel);
@@ -64,6 +97,8 @@ void setup() {
     Serial.begin(115200);     // Use 115200 baud rate for serial communication
     Serial.flush();
 
+    // Start the Frame Count at Zero (Incremented Before Each Send)
+    dataFrame.sequenceNumber = 255;
     // Start the Timer at Zero
     currentSecond = 0;
     previousMicros = micros();
@@ -88,14 +123,19 @@ void loop() {
         currentMicros -= oneSecMicro;
     }
 
-    // Convert Data into String
-    readingEMG_String = padZeros(readingEMG, 4);
-    // Convert Times into String
-    currentSecond_String = padZeros(currentSecond, 2);
-    currentMicros_String = padZeros(currentMicros, 6);
-    
-    // Compile Sensor Data and Send
-    Serial.println(currentSecond_String + "." + currentMicros_String + "," + readingEMG_String);
+    if (binaryStreaming) {
+        // Send the Packed Frame
+        sendDataFrame((unsigned long) currentSecond*oneSecMicro + currentMicros, readingEMG);
+    } else {
+        // Convert Data into String
+        readingEMG_String = padZeros(readingEMG, 4);
+        // Convert Times into String
+        currentSecond_String = padZeros(currentSecond, 2);
+        currentMicros_String = padZeros(currentMicros, 6);
+        
+        // Compile Sensor Data and Send
+        Serial.println(currentSecond_String + "." + currentMicros_String + "," + readingEMG_String);
+    }
 
     // Reset Parameters
     previousMicros = previousMicros + currentMicros + oneSecMicro*currentSecond;
@@ -0,0 +1,150 @@
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import tempfile
+import numpy as np
+
+# -------------------------------------------------------------------------- #
+# ------------------------------ Data Column ------------------------------- #
+
+class dataColumn:
+
+    def __init__(self, initialCapacity = 2**14, dataType = np.float64):
+        """
+        A growing numpy column (one channel, or the time points) that indexes like
+        the list it replaces: len(column), column[-1], column[start:end].
+        Slices are numpy views (no copy) that stay valid: growing or spilling moves the points to a new buffer
+        and leaves the old one to the views. Appending a block is amortized O(1): the
+        capacity doubles when full, so an 8 hour 1 kHz channel holds 8 bytes per
+        point (4 for float32) instead of a ~32 byte Python float.
+        
+        With setRetention, only the newest points stay in memory and older points
+        are appended to a file on disk. Indices still count from the first point
+        ever added; reading a spilled point loads it back from the file.
+        """
+        self.buffer = np.empty(initialCapacity, dtype=dataType)
+        self.numPoints = 0              # The points in memory (buffer[:numPoints]).
+        
+        # Retention Parameters
+        self.numRetainedPoints = None   # Keep at least this many of the newest points in memory. None keeps everything.
+        self.numSpilledPoints = 0       # The points moved to disk (the global index of buffer[0]).
+        self.spillFile = None           # The append-only file with the spilled points.
+        self.spilledPoints = None       # A memory map of the file (refreshed after each spill).
+
+    def extend(self, newPoints):
+        # Add a Block of Points to the End
+        newPoints = np.asarray(newPoints, dtype=self.buffer.dtype).ravel()
+        self.reserve(self.numPoints + len(newPoints))
+        self.buffer[self.numPoints:self.numPoints + len(newPoints)] = newPoints
+        self.numPoints += len(newPoints)
+        self.checkRetention()
+
+    def append(self, newPoint):
+        self.reserve(self.numPoints + 1)
+        self.buffer[self.numPoints] = newPoint
+        self.numPoints += 1
+        self.checkRetention()
+
+    def reserve(self, numPoints):
+        # Double the Capacity Until the Points Fit
+        if numPoints <= len(self.buffer): return
+        newCapacity = max(len(self.buffer), 1)
+        while newCapacity < numPoints: newCapacity *= 2
+
+        # Move the Points to the Larger Buffer (Old Views Keep the Old Buffer)
+        newBuffer = np.empty(newCapacity, dtype=self.buffer.dtype)
+        newBuffer[:self.numPoints] = self.buffer[:self.numPoints]
+        self.buffer = newBuffer
+
+    def clear(self):
+        self.numPoints = 0
+        self.numSpilledPoints = 0
+        self.spilledPoints = None
+        if self.spillFile is not None: self.spillFile.truncate(0); self.spillFile.seek(0)
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Retention on Disk -------------------------- #
+
+    def setRetention(self, numRetainedPoints, spillDirectory = None):
+        """Keep the newest 'numRetainedPoints' (up to twice as many) in memory; spill the rest to a temporary file in 'spillDirectory'."""
+        self.numRetainedPoints = numRetainedPoints
+        if numRetainedPoints is not None and self.spillFile is None:
+            # The File is Deleted When Closed
+            self.spillFile = tempfile.TemporaryFile(prefix = "spilledData", dir = spillDirectory)
+        self.checkRetention()
+
+    def checkRetention(self):
+        # Spill Once the Memory Holds Twice the Retained Points, so Each Point is Moved Once
+        if self.numRetainedPoints is None or self.numPoints <= 2*self.numRetainedPoints: return
+        numSpillPoints = self.numPoints - self.numRetainedPoints
+
+        # Append the Oldest Points to the File
+        self.spillFile.seek(0, 2)
+        self.spillFile.write(self.buffer[:numSpillPoints].tobytes())
+        self.spillFile.flush()
+        # Move the Retained Points to a New Buffer (Old Views Keep the Old Buffer)
+        newBuffer = np.empty(len(self.buffer), dtype=self.buffer.dtype)
+        newBuffer[:self.numRetainedPoints] = self.buffer[numSpillPoints:self.numPoints]
+        self.buffer = newBuffer
+        self.numPoints = self.numRetainedPoints
+        self.numSpilledPoints += numSpillPoints
+        self.spilledPoints = None
+
+    def readSpilledPoints(self, startIndex, endIndex):
+        # Load the Points Back from the File
+        if self.spilledPoints is None:
+            self.spilledPoints = np.memmap(self.spillFile, dtype=self.buffer.dtype, mode='r', shape=(self.numSpilledPoints,))
+        return self.spilledPoints[startIndex:endIndex]
+
+    @property
+    def values(self):
+        """Every point stored (a view unless points were spilled to disk)."""
+        if self.numSpilledPoints == 0:
+            return self.buffer[:self.numPoints]
+        return np.concatenate((self.readSpilledPoints(0, self.numSpilledPoints), self.buffer[:self.numPoints]))
+
+    # ---------------------- Behave Like the Old List ---------------------- #
+
+    def __len__(self):
+        return self.numSpilledPoints + self.numPoints
+
+    def __getitem__(self, index):
+        if self.numSpilledPoints == 0:
+            return self.buffer[:self.numPoints][index]
+        
+        if isinstance(index, slice):
+            startIndex, endIndex, stepSize = index.indices(len(self))
+            if stepSize != 1:
+                return self.values[index]
+            # Points in Memory are a View
+            if startIndex >= self.numSpilledPoints:
+                return self.buffer[startIndex - self.numSpilledPoints:max(startIndex, endIndex) - self.numSpilledPoints]
+            # Stitch the Spilled Points to the Ones in Memory
+            spilledPoints = self.readSpilledPoints(startIndex, min(endIndex, self.numSpilledPoints))
+            return np.concatenate((spilledPoints, self.buffer[:max(0, endIndex - self.numSpilledPoints)]))
+        
+        # Single Points (Counting from the First Point Ever Added)
+        if index < 0: index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("dataColumn index out of range")
+        if index >= self.numSpilledPoints:
+            return self.buffer[index - self.numSpilledPoints]
+        return self.readSpilledPoints(index, index + 1)[0]
+
+    def __iter__(self):
+        return iter(self.values)
+
+    def __array__(self, dtype = None, copy = None):
+        # np.asarray(column) is a View When Nothing is Spilled; np.array(column) is a Copy
+        if copy: return np.array(self.values, dtype=dtype)
+        return np.asarray(self.values, dtype=dtype)
+
+    def __repr__(self):
+        return "dataColumn(" + repr(self.values) + ")"
+
+    def tolist(self):
+        return self.values.tolist()
+
+# -------------------------------------------------------------------------- #
@@ -0,0 +1,129 @@
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import threading
+import collections
+import concurrent.futures
+import numpy as np
+from multiprocessing import shared_memory
+
+# Import Files
+import _filteringProtocols # Import files with filtering methods
+import _universalProtocols # Import files with general analysis methods
+
+# -------------------------------------------------------------------------- #
+# ------------------------ Feature Extraction Pool ------------------------- #
+
+class featureExtractionPool:
+
+    def __init__(self, numWorkers = 2):
+        """
+        Extracts the features of completed windows on 'numWorkers' processes, so the heavy
+        windowed features (EEG and GSR entropy/fractal/spectral features, EOG blink shapes)
+        never hold up the real-time loop. The loop only submits a window (See
+        globalProtocol.extractWindowFeatures); each window's time and data arrays are copied
+        once into shared memory instead of being pickled to the worker.
+
+        collectFeatures hands the finished features back in the order they were submitted,
+        so each protocol's featureTimes/rawFeatures stay in timestamp order.
+        """
+        self.numWorkers = numWorkers
+        self.processPool = concurrent.futures.ProcessPoolExecutor(numWorkers)
+        # The Submitted Windows in Order: (featureJob, sharedBlock, recordFunction, featureTime, recordArgs)
+        self.pendingWindows = collections.deque()
+        self.submitLock = threading.Lock()  # The protocols may submit from the analysis threads.
+
+        # Backlog Statistics
+        self.numSubmittedWindows = 0
+        self.maxPendingWindows = 0          # The largest backlog seen.
+
+    @property
+    def numPendingWindows(self):
+        """The backlog: windows submitted but not yet collected."""
+        return len(self.pendingWindows)
+
+    def submitWindow(self, analysis, featureTime, featureCalls, recordFunction, *recordArgs):
+        """
+        Queue one window. featureCalls: [(methodName, timePoints, data, *extraArgs)]; the features
+        of each call are joined in order and passed to recordFunction(featureTime, features, *recordArgs).
+        """
+        # Copy Every Array of the Window Into One Shared Block
+        windowArrays = [np.ascontiguousarray(array, dtype=np.float64) for featureCall in featureCalls for array in featureCall[1:3]]
+        sharedBlock = shared_memory.SharedMemory(create = True, size = max(8, sum(array.nbytes for array in windowArrays)))
+        arrayLocations = []; arrayOffset = 0
+        for array in windowArrays:
+            np.ndarray(array.shape, dtype=np.float64, buffer=sharedBlock.buf, offset=arrayOffset)[:] = array
+            arrayLocations.append((arrayOffset, len(array)))
+            arrayOffset += array.nbytes
+
+        # Only Send the Method Names, the Array Locations, and the Small Arguments
+        callSpecs = [(featureCall[0], arrayLocations[2*callInd], arrayLocations[2*callInd + 1], featureCall[3:]) for callInd, featureCall in enumerate(featureCalls)]
+        with self.submitLock:
+            featureJob = self.processPool.submit(extractSharedWindow, type(analysis), analysis.samplingFreq, sharedBlock.name, callSpecs)
+            self.pendingWindows.append((featureJob, sharedBlock, recordFunction, featureTime, recordArgs))
+            self.numSubmittedWindows += 1
+            self.maxPendingWindows = max(self.maxPendingWindows, len(self.pendingWindows))
+
+    def collectFeatures(self, waitForAll = False):
+        """Record the finished windows (in the order submitted); returns the number recorded."""
+        numCollected = 0
+        while self.pendingWindows and (waitForAll or self.pendingWindows[0][0].done()):
+            featureJob, sharedBlock, recordFunction, featureTime, recordArgs = self.pendingWindows.popleft()
+            try:
+                features = featureJob.result()
+            finally:
+                # Free the Window's Shared Memory
+                sharedBlock.close(); sharedBlock.unlink()
+            recordFunction(featureTime, features, *recordArgs)
+            numCollected += 1
+
+        return numCollected
+
+    def shutdown(self, collectRemaining = True):
+        # Finish (or Drop) the Backlog, Then Stop the Processes
+        if collectRemaining:
+            self.collectFeatures(waitForAll = True)
+        else:
+            for featureJob, sharedBlock, recordFunction, featureTime, recordArgs in self.pendingWindows:
+                featureJob.cancel()
+            concurrent.futures.wait([pendingWindow[0] for pendingWindow in self.pendingWindows])
+            for pendingWindow in self.pendingWindows:
+                pendingWindow[1].close(); pendingWindow[1].unlink()
+            self.pendingWindows.clear()
+        self.processPool.shutdown()
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Worker Processes ---------------------------- #
+
+workerProtocols = {}    # A bare protocol per (class, samplingFreq), made once in each worker.
+
+def getWorkerProtocol(protocolClass, samplingFreq):
+    # The Feature Methods Only Need the Sampling Frequency and the Shared Methods, Not the Data or Plots
+    protocolKey = (protocolClass, samplingFreq)
+    if protocolKey not in workerProtocols:
+        analysis = protocolClass.__new__(protocolClass)
+        analysis.samplingFreq = samplingFreq
+        analysis.filteringMethods = _filteringProtocols.filteringMethods()
+        analysis.universalMethods = _universalProtocols.universalMethods()
+        workerProtocols[protocolKey] = analysis
+
+    return workerProtocols[protocolKey]
+
+def extractSharedWindow(protocolClass, samplingFreq, sharedName, callSpecs):
+    analysis = getWorkerProtocol(protocolClass, samplingFreq)
+    sharedBlock = shared_memory.SharedMemory(name = sharedName)
+    try:
+        features = []
+        for methodName, (timeOffset, numTimePoints), (dataOffset, numDataPoints), extraArgs in callSpecs:
+            # Copy the Window Out so No View Outlives the Shared Block
+            timePoints = np.ndarray(numTimePoints, dtype=np.float64, buffer=sharedBlock.buf, offset=timeOffset).copy()
+            data = np.ndarray(numDataPoints, dtype=np.float64, buffer=sharedBlock.buf, offset=dataOffset).copy()
+            features.extend(getattr(analysis, methodName)(timePoints, data, *extraArgs))
+    finally:
+        sharedBlock.close()
+
+    return features
+
+# -------------------------------------------------------------------------- #
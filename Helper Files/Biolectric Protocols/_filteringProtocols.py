@@ -13,11 +13,13 @@ With a citation:
 # ---------------------------- Imported Modules ---------------------------- #
 
 # Basic Modules
-import math
+import threading
 import numpy as np
 from scipy.linalg import svd
 # Filtering Modules
 import scipy
+import scipy.fft
+import scipy.ndimage
 # Fourier Transform Modules
 from scipy.fft import rfft,rfftfreq
 from scipy.fft import irfft
@@ -38,6 +40,42 @@ class filteringMethods:
 # ------------------ High/Low/Band Pass Filtering Methods ------------------ #
 
 class bandPassFilter:
+    # Filter Designs Shared by Every Protocol: {designKey: coefficients}. Saved in the Board Profiles.
+    filterDesigns = {}
+    usedDesignKeys = set()  # The designs used since starting (only these are saved).
+    
+    def butterDesign(self, order, normal_cutoff, filterType, output):
+        """Returns the Butterworth coefficients ('ba' or 'sos'), designing each filter only once."""
+        designKey = "butter,%d,%s,%s," % (order, filterType, output) + ",".join("%.10g" % cutoff for cutoff in np.atleast_1d(normal_cutoff))
+        if designKey not in self.filterDesigns:
+            self.filterDesigns[designKey] = scipy.signal.butter(order, normal_cutoff, btype=filterType, analog=False, output=output)
+        self.usedDesignKeys.add(designKey)
+        return self.filterDesigns[designKey]
+    
+    def chebyHighPassDesign(self, samplingFreq, passband_edge, stopband_edge, passband_ripple, stopband_attenuation, output):
+        """Returns the Chebyshev type I high-pass coefficients of high_pass_filter ('ba' or 'sos'), designing each filter only once."""
+        nyq_freq = 0.5 * samplingFreq
+        Wp = passband_edge / nyq_freq
+        Ws = stopband_edge / nyq_freq
+        designKey = "cheby1,highpass,%s,%.10g,%.10g,%.10g,%.10g" % (output, Wp, Ws, passband_ripple, stopband_attenuation)
+        if designKey not in self.filterDesigns:
+            n, wn = scipy.signal.cheb1ord(Wp, Ws, passband_ripple, stopband_attenuation)
+            self.filterDesigns[designKey] = scipy.signal.cheby1(n, passband_ripple, Wp, 'highpass', output=output)
+        self.usedDesignKeys.add(designKey)
+        return self.filterDesigns[designKey]
+    
+    def saveFilterDesigns(self):
+        # Convert the Designs to Lists (For JSON)
+        return {designKey: [np.asarray(coefficients).tolist() for coefficients in filterDesign] if isinstance(filterDesign, tuple) else filterDesign.tolist() 
+                    for designKey, filterDesign in self.filterDesigns.items() if designKey in self.usedDesignKeys}
+    
+    def loadFilterDesigns(self, filterDesigns):
+        # Restore the Designs From saveFilterDesigns
+        for designKey, filterDesign in filterDesigns.items():
+            if ",ba," in designKey:
+                self.filterDesigns[designKey] = tuple(np.asarray(coefficients) for coefficients in filterDesign)
+            else:
+                self.filterDesigns[designKey] = np.asarray(filterDesign)
     
     def butterFilter(self, data, cutoffFreq=[0.1, 7], samplingFreq=800, order=3, filterType='bandpass', fastFilt = False):
         """
@@ -46,7 +84,7 @@ class bandPassFilter:
         Parameters
         ----------
         data : ndarray
-            Input signal to be filtered.
+            Input signal to be filtered. 2D data (channels x points) is filtered along the last axis.
         cutoffFreq : list of float
             Cutoff frequencies of the filter. If filterType is "band", this should be a list of two frequencies.
             Otherwise, this should be a single frequency. Default is [0.1, 7].
@@ -72,11 +110,11 @@ class bandPassFilter:
         normal_cutoff = np.asarray(cutoffFreq) / nyq
         
         if fastFilt:
-            sos = scipy.signal.butter(order, normal_cutoff, btype=filterType, analog=False, output='sos')
-            filteredData = scipy.signal.sosfiltfilt(sos, data)
+            sos = self.butterDesign(order, normal_cutoff, filterType, 'sos')
+            filteredData = scipy.signal.sosfiltfilt(sos, data, axis=-1)
         else:
-            b, a = scipy.signal.butter(order, normal_cutoff, btype=filterType, analog=False, output='ba')
-            filteredData = scipy.signal.filtfilt(b, a, data)
+            b, a = self.butterDesign(order, normal_cutoff, filterType, 'ba')
+            filteredData = scipy.signal.filtfilt(b, a, data, axis=-1)
 
         return filteredData
     
@@ -87,7 +125,7 @@ class bandPassFilter:
         Parameters:
         -----------
         data_to_filter : array-like
-            Input data to filter.
+            Input data to filter. 2D data (channels x points) is filtered along the last axis.
         passband_edge : float
             Passband edge frequency in Hz.
         stopband_edge : float
@@ -106,52 +144,349 @@ class bandPassFilter:
         if passband_edge == None: 
             return data_to_filter
         
-        # Calculate filter order and cutoff frequency
-        nyq_freq = 0.5 * sampling_freq
-        Wp = passband_edge / nyq_freq
-        Ws = stopband_edge / nyq_freq
-        n, wn = scipy.signal.cheb1ord(Wp, Ws, passband_ripple, stopband_attenuation)
-        
-        # Design filter and apply to data
-        bz, az = scipy.signal.cheby1(n, passband_ripple, Wp, 'highpass')
+        # Design the filter (once) and apply to data
+        bz, az = self.chebyHighPassDesign(sampling_freq, passband_edge, stopband_edge, passband_ripple, stopband_attenuation, 'ba')
         if fastFilt:
-            filtered_data = scipy.signal.lfilter(bz, az, data_to_filter)
+            filtered_data = scipy.signal.lfilter(bz, az, data_to_filter, axis=-1)
         else:
-            filtered_data = scipy.signal.filtfilt(bz, az, data_to_filter)
+            filtered_data = scipy.signal.filtfilt(bz, az, data_to_filter, axis=-1)
         
         return filtered_data
 
+
+# -------------------------------------------------------------------------- #
+# ----------------------- Streaming Filtering Methods ---------------------- #
+
+class streamingFilter:
+    
+    def __init__(self, sos, numChannels = 1):
+        """
+        A causal IIR filter (second-order sections) that carries each channel's state (zi) from batch to
+        batch, so a batch only filters its new points: O(new points) instead of re-filtering the buffer.
+        
+        The trade-off against the zero-phase path (filtfilt/sosfiltfilt over the buffer): the output is only
+        filtered forward, so it is delayed by the filter's group delay (See groupDelay; largest near the
+        cutoff) and peak shapes are skewed. In exchange there are no edge effects at the end of the batch,
+        so no buffer is needed and a point's filtered value never changes once streamed.
+        """
+        self.sos = np.asarray(sos)
+        self.numChannels = numChannels
+        self.resetState()
+        
+    def resetState(self):
+        self.filterStates = [None]*self.numChannels     # The zi of each channel; None until its first point.
+    
+    def filterPoints(self, newPoints, channelIndex = 0):
+        """Filter the channel's next points (continuing from the last call)."""
+        newPoints = np.asarray(newPoints, dtype=np.float64)
+        if len(newPoints) == 0: return newPoints.copy()
+        # Start at Steady State With the First Point (No Step Response at the Start)
+        if self.filterStates[channelIndex] is None:
+            self.filterStates[channelIndex] = scipy.signal.sosfilt_zi(self.sos) * newPoints[0]
+        filteredPoints, self.filterStates[channelIndex] = scipy.signal.sosfilt(self.sos, newPoints, zi=self.filterStates[channelIndex])
+        
+        return filteredPoints
+    
+    def groupDelay(self, signalFreq, samplingFreq):
+        """The delay (seconds) of the streamed output at 'signalFreq' Hz. The zero-phase path has none."""
+        # The Slope of the Phase Around the Frequency
+        freqStep = min(signalFreq, 0.5*samplingFreq - signalFreq, 0.01)/2
+        w, h = scipy.signal.sosfreqz(self.sos, worN=[signalFreq - freqStep, signalFreq + freqStep], fs=samplingFreq)
+        phaseChange = np.diff(np.unwrap(np.angle(h)))[0]
+        
+        return -phaseChange/(2*np.pi*2*freqStep)
+    
+class lookaheadFilter:
+    
+    def __init__(self, sos, lookaheadPoints, numChannels = 1):
+        """
+        A zero-phase (forward-backward) filter for streams with a fixed latency. The forward pass carries its
+        state between batches like streamingFilter; the backward pass only runs over the points not yet final
+        plus the new points, starting from the newest point. A point is final once it is 'lookaheadPoints' old:
+        the backward pass's start-up error has faded by then. Like sosfiltfilt, the forward pass starts before an
+        odd extension of the first points and the backward pass starts past one of the newest points, so the
+        provisional points match the edge of a re-filtered buffer.
+        
+        Each batch costs O(new points + lookaheadPoints) instead of re-filtering the buffer, and the final points
+        match sosfiltfilt over the whole recording to within the error left after the lookahead (See the
+        "lookahead" benchmark in benchmarks.py). If the first batch is shorter than the extension (padLength + 1 points), the
+        first final points also differ by the forward pass's start-up error until it fades.
+        """
+        self.sos = np.asarray(sos)
+        self.lookaheadPoints = lookaheadPoints
+        self.numChannels = numChannels
+        # The Steady State Per Unit Input and the Edge Extension (as in sosfiltfilt)
+        self.unitState = scipy.signal.sosfilt_zi(self.sos)
+        self.padLength = 3*(2*len(self.sos) + 1 - min((self.sos[:, 2] == 0).sum(), (self.sos[:, 5] == 0).sum()))
+        self.resetState()
+        
+    def resetState(self):
+        self.forwardStates = [None]*self.numChannels                            # The zi of each channel's forward pass.
+        self.pendingPoints = [np.zeros(0) for _ in range(self.numChannels)]     # The forward-filtered points not yet final.
+        self.recentPoints = [np.zeros(0) for _ in range(self.numChannels)]      # The newest raw points (for the edge extension).
+        
+    def numPendingPoints(self, channelIndex = 0):
+        return len(self.pendingPoints[channelIndex])
+    
+    def filterPoints(self, newPoints, channelIndex = 0):
+        """
+        Filter the channel's next points. Returns the points that became final (in order, continuing from the
+        last call) and the provisional values of the newest points (they change until they are final).
+        """
+        newPoints = np.asarray(newPoints, dtype=np.float64)
+        # Forward Pass: Only the New Points
+        if len(newPoints) != 0:
+            if self.forwardStates[channelIndex] is None:
+                # Start Like sosfiltfilt: at Steady State Before an Odd Extension of the First Points
+                startPoints = 2*newPoints[0] - newPoints[min(self.padLength, len(newPoints) - 1):0:-1]
+                self.forwardStates[channelIndex] = self.unitState * (startPoints[0] if len(startPoints) else newPoints[0])
+                if len(startPoints): self.forwardStates[channelIndex] = scipy.signal.sosfilt(self.sos, startPoints, zi=self.forwardStates[channelIndex])[1]
+            forwardPoints, self.forwardStates[channelIndex] = scipy.signal.sosfilt(self.sos, newPoints, zi=self.forwardStates[channelIndex])
+            self.pendingPoints[channelIndex] = np.concatenate((self.pendingPoints[channelIndex], forwardPoints))
+            self.recentPoints[channelIndex] = np.concatenate((self.recentPoints[channelIndex], newPoints))[-self.padLength - 1:]
+        pendingPoints = self.pendingPoints[channelIndex]
+        if len(pendingPoints) == 0: return np.zeros(0), np.zeros(0)
+        
+        # Run the Forward Pass On Past the Newest Point (Odd Extension), Without Keeping its State
+        recentPoints = self.recentPoints[channelIndex]
+        edgePoints = 2*recentPoints[-1] - recentPoints[-2::-1]
+        edgePoints = scipy.signal.sosfilt(self.sos, edgePoints, zi=self.forwardStates[channelIndex])[0]
+        # Backward Pass: From the End of the Extension Over the Points Not Yet Final
+        extendedPoints = np.concatenate((pendingPoints, edgePoints))
+        backwardPoints = scipy.signal.sosfilt(self.sos, extendedPoints[::-1], zi=self.unitState * extendedPoints[-1])[0][::-1][:len(pendingPoints)]
+        # The Points Older Than the Lookahead are Final
+        numFinalPoints = max(0, len(pendingPoints) - self.lookaheadPoints)
+        self.pendingPoints[channelIndex] = pendingPoints[numFinalPoints:]
+        
+        return backwardPoints[:numFinalPoints], backwardPoints[numFinalPoints:]
+    
+# -------------------------------------------------------------------------- #
+# ---------------------------- Filter Pipelines ---------------------------- #
+
+class filterPipeline:
+    
+    def __init__(self, zeroPhase = True):
+        """
+        A chain of filter stages declared once per protocol. Ex: low-pass -> Chebyshev high-pass -> savgol:
+        
+            filterPipeline().addButter(20, 3, 'low').addChebyHighPass(0.05, 1, 0.1, 60).addSavgol(0.05, 2)
+        
+        The IIR stages are designed once per sampling frequency and stacked into one cascade of second-order
+        sections, so filterData runs the whole chain in a single pass (sosfiltfilt; sosfilt if not zeroPhase).
+        The savgol stages then run in order. Unlike the 'ba' coefficients, the sections stay accurate at very
+        low cutoffs (Ex: a 0.05 Hz high-pass at 1 kHz).
+        """
+        self.zeroPhase = zeroPhase
+        self.iirStages = []         # [(stageName, stageType, stageParams)] in order.
+        self.savgolStages = []      # [(stageName, windowTime, polyorder)], applied after the IIR cascade.
+        self.bandPassFilter = bandPassFilter()  # The designs are shared (and saved) by every bandPassFilter.
+        self.cascades = {}          # {(samplingFreq, skippedStages): the stacked sos}
+    
+    def addButter(self, cutoffFreq, order = 3, filterType = 'low', stageName = None):
+        stageName = stageName or {"low": "lowPass", "high": "highPass"}.get(filterType, filterType)
+        self.iirStages.append((stageName, "butter", (order, cutoffFreq, filterType)))
+        self.cascades.clear()
+        return self
+    
+    def addChebyHighPass(self, passband_edge, stopband_edge, passband_ripple, stopband_attenuation, stageName = "highPass"):
+        # The Chebyshev Type I High-Pass of bandPassFilter.high_pass_filter
+        self.iirStages.append((stageName, "chebyHighPass", (passband_edge, stopband_edge, passband_ripple, stopband_attenuation)))
+        self.cascades.clear()
+        return self
+    
+    def addSavgol(self, windowTime, polyorder, stageName = "savgol"):
+        # The Window is in Seconds (At Least 3 Points)
+        self.savgolStages.append((stageName, windowTime, polyorder))
+        return self
+    
+    # ---------------------------------------------------------------------- #
+    # ------------------------------- Designs ------------------------------ #
+    
+    def designStage(self, stageType, stageParams, samplingFreq):
+        if stageType == "butter":
+            order, cutoffFreq, filterType = stageParams
+            return self.bandPassFilter.butterDesign(order, np.asarray(cutoffFreq)/(0.5*samplingFreq), filterType, 'sos')
+        return self.bandPassFilter.chebyHighPassDesign(samplingFreq, *stageParams, 'sos')
+    
+    def stageSOS(self, stageName, samplingFreq):
+        """The sos of one IIR stage (Ex: for a streamingFilter)."""
+        for iirStageName, stageType, stageParams in self.iirStages:
+            if iirStageName == stageName:
+                return self.designStage(stageType, stageParams, samplingFreq)
+        raise ValueError("No IIR stage named '%s'" % stageName)
+    
+    def designCascade(self, samplingFreq, skippedStages = ()):
+        """Returns the stacked sos of every IIR stage not skipped (None if there are none), designed once per sampling frequency."""
+        cascadeKey = (samplingFreq, tuple(skippedStages))
+        if cascadeKey not in self.cascades:
+            stageSOS = [self.designStage(stageType, stageParams, samplingFreq) for stageName, stageType, stageParams in self.iirStages if stageName not in skippedStages]
+            self.cascades[cascadeKey] = np.vstack(stageSOS) if stageSOS else None
+        return self.cascades[cascadeKey]
+    
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ Filtering ----------------------------- #
+    
+    def filterData(self, data, samplingFreq, skippedStages = ()):
+        """Apply every stage (except the skippedStages) to the data (points, or channels x points)."""
+        filteredData = np.asarray(data, dtype=np.float64)
+        # Run the IIR Stages in One Pass (Along the Last Axis: 2D Data is channels x points)
+        cascade = self.designCascade(samplingFreq, skippedStages)
+        if cascade is not None:
+            filteredData = scipy.signal.sosfiltfilt(cascade, filteredData, axis=-1) if self.zeroPhase else scipy.signal.sosfilt(cascade, filteredData, axis=-1)
+        # Then Smooth the Result
+        for stageName, windowTime, polyorder in self.savgolStages:
+            if stageName not in skippedStages:
+                filteredData = scipy.signal.savgol_filter(filteredData, max(3, int(samplingFreq*windowTime)), polyorder, mode='nearest', axis=-1)
+        
+        return filteredData
     
 # -------------------------------------------------------------------------- #
 # ------------------- Fourier Transform Filtering Methods ------------------ #
 
 class fourierFilter:
+    # Frequency Masks Shared by Every Protocol: {(numFFTPoints, samplingFreq, cutoffFreq, numTaps): rfft mask}
+    frequencyMasks = {}
+    maxFrequencyMasks = 32  # The oldest masks are dropped past this many (the buffer lengths change while filling).
+    frequencyMaskLock = threading.Lock()    # The protocols can filter on the analysis threads (See streamData.setAnalysisWorkers).
+    
+    def frequencyMask(self, numFFTPoints, samplingFreq, cutoffFreq, numTaps = None):
+        """
+        Returns the rfft mask keeping cutoffFreq[0] < f < cutoffFreq[1], made once per (length, sampling frequency, band).
+        With numTaps, returns the spectrum of the FIR version of the mask instead (See overlapAddFilter).
+        """
+        maskKey = (numFFTPoints, float(samplingFreq), float(cutoffFreq[0]), float(cutoffFreq[1]), numTaps)
+        with self.frequencyMaskLock:
+            frequencyMask = self.frequencyMasks.get(maskKey)
+        if frequencyMask is None:
+            if numTaps is None:
+                frequencies = rfftfreq(numFFTPoints, 1/samplingFreq)
+                frequencyMask = np.logical_and(cutoffFreq[0] < frequencies, frequencies < cutoffFreq[1]).astype(np.float64)
+            else:
+                frequencyMask = rfft(self.firDesign(numTaps, samplingFreq, cutoffFreq), numFFTPoints)
+            with self.frequencyMaskLock:
+                # Forget the Oldest Mask
+                if maskKey not in self.frequencyMasks and len(self.frequencyMasks) >= self.maxFrequencyMasks:
+                    self.frequencyMasks.pop(next(iter(self.frequencyMasks)))
+                self.frequencyMasks[maskKey] = frequencyMask
+        
+        return frequencyMask
+    
+    def firDesign(self, numTaps, samplingFreq, cutoffFreq):
+        """A linear-phase (Hamming windowed) FIR band-pass with 'numTaps' (odd) taps; a low/high-pass if a cutoff is at 0/Nyquist."""
+        if cutoffFreq[0] <= 0:
+            return scipy.signal.firwin(numTaps, cutoffFreq[1], fs=samplingFreq)
+        if cutoffFreq[1] >= 0.5*samplingFreq:
+            return scipy.signal.firwin(numTaps, cutoffFreq[0], pass_zero=False, fs=samplingFreq)
+        return scipy.signal.firwin(numTaps, cutoffFreq, pass_zero=False, fs=samplingFreq)
     
     def removeFrequencies(self, f_noise, samplingFreq, cutoffFreq = [0.5, 10]):
-        # Prepend the Data with Zeros to be length 2**N for N = 1,2,3,4...
-        closestPowerOfTwo = 2**(math.ceil(math.log(len(f_noise))/math.log(2)))
-        numZerosToPad = closestPowerOfTwo - len(f_noise)
-        f_noisePadded = [0]*numZerosToPad
-        f_noisePadded.extend(f_noise)
-        # Extra Padding: Mirror the Data on Both Sides
-        f_noisePadded.extend(f_noisePadded[::-1])
-        # Tranform the Data into the Frequency Domain
-        n    = len(f_noisePadded)
-        yf   = rfft(f_noisePadded)
-        xf   = rfftfreq(n, 1/samplingFreq)
-        # Remove the Frequencies Outside the Range
-        indices     = np.logical_and(cutoffFreq[0] < xf, xf < cutoffFreq[1])
-        yf_clean    = indices * yf # noise frequency will be set to 0
+        """
+        Keep only the frequencies between cutoffFreq[0] and cutoffFreq[1] (Hz) with one FFT. The data is mirrored
+        on both sides up to a fast FFT length (at least twice the data), so the ends do not wrap into each other.
+        2D data (channels x points) is filtered along the last axis.
+        """
+        f_noise = np.asarray(f_noise, dtype=np.float64)
+        numPoints = f_noise.shape[-1]
+        # Mirror the Data on Both Sides
+        numFFTPoints = scipy.fft.next_fast_len(2*numPoints, real=True)
+        numPadPoints = numFFTPoints - numPoints; numLeftPoints = numPadPoints//2
+        f_noisePadded = np.pad(f_noise, [(0, 0)]*(f_noise.ndim - 1) + [(numLeftPoints, numPadPoints - numLeftPoints)], mode='symmetric')
+        # Remove the Frequencies Outside the Range in the Frequency Domain
+        yf_clean = rfft(f_noisePadded, axis=-1) * self.frequencyMask(numFFTPoints, samplingFreq, cutoffFreq)
         # Reconstruct the Signal and Return the Data
-        return irfft(yf_clean)[numZerosToPad:numZerosToPad+len(f_noise)]
-
+        return irfft(yf_clean, numFFTPoints, axis=-1)[..., numLeftPoints:numLeftPoints + numPoints]
+    
+    def removeFrequenciesBlocks(self, f_noise, samplingFreq, cutoffFreq = [0.5, 10], blockSize = 2**16, numTaps = None):
+        """
+        Like removeFrequencies, but with the FIR version of the mask applied in fixed-size blocks (See overlapAddFilter),
+        so recordings of any length (Ex: a streamRecorder memory map) are filtered with fixed-size FFTs.
+        """
+        # Short Recordings Fit in One Block
+        blockFilter = overlapAddFilter(samplingFreq, cutoffFreq, numTaps, min(blockSize, max(1, np.shape(f_noise)[-1])))
+        return blockFilter.filterRecording(f_noise)
+    
+class overlapAddFilter:
+    
+    def __init__(self, samplingFreq, cutoffFreq = [0.5, 10], numTaps = None, blockSize = 2**16, numChannels = 1):
+        """
+        A linear-phase FIR band-pass applied by FFT overlap-add: each block of 'blockSize' points is convolved
+        with one FFT of a fixed length and the convolution's tail is carried into the next block. A stream (or a
+        recording of any length) is filtered in fixed memory at O(log(blockSize + numTaps)) per point.
+        
+        By default numTaps is 4 periods of the lowest cutoff (for a ~1/4 cutoff wide transition). The filtered
+        points are delayed by (numTaps - 1)/2 points (See delayPoints); filterRecording removes the delay.
+        """
+        self.samplingFreq = samplingFreq
+        self.cutoffFreq = cutoffFreq
+        self.numChannels = numChannels
+        # The Kernel: an Odd Number of Taps (Required for the High-Pass)
+        if numTaps is None:
+            transitionFreq = min(freq for freq in [cutoffFreq[0], cutoffFreq[1], 0.5*samplingFreq - cutoffFreq[1]] if freq > 0)
+            numTaps = int(4*samplingFreq/transitionFreq)
+        self.numTaps = numTaps + 1 - numTaps % 2
+        self.delayPoints = (self.numTaps - 1)//2
+        # The FFT Length and the Kernel's Spectrum
+        self.blockSize = blockSize
+        self.numFFTPoints = scipy.fft.next_fast_len(blockSize + self.numTaps - 1, real=True)
+        self.kernelSpectrum = fourierFilter().frequencyMask(self.numFFTPoints, samplingFreq, cutoffFreq, self.numTaps)
+        self.resetState()
+    
+    def resetState(self):
+        self.overlapPoints = [np.zeros(self.numTaps - 1) for _ in range(self.numChannels)]   # The convolution tail of each channel's last block.
+    
+    def filterPoints(self, newPoints, channelIndex = 0):
+        """Filter the channel's next points (continuing from the last call); the output is delayed by delayPoints."""
+        newPoints = np.asarray(newPoints, dtype=np.float64)
+        filteredPoints = np.empty(len(newPoints))
+        for blockStart in range(0, len(newPoints), self.blockSize):
+            blockPoints = newPoints[blockStart:blockStart + self.blockSize]
+            # Convolve the Block, Then Add the Tail of the Last Block
+            blockConvolution = irfft(rfft(blockPoints, self.numFFTPoints) * self.kernelSpectrum, self.numFFTPoints)[:len(blockPoints) + self.numTaps - 1]
+            blockConvolution[:self.numTaps - 1] += self.overlapPoints[channelIndex]
+            filteredPoints[blockStart:blockStart + len(blockPoints)] = blockConvolution[:len(blockPoints)]
+            self.overlapPoints[channelIndex] = blockConvolution[len(blockPoints):]
+        
+        return filteredPoints
+    
+    def filterRecording(self, data):
+        """
+        Filter whole recordings (points, or channels x points), one block at a time, without the delay. The
+        edges are mirrored like removeFrequencies. Resets the stream.
+        """
+        data = np.asarray(data)
+        channelsData = data.reshape(-1, data.shape[-1])
+        numPoints = channelsData.shape[-1]
+        filteredData = np.empty(channelsData.shape)
+        
+        self.numChannels = len(channelsData); self.resetState()
+        for channelIndex, channelData in enumerate(channelsData):
+            # Mirror the Edges Past the Delay
+            leftEdge = np.pad(channelData[:self.delayPoints + 1], (self.delayPoints, 0), mode='symmetric')[:self.delayPoints]
+            rightEdge = np.pad(channelData[max(0, numPoints - self.delayPoints - 1):], (0, self.delayPoints), mode='symmetric')[-self.delayPoints:] if self.delayPoints else np.zeros(0)
+            # Point i of the Recording Comes Out 2*delayPoints Later (the Left Edge, Then the Delay)
+            self.filterPoints(leftEdge, channelIndex)
+            filteredParts = [self.filterPoints(channelData[blockStart:blockStart + self.blockSize], channelIndex) for blockStart in range(0, numPoints, self.blockSize)]
+            filteredParts.append(self.filterPoints(rightEdge, channelIndex))
+            filteredData[channelIndex] = np.concatenate(filteredParts)[self.delayPoints:self.delayPoints + numPoints]
+        
+        return filteredData.reshape(data.shape)
+    
 # -------------------------------------------------------------------------- #
 # ------------------------ Savgol Filtering Methods ------------------------ #
 
 class savgolFilter:
     
     def savgolFilter(self, noisyData, window_length, polyorder, deriv = 0, mode='nearest'):
-        return scipy.signal.savgol_filter(noisyData, window_length, polyorder, deriv = deriv)
+        # 2D Data (channels x points) is Smoothed Along the Last Axis
+        return scipy.signal.savgol_filter(noisyData, window_length, polyorder, deriv = deriv, axis=-1)
+    
+    def movingAverage(self, noisyData, window_length):
+        """
+        The same as savgol_filter(noisyData, window_length, 1, mode='nearest'): a first order savgol filter is a moving
+        average, so a running sum is used: O(points) instead of O(points*window_length). Filters along the last axis.
+        """
+        # An Even Window Leans Forward Like the Savgol Window
+        return scipy.ndimage.uniform_filter1d(np.asarray(noisyData, dtype=np.float64), window_length, axis=-1, mode='nearest', origin=-1 if window_length % 2 == 0 else 0)
     
 # -------------------------------------------------------------------------- #
 # -------------------------- SVD Filtering Methods ------------------------- #
@@ -4,17 +4,23 @@
 
 # Abstract class
 import abc
+import threading
+import numpy as np
 # Plotting
 import matplotlib.pyplot as plt
 
 # Import Files
 import _filteringProtocols # Import files with filtering methods
 import _universalProtocols # Import files with general analysis methods
+import _dataStorage        # Import the numpy columns holding the streamed data
+import _latencyMonitor     # Import the timing of each analysis stage
 
 # -------------------------------------------------------------------------- #
 # --------------------------- Global Model Class --------------------------- #
 
 class globalProtocol(abc.ABC):
+    # The Protocols Share the Time Column; Analysis Threads May Set its Retention at Once
+    sharedColumnLock = threading.Lock()
     
     def __init__(self, numPointsPerBatch = 3000, moveDataFinger = 10, numChannels = 2, plottingClass = None, readData = None):
         # General input parameters
@@ -26,6 +32,12 @@ class globalProtocol(abc.ABC):
         self.numChannels = numChannels      # Number of Bioelectric Signals
         self.collectFeatures = False        # This flag will be changed by user if desired (NOT here).
         self.readData = readData
+        self.voltageDataType = np.float64   # The precision of the stored channels; np.float32 halves the memory (the time points are always float64).
+        self.spillOldData = True            # Keep only the points the analysis looks back over in memory; older points go to a temporary file.
+        self.spillDirectory = None          # The folder for the spilled points (None: the system's temporary folder).
+        self.featureExtractor = None        # A process pool to extract the window features on (See extractWindowFeatures); None extracts them inline.
+        self.latencyMonitor = _latencyMonitor.monitor               # Times each stage (off unless enabled; See streamData.setLatencyMonitoring).
+        self.protocolName = type(self).__name__.replace("Protocol", "")  # The prefix of this protocol's stages. Ex: "eeg.filterData"
         
         # Prepare the Program to Begin Data Analysis
         self.checkAllParams()               # Check to See if the User's Input Parameters Make Sense
@@ -39,9 +51,14 @@ class globalProtocol(abc.ABC):
         if self.plotStreamedData and numChannels != 0:
             self.initPlotPeaks()
             
-    def resetGlobalVariables(self):
-        # Data to Read in
-        self.data = [ [], [[] for channel in range(self.numChannels)] ]
+    def resetGlobalVariables(self, timePoints = None):
+        # Data to Read in: [timePoints, [channel data]], Each a Growing numpy Column. The Time Points May be Shared by Every Protocol (See streamData).
+        timePoints = _dataStorage.dataColumn() if timePoints is None else timePoints
+        self.data = [ timePoints, [_dataStorage.dataColumn(dataType = self.voltageDataType) for channel in range(self.numChannels)] ]
+        # The Output of the Streaming (Causal) Filter Stages: One Column per Channel, Filtered Only Once (See streamFilterChannel)
+        self.streamedData = [_dataStorage.dataColumn(dataType = self.voltageDataType) for channel in range(self.numChannels)]
+        self.streamingFilters = []      # The _filteringProtocols.streamingFilter of each stage, in order. Set with the sampling frequency.
+        self.lookaheadFilter = None     # Or a _filteringProtocols.lookaheadFilter (See lookaheadFilterChannel). Set with the sampling frequency.
         # Reset Feature Extraction
         self.rawFeatures = []           # Raw features extraction at the current timepoint.
         self.featureTimes = []          # The time of each feature.
@@ -68,6 +85,150 @@ class globalProtocol(abc.ABC):
         print("\tFor Your Reference, If Data Analysis is Longer Than", self.moveDataFinger/self.samplingFreq, ", Then You Will NOT be Analyzing in Real Time")
         
         self.setSamplingFrequencyParams()  
+        self.setDataRetention()
+        
+    def setDataRetention(self):
+        # Keep the Plotted Batch Plus Everything Before it the Analysis Reads (Older Points Spill to Disk)
+        if not self.spillOldData: return
+        numRetainedPoints = 2*self.numPointsPerBatch + self.getLookBackPoints()
+        for dataColumn in self.data[1] + self.streamedData:
+            dataColumn.setRetention(numRetainedPoints, self.spillDirectory)
+        # Keep Enough Time Points for Every Protocol Sharing Them
+        with self.sharedColumnLock:
+            self.data[0].setRetention(max(numRetainedPoints, self.data[0].numRetainedPoints or 0), self.spillDirectory)
+    
+    def filterChannels(self, timePoints, dataBuffers, *filterArgs):
+        """
+        Filter every channel in one filterData call: the buffers are stacked into a (numChannels, numPoints)
+        array and filtered along the last axis. Returns filteredTime, filteredData, goodIndicesMask, each indexed by channel.
+        """
+        with self.latencyMonitor.span("filterData", self.protocolName):
+            return self.filterData(timePoints, np.asarray(dataBuffers, dtype=np.float64), *filterArgs)
+    
+    def removeBadPoints(self, timePoints, filteredData, goodIndicesMask):
+        # Keep the Good Points (Channels Keep Different Points, so 2D Data Returns a List per Channel)
+        if np.ndim(filteredData) == 1:
+            return timePoints[goodIndicesMask], filteredData[goodIndicesMask]
+        return [timePoints[channelMask] for channelMask in goodIndicesMask], [channelData[channelMask] for channelData, channelMask in zip(filteredData, goodIndicesMask)]
+    
+    def streamFilterChannel(self, channelIndex, endDataInd):
+        """
+        Run the channel's points that are not filtered yet (up to endDataInd) through self.streamingFilters,
+        carrying each filter's state, and append them to self.streamedData[channelIndex]. Returns that column.
+        """
+        streamedColumn = self.streamedData[channelIndex]
+        newPoints = self.data[1][channelIndex][len(streamedColumn):endDataInd]
+        for streamingFilter in self.streamingFilters:
+            newPoints = streamingFilter.filterPoints(newPoints, channelIndex)
+        streamedColumn.extend(newPoints)
+        
+        return streamedColumn
+    
+    def lookaheadFilterChannel(self, channelIndex, startDataInd, endDataInd):
+        """
+        The channel's points [startDataInd, endDataInd) filtered forward-backward by self.lookaheadFilter; only the points
+        not filtered yet are run through it. The final points are kept in self.streamedData[channelIndex]; the newest
+        (lookahead) points are provisional, like the edge of a re-filtered buffer.
+        """
+        streamedColumn = self.streamedData[channelIndex]
+        numFilteredPoints = len(streamedColumn) + self.lookaheadFilter.numPendingPoints(channelIndex)
+        finalPoints, provisionalPoints = self.lookaheadFilter.filterPoints(self.data[1][channelIndex][numFilteredPoints:endDataInd], channelIndex)
+        streamedColumn.extend(finalPoints)
+        
+        # Join the Final and Provisional Points in the Range
+        numFinalPoints = len(streamedColumn)
+        return np.concatenate((streamedColumn[startDataInd:endDataInd], provisionalPoints[max(0, startDataInd - numFinalPoints):endDataInd - numFinalPoints]))
+    
+    def extractWindowFeatures(self, featureTime, featureCalls, recordFunction, *recordArgs):
+        # Extract the Window's Features Now, or Queue Them on the featureExtractor (Recorded Later by collectFeatures)
+        # featureCalls: [(methodName, timePoints, data, *extraArgs)]; Their Features are Joined, Then Passed to recordFunction(featureTime, features, *recordArgs)
+        if self.featureExtractor is None:
+            features = []
+            with self.latencyMonitor.span("extractFeatures", self.protocolName):
+                for methodName, timePoints, data, *extraArgs in featureCalls:
+                    features.extend(getattr(self, methodName)(timePoints, data, *extraArgs))
+            recordFunction(featureTime, features, *recordArgs)
+        else:
+            with self.latencyMonitor.span("queueFeatures", self.protocolName):
+                self.featureExtractor.submitWindow(self, featureTime, featureCalls, recordFunction, *recordArgs)
+            
+    def recordFeatures(self, featureTime, features):
+        # Keep Track of the New Features
+        self.readData.averageFeatures([featureTime], [features], self.featureTimes, self.rawFeatures, self.compiledFeatures, self.featureAverageWindow)
+    
+    # ------------------------- Offline Analysis -------------------------- #
+    
+    def analyzeRecording(self, samplingFreq = None):
+        """
+        Offline mode: analyze the whole recording in self.data at once (See streamingFunctions.analyzeRecording)
+        instead of replaying it batch by batch. The channels are filtered once and every feature window is
+        found in one pass; the features are recorded just like analyzeData would record them.
+        
+        The windows follow streamExcelData's batches (See streamingBatches): the sampling frequency comes from
+        the first batch and each window starts no earlier than the buffer it would be streamed in, so the
+        featureTimes match. The feature values differ by the filters' edge effects at the newest end of each
+        streamed buffer, which the whole-recording filter does not have.
+        """
+        # Find the Sampling Frequency From the First Batch, Like analyzeData (If Not Given)
+        firstBatchTimes = self.data[0][0:self.streamingBatches()[1][0]]
+        self.samplingFreq = samplingFreq or len(firstBatchTimes)/(firstBatchTimes[-1] - firstBatchTimes[0])
+        self.setSamplingFrequencyParams()
+        
+        if self.collectFeatures:
+            self.extractRecordingFeatures()
+    
+    def extractRecordingFeatures(self):
+        # Override if the Protocol Extracts Features
+        pass
+    
+    def filterRecording(self, channelIndex = 0):
+        # Filter the Whole Channel Once
+        timePoints = np.asarray(self.data[0]); channelData = np.asarray(self.data[1][channelIndex])
+        with self.latencyMonitor.span("filterRecording", self.protocolName):
+            return self.filterData(timePoints, channelData)
+        
+    def findFeatureWindows(self, firstDataInd, stepSize, featureTimeWindow, goodIndicesMask):
+        """
+        Offline version of the findStartFeatureWindow/compileBatchData loop: every window at once. The windows end at
+        firstDataInd, firstDataInd + stepSize, ... and span 'featureTimeWindow' seconds. Returns the end index of each
+        window in self.data, and its [start, end) in the filtered (good) points.
+        """
+        timePoints = np.asarray(self.data[0])
+        endDataInds = np.arange(firstDataInd, len(timePoints), max(stepSize, 1))
+        # The First Point in Each Window (Not Before the Buffer it Would be Streamed in)
+        startDataInds = np.searchsorted(timePoints, timePoints[endDataInds] - featureTimeWindow, side='left')
+        startDataInds = np.maximum(startDataInds, self.streamingBufferStarts(endDataInds))
+        # Count the Good Points Before Each Index
+        numGoodPoints = np.concatenate(([0], np.cumsum(goodIndicesMask, dtype=int)))
+        
+        return endDataInds, numGoodPoints[startDataInds], numGoodPoints[endDataInds + 1]
+    
+    def streamingBatches(self):
+        """
+        The batches streamExcelData analyzes this recording in (with a fixed moveDataFinger): the dataFinger of
+        each batch and the number of points loaded when it is analyzed.
+        """
+        numPoints = len(self.data[0])
+        dataFingers = []; dataLengths = []; dataFinger = 0
+        # The Points are Loaded moveDataFinger at a Time; Each Full Batch is Analyzed as Soon as it is Loaded
+        for generalDataFinger in range(0, numPoints, self.moveDataFinger):
+            while generalDataFinger + self.moveDataFinger - dataFinger >= self.numPointsPerBatch:
+                dataFingers.append(dataFinger); dataLengths.append(min(generalDataFinger + self.moveDataFinger, numPoints))
+                dataFinger += self.moveDataFinger
+        # Then the Remaining Points
+        dataFingers.append(dataFinger); dataLengths.append(numPoints)
+        
+        return np.array(dataFingers), np.array(dataLengths)
+    
+    def streamingBufferStarts(self, endDataInds):
+        # The Start of the Buffer Filtered by the First Batch Loaded Past Each Index
+        dataFingers, dataLengths = self.streamingBatches()
+        batchInds = np.searchsorted(dataLengths, endDataInds, side='right')
+        return np.maximum(dataFingers[batchInds] - self.dataPointBuffer, 0)
+    
+    def getLookBackPoints(self):
+        # The Filter Buffer and the Feature Window Before Each Batch (Override if a Protocol Reads Further Back)
+        return getattr(self, "dataPointBuffer", 0) + int(self.samplingFreq*getattr(self, "featureTimeWindow", 0))
         
     # ------------------------ Child Class Contract ------------------------ #
     
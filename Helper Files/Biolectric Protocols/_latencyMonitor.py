@@ -0,0 +1,175 @@
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import csv
+import json
+import math
+import time
+import threading
+import numpy as np
+
+# -------------------------------------------------------------------------- #
+# --------------------------- Latency Histogram ---------------------------- #
+
+class latencyHistogram:
+
+    def __init__(self, minTime = 1E-6, maxTime = 100, bucketsPerDecade = 20):
+        """
+        Counts the durations of one stage in fixed, logarithmic buckets from 'minTime' to 'maxTime'
+        seconds (plus an underflow and an overflow bucket). Recording is O(1) and the memory is
+        fixed, however long the session; the percentiles are within one bucket (12% wide at 20 per decade).
+        """
+        self.minTime = minTime
+        self.bucketsPerDecade = bucketsPerDecade
+        self.numBuckets = math.ceil(math.log10(maxTime/minTime)*bucketsPerDecade)
+        # Bucket i (1 to numBuckets) Holds minTime*10**((i-1)/bucketsPerDecade) to minTime*10**(i/bucketsPerDecade)
+        self.bucketCounts = np.zeros(self.numBuckets + 2, dtype=np.int64)
+        self.numSamples = 0
+        self.totalTime = 0
+        self.minRecorded = math.inf
+        self.maxRecorded = 0
+
+    def recordTime(self, duration):
+        if duration < self.minTime:
+            bucketInd = 0
+        else:
+            bucketInd = min(1 + int(math.log10(duration/self.minTime)*self.bucketsPerDecade), self.numBuckets + 1)
+        self.bucketCounts[bucketInd] += 1
+        self.numSamples += 1
+        self.totalTime += duration
+        self.minRecorded = min(self.minRecorded, duration)
+        self.maxRecorded = max(self.maxRecorded, duration)
+
+    def percentile(self, percent):
+        if self.numSamples == 0: return None
+        # Find the Bucket Holding the Percentile
+        bucketInd = int(np.searchsorted(np.cumsum(self.bucketCounts), percent/100*self.numSamples))
+        # Take the Bucket's (Geometric) Middle, Within the Recorded Range
+        bucketMiddle = self.minTime*10**((bucketInd - 0.5)/self.bucketsPerDecade)
+        return min(max(bucketMiddle, self.minRecorded), self.maxRecorded)
+
+    def summary(self, percents = (50, 95, 99)):
+        stageSummary = {"count": self.numSamples, "total": self.totalTime, "mean": self.totalTime/self.numSamples if self.numSamples else None,
+                        "min": self.minRecorded if self.numSamples else None, "max": self.maxRecorded if self.numSamples else None}
+        for percent in percents:
+            stageSummary["p%g" % percent] = self.percentile(percent)
+
+        return stageSummary
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Latency Monitor ---------------------------- #
+
+class latencySpan:
+
+    def __init__(self, latencyMonitor, stageName):
+        self.latencyMonitor = latencyMonitor
+        self.stageName = stageName
+
+    def __enter__(self):
+        self.startTime = time.perf_counter()
+        return self
+
+    def __exit__(self, exceptionType, exceptionValue, traceback):
+        self.latencyMonitor.recordTime(self.stageName, time.perf_counter() - self.startTime)
+
+class disabledSpan:
+    # Does Nothing (One Instance is Shared While Monitoring is Off)
+    def __enter__(self): return self
+    def __exit__(self, exceptionType, exceptionValue, traceback): return False
+
+class latencyMonitor:
+
+    def __init__(self, enabled = False, minTime = 1E-6, maxTime = 100, bucketsPerDecade = 20):
+        """
+        Times each stage of the streaming session (monotonic clock) into a latencyHistogram and
+        keeps counters. Time a stage with:
+
+            with monitor.span("filterData", "eeg"):    # Recorded as "eeg.filterData"
+                ...
+
+        While disabled, span returns a shared do-nothing context (one attribute check), so the
+        spans can stay in the real-time loop. Export the p50/p95/p99 of each stage with exportJSON or exportCSV.
+        """
+        self.enabled = enabled
+        self.histogramParams = (minTime, maxTime, bucketsPerDecade)
+        self.recordingLock = threading.Lock()   # The reading and analysis threads record at once.
+        self.disabledSpan = disabledSpan()
+        self.reset()
+
+    def reset(self):
+        self.stageHistograms = {}   # {stageName: latencyHistogram}
+        self.counters = {}          # {counterName: count}
+        self.startTime = time.perf_counter()
+
+    def enable(self, enabled = True):
+        self.enabled = enabled
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ Recording ----------------------------- #
+
+    def span(self, stageName, stagePrefix = None):
+        """A context that times the stage 'stagePrefix.stageName' (the name is only built while enabled)."""
+        if not self.enabled: return self.disabledSpan
+        return latencySpan(self, stageName if stagePrefix is None else stagePrefix + "." + stageName)
+
+    def recordTime(self, stageName, duration):
+        with self.recordingLock:
+            stageHistogram = self.stageHistograms.get(stageName)
+            if stageHistogram is None:
+                stageHistogram = self.stageHistograms[stageName] = latencyHistogram(*self.histogramParams)
+            stageHistogram.recordTime(duration)
+
+    def count(self, counterName, amount = 1):
+        if not self.enabled: return
+        with self.recordingLock:
+            self.counters[counterName] = self.counters.get(counterName, 0) + amount
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ Reporting ----------------------------- #
+
+    def summary(self, percents = (50, 95, 99)):
+        """Returns {"sessionTime", "stages": {stageName: {count, total, mean, min, max, p50, ...}}, "counters"} in seconds."""
+        with self.recordingLock:
+            return {
+                "sessionTime": time.perf_counter() - self.startTime,
+                "stages": {stageName: stageHistogram.summary(percents) for stageName, stageHistogram in sorted(self.stageHistograms.items())},
+                "counters": dict(self.counters),
+            }
+
+    def printSummary(self):
+        sessionSummary = self.summary()
+        print("\tStage Latency (ms): p50 / p95 / p99 / max (count)")
+        for stageName, stageSummary in sessionSummary["stages"].items():
+            print("\t\t%-32s %8.3f / %8.3f / %8.3f / %8.3f (%d)" % (stageName, *[1000*stageSummary[key] for key in ["p50", "p95", "p99", "max"]], stageSummary["count"]))
+        for counterName, count in sessionSummary["counters"].items():
+            print("\t\t%-32s %d" % (counterName, count))
+
+    def exportJSON(self, exportFile):
+        with open(exportFile, "w") as jsonFile:
+            json.dump(self.summary(), jsonFile, indent = 2)
+
+    def exportCSV(self, exportFile):
+        # One Row per Stage, Then One per Counter
+        sessionSummary = self.summary()
+        columnNames = ["count", "total", "mean", "min", "max", "p50", "p95", "p99"]
+        with open(exportFile, "w", newline = "") as csvFile:
+            csvWriter = csv.writer(csvFile)
+            csvWriter.writerow(["stage"] + [columnName + ("" if columnName == "count" else " (s)") for columnName in columnNames])
+            for stageName, stageSummary in sessionSummary["stages"].items():
+                csvWriter.writerow([stageName] + [stageSummary[columnName] for columnName in columnNames])
+            for counterName, count in sessionSummary["counters"].items():
+                csvWriter.writerow([counterName, count])
+
+    def export(self, exportFile):
+        # Choose the Format From the Extension
+        if exportFile.lower().endswith(".csv"):
+            self.exportCSV(exportFile)
+        else:
+            self.exportJSON(exportFile)
+
+# The Monitor Shared by the Streaming Pipeline and Every Protocol (Off Until Enabled)
+monitor = latencyMonitor()
+
+# -------------------------------------------------------------------------- #
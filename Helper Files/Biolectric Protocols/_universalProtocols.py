@@ -48,7 +48,7 @@ class universalMethods:
             idx_band = np.logical_and(powerSpectrumDensityFreqs >= freqBand[0], powerSpectrumDensityFreqs <= freqBand[1])
         
             # Calculate the power in the band of interest
-            power = scipy.integrate.simps(y = powerSpectrumDensity[idx_band], x = powerSpectrumDensityFreqs[idx_band])
+            power = scipy.integrate.simpson(powerSpectrumDensity[idx_band], x = powerSpectrumDensityFreqs[idx_band])
             
             bandPowers.append(power)
         
@@ -12,6 +12,7 @@ import antropy
 
 # Import Files
 import _globalProtocol
+import _filteringProtocols
 
 # ---------------------------------------------------------------------------#
 # ---------------------------------------------------------------------------#
@@ -29,6 +30,9 @@ class eegProtocol(_globalProtocol.globalProtocol):
         self.stopband_edge = 1           # Common values for EEG are 1 Hz and 2 Hz. If you need to remove more noise, you can choose a higher stopband edge frequency. If you need to preserve the signal more, you can choose a lower stopband edge frequency.
         self.passband_ripple = 0.1       # Common values for EEG are 0.1 dB and 0.5 dB. If you need to remove more noise, you can choose a lower passband ripple. If you need to preserve the signal more, you can choose a higher passband ripple.
         self.stopband_attenuation = 60   # Common values for EEG are 40 dB and 60 dB. If you need to remove more noise, you can choose a higher stopband attenuation. If you need to preserve the signal more, you can choose a lower stopband attenuation.
+        # The filter stages, designed once per sampling frequency: low-pass -> Chebyshev high-pass.
+        self.filterPipeline = _filteringProtocols.filterPipeline().addButter(self.cutOffFreq[1], order = 3, filterType = 'low') \
+                                    .addChebyHighPass(self.cutOffFreq[0], self.stopband_edge, self.passband_ripple, self.stopband_attenuation)
 
         # Initialize common model class
         super().__init__(numPointsPerBatch, moveDataFinger, numChannels, plottingClass, readData)
@@ -92,24 +96,27 @@ class eegProtocol(_globalProtocol.globalProtocol):
     # ----------------------------------------------------------------------- #
     # ------------------------- Data Analysis Begins ------------------------ #
 
-    def analyzeData(self, dataFinger):
+    def analyzeData(self, dataFinger, predictionModel = None, actionControl = None):
         
+        # ---------------------- Filter the Data ----------------------- #    
+        # Find the starting/ending points of the data to analyze
+        startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
+        dataBuffers = [self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch] for channelIndex in range(self.numChannels)]
+        bufferTimes = self.data[0][startFilterPointer:dataFinger + self.numPointsPerBatch]
+        
+        # Get the Sampling Frequency from the First Batch (If Not Given)
+        if not self.samplingFreq:
+            self.setSamplingFrequency(startFilterPointer)
+            
+        # Filter every channel at once and remove bad indices
+        channelsFilteredTime, channelsFilteredData, channelsGoodIndicesMask = self.filterChannels(bufferTimes, dataBuffers)
+        # -------------------------------------------------------------- #
+
         # Add incoming Data to Each Respective Channel's Plot
         for channelIndex in range(self.numChannels):
-            
-            # ---------------------- Filter the Data ----------------------- #    
-            # Find the starting/ending points of the data to analyze
-            startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
-            dataBuffer = np.array(self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch])
-            timePoints = np.array(self.data[0][startFilterPointer:dataFinger + self.numPointsPerBatch])
-            
-            # Get the Sampling Frequency from the First Batch (If Not Given)
-            if not self.samplingFreq:
-                self.setSamplingFrequency(startFilterPointer)
-                
-            # Filter the data and remove bad indices
-            filteredTime, filteredData, goodIndicesMask = self.filterData(timePoints, dataBuffer)
-            # -------------------------------------------------------------- #
+            # The channel's buffer and its filtered data.
+            timePoints, dataBuffer = bufferTimes, dataBuffers[channelIndex]
+            filteredTime, filteredData, goodIndicesMask = channelsFilteredTime[channelIndex], channelsFilteredData[channelIndex], channelsGoodIndicesMask[channelIndex]
             
             # ---------------------- Feature Extraction --------------------- #
             if self.collectFeatures:    
@@ -125,8 +132,7 @@ class eegProtocol(_globalProtocol.globalProtocol):
                     # Only extract features if enough information is provided.
                     if self.minPointsPerBatch < len(intervalTimes):
                         # Calculate and save the features in this window.
-                        eegFeatures = self.extractFeatures(intervalTimes, intervalData)
-                        self.readData.averageFeatures([featureTime], [eegFeatures], self.featureTimes, self.rawFeatures, self.compiledFeatures, self.featureAverageWindow)
+                        self.extractWindowFeatures(featureTime, [("extractFeatures", intervalTimes, intervalData)], self.recordFeatures)
                 
                     # Keep track of which data has been analyzed 
                     self.lastAnalyzedDataInd += int(self.samplingFreq*5)
@@ -142,26 +148,39 @@ class eegProtocol(_globalProtocol.globalProtocol):
                 filterOffset = (goodIndicesMask[0:dataFinger - startFilterPointer]).sum(axis = 0, dtype=int)
 
                 # Plot Raw Bioelectric Data (Slide Window as Points Stream in)
-                self.bioelectricDataPlots[channelIndex].set_data(timePoints, rawData)
-                self.bioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1])
+                self.plottingClass.setLineData(self.bioelectricDataPlots[channelIndex], timePoints, rawData)
+                self.plottingClass.setXLimits(self.bioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1])
                                             
                 # Plot the Filtered + Digitized Data
-                self.filteredBioelectricDataPlots[channelIndex].set_data(filteredTime[filterOffset:], filteredData[filterOffset:])
-                self.filteredBioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1]) 
+                self.plottingClass.setLineData(self.filteredBioelectricDataPlots[channelIndex], filteredTime[filterOffset:], filteredData[filterOffset:])
+                self.plottingClass.setXLimits(self.filteredBioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1]) 
             # -------------------------------------------------------------- #   
             
+    def extractRecordingFeatures(self):
+        # Filter the Whole Recording Once (Like analyzeData, the Features Come From the First Channel)
+        filteredTime, filteredData, goodIndicesMask = self.filterRecording(channelIndex = 0)
+        timePoints = self.data[0]
+        
+        # Find Every Feature Window at Once
+        stepSize = int(self.samplingFreq*5)
+        endDataInds, startGoodInds, endGoodInds = self.findFeatureWindows(self.lastAnalyzedDataInd, stepSize, self.featureTimeWindow, goodIndicesMask)
+        for endDataInd, startGoodInd, endGoodInd in zip(endDataInds, startGoodInds, endGoodInds):
+            # Only extract features if enough information is provided.
+            if self.minPointsPerBatch < endGoodInd - startGoodInd:
+                self.extractWindowFeatures(timePoints[endDataInd], [("extractFeatures", filteredTime[startGoodInd:endGoodInd], filteredData[startGoodInd:endGoodInd])], self.recordFeatures)
+        # Keep track of which data has been analyzed
+        self.lastAnalyzedDataInd += stepSize*len(endDataInds)
+        
     def filterData(self, timePoints, data):
         # Find the bad points associated with motion artifacts
         motionIndices = np.logical_or(data < 0.1, data > 3.15)
-        motionIndices_Broadened = scipy.signal.savgol_filter(motionIndices, max(3, int(self.samplingFreq*10)), 1, mode='nearest', deriv=0)
+        motionIndices_Broadened = self.filteringMethods.savgolFilter.movingAverage(motionIndices, max(3, int(self.samplingFreq*10)))
         goodIndicesMask = motionIndices_Broadened < 0.01
         
         # Filtering the whole dataset
-        filteredData = self.filteringMethods.bandPassFilter.butterFilter(data, self.cutOffFreq[1], self.samplingFreq, order = 3, filterType = 'low')
-        filteredData = self.filteringMethods.bandPassFilter.high_pass_filter(filteredData, self.samplingFreq, self.cutOffFreq[0], self.stopband_edge, self.passband_ripple, self.stopband_attenuation)
+        filteredData = self.filterPipeline.filterData(data, self.samplingFreq)
         # Remove the bad points from the filtered data
-        filteredTime = timePoints[goodIndicesMask]
-        filteredData = filteredData[goodIndicesMask]
+        filteredTime, filteredData = self.removeBadPoints(timePoints, filteredData, goodIndicesMask)
         
         return filteredTime, filteredData, goodIndicesMask
 
@@ -174,6 +193,8 @@ class eegProtocol(_globalProtocol.globalProtocol):
     
     def compileBatchData(self, filteredTime, filteredData, goodIndicesMask, startFilterPointer, startFeatureTimePointer):
         assert len(goodIndicesMask) >= len(filteredData) == len(filteredTime), print(len(goodIndicesMask), len(filteredData), len(filteredTime))
+        # A window reaching past the buffer starts at the buffer.
+        startFeatureTimePointer = max(startFeatureTimePointer, startFilterPointer)
         
         # Accounts for the missing points (count the number of viable points within each pointer).
         startReferenceFinger = (goodIndicesMask[0:startFeatureTimePointer - startFilterPointer]).sum(axis = 0, dtype=int)
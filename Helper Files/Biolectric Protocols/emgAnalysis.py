@@ -19,6 +19,7 @@ import matplotlib.pyplot as plt
 
 # Import Files
 import _globalProtocol
+import _filteringProtocols
 
 # ---------------------------------------------------------------------------#
 # ---------------------------------------------------------------------------#
@@ -36,6 +37,8 @@ class emgProtocol(_globalProtocol.globalProtocol):
         # High Pass Filter Parameters
         self.f1 = 100; self.f3 = 50;
         self.Rp = 0.1; self.Rs = 30;
+        # The Causal Chebyshev High-Pass, Designed Once per Sampling Frequency
+        self.filterPipeline = _filteringProtocols.filterPipeline(zeroPhase = False).addChebyHighPass(self.f1, self.f3, self.Rp, self.Rs)
         # Root Mean Squared (RMS) Parameters
         self.rmsWindow = 400; self.stepSize = 10;  # self.rmsWindow = 400; self.stepSize = 10;
         
@@ -147,31 +150,34 @@ class emgProtocol(_globalProtocol.globalProtocol):
         filteredData = self.highPassFilter(data)
         filteredTime = timePoints.copy()
         
-        return filteredTime, filteredData, np.ones(len(filteredTime))
+        return filteredTime, filteredData, np.ones(filteredData.shape)
     
     def analyzeData(self, dataFinger, predictionModel = None, actionControl = None):
         
         xPeaksHolder = []; yPeaksHolder = []; featureHolder = []; baselineHolder = []
+        # ---------------------- Filter the Data ----------------------- #   
+        # Find the starting/ending points of the data to analyze
+        startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
+        dataBuffers = [self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch] for channelIndex in range(self.numChannels)]
+        timePoints = self.data[0][dataFinger:dataFinger + self.numPointsPerBatch]
+        
+        # Find New Points That Need Filtering
+        totalPreviousPointsRMS = max(1 + math.floor((dataFinger + len(timePoints) - self.moveDataFinger - self.rmsWindow) / self.stepSize), 0) if dataFinger else 0
+        dataPointerRMS = self.stepSize*totalPreviousPointsRMS
+        numNewDataForRMS = dataFinger + len(timePoints) - dataPointerRMS
+        
+        # Get the Sampling Frequency from the First Batch (If Not Given)
+        if not self.samplingFreq:
+            self.setSamplingFrequency(startFilterPointer)
+            
+        # Filter every channel at once.
+        channelsFilteredData = self.filterChannels(timePoints, dataBuffers)[1]
+        # -------------------------------------------------------------- #
+
         # Add incoming Data to Each Respective Channel's Plot
         for channelIndex in range(self.numChannels):
-            
-            # ---------------------- Filter the Data ----------------------- #   
-            # Find the starting/ending points of the data to analyze
-            startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
-            dataBuffer = np.array(self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch])
-            timePoints = np.array(self.data[0][dataFinger:dataFinger + self.numPointsPerBatch])
-            
-            # Find New Points That Need Filtering
-            totalPreviousPointsRMS = max(1 + math.floor((dataFinger + len(timePoints) - self.moveDataFinger - self.rmsWindow) / self.stepSize), 0) if dataFinger else 0
-            dataPointerRMS = self.stepSize*totalPreviousPointsRMS
-            numNewDataForRMS = dataFinger + len(timePoints) - dataPointerRMS
-            
-            # Get the Sampling Frequency from the First Batch (If Not Given)
-            if not self.samplingFreq:
-                self.setSamplingFrequency(startFilterPointer)
-                
-            # Filter the data.
-            _, filteredData, _ = self.filterData(timePoints, dataBuffer)
+            dataBuffer = dataBuffers[channelIndex]
+            filteredData = channelsFilteredData[channelIndex]
             # Remove the filter buffer. Only consider new data.
             filteredData = filteredData[-(numNewDataForRMS):]
             # -------------------------------------------------------------- #
@@ -192,12 +198,12 @@ class emgProtocol(_globalProtocol.globalProtocol):
             if self.plotStreamedData:
                 dataBuffer = dataBuffer[-len(timePoints):]
                 # Plot Raw Bioelectric Data (Slide Window as Points Stream in)
-                self.bioelectricDataPlots[channelIndex].set_data(timePoints, dataBuffer)
-                self.bioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1])
+                self.plottingClass.setLineData(self.bioelectricDataPlots[channelIndex], timePoints, dataBuffer)
+                self.plottingClass.setXLimits(self.bioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1])
                 
                 # Plot the Filtered (RMS) Data
-                self.filteredBioelectricDataPlots[channelIndex].set_data(self.xDataRMS[-self.numPointsRMS:], dataRMS[-self.numPointsRMS:])
-                self.filteredBioelectricPlotAxes[channelIndex].set_xlim(self.xDataRMS[max(0, -self.numPointsRMS)], self.xDataRMS[-1])
+                self.plottingClass.setLineData(self.filteredBioelectricDataPlots[channelIndex], self.xDataRMS[-self.numPointsRMS:], dataRMS[-self.numPointsRMS:])
+                self.plottingClass.setXLimits(self.filteredBioelectricPlotAxes[channelIndex], self.xDataRMS[max(0, -self.numPointsRMS)], self.xDataRMS[-1])
             # --------------------------------------------------------------- #
 
             # ----------------------- Peak Detection ------------------------ #
@@ -327,8 +333,8 @@ class emgProtocol(_globalProtocol.globalProtocol):
                             if not leftBase or leftBaseI[0] < leftBase:
                                 leftBase = leftBaseI[0]
                     for channelInd in range(self.numChannels):
-                        self.timeDelayPlotsRMS[channelInd].set_data([leftBase, leftBase, self.xDataRMS[-1], self.xDataRMS[-1], leftBase], [0.01, .49, .49, 0.01, 0.01])
-                        self.timeDelayPlotsRaw[channelInd].set_data([leftBase, leftBase, self.xDataRMS[-1], self.xDataRMS[-1], leftBase], [0.1, 4.9, 4.9, 0.1, 0.1])
+                        self.plottingClass.setLineData(self.timeDelayPlotsRMS[channelInd], [leftBase, leftBase, self.xDataRMS[-1], self.xDataRMS[-1], leftBase], [0.01, .49, .49, 0.01, 0.01])
+                        self.plottingClass.setLineData(self.timeDelayPlotsRaw[channelInd], [leftBase, leftBase, self.xDataRMS[-1], self.xDataRMS[-1], leftBase], [0.1, 4.9, 4.9, 0.1, 0.1])
                        # else:
                        #     self.timeDelayPlotsRMS[channelInd].set_data([],[])
                        #     self.timeDelayPlotsRaw[channelInd].set_data([],[])
@@ -375,7 +381,7 @@ class emgProtocol(_globalProtocol.globalProtocol):
                             xPeaksNew = self.xPeaksList[channelIndex][groupNum]
                             yPeaksNew = self.yPeaksList[channelIndex][groupNum]
                             # Plot the Peaks in the Group'
-                            groupPeakPlot.set_data(xPeaksNew, yPeaksNew)
+                            self.plottingClass.setLineData(groupPeakPlot, xPeaksNew, yPeaksNew)
                     
         # Update to Get New Data Next Round
         # if self.plotStreamedData:
@@ -424,9 +430,7 @@ class emgProtocol(_globalProtocol.globalProtocol):
         Rs: cutOffDB (30)
         samplingFreq: Frequecy You Take Data
         """            
-        [n, wn] = scipy.signal.cheb1ord(self.Wp/math.pi, self.Ws/math.pi, self.Rp, self.Rs)
-        [bz1, az1] = scipy.signal.cheby1(n, self.Rp, self.Wp/math.pi, 'High')
-        filteredData = scipy.signal.lfilter(bz1, az1, inputData)
+        filteredData = self.filterPipeline.filterData(inputData, self.samplingFreq)
         return filteredData
     
     def RMSFilter(self, inputData, RMSData = [], rmsWindow=250, stepSize=8, dataPointerRMS = 0, channelIndex = 0):
@@ -11,6 +11,7 @@ import matplotlib.pyplot as plt
 
 # Import Files
 import _globalProtocol
+import _filteringProtocols
 
 # --------------------------------------------------------------------------- #
 # ------------------ User Can Edit (Global Variables) ----------------------- #
@@ -21,6 +22,9 @@ class eogProtocol(_globalProtocol.globalProtocol):
         # High Pass Filter Parameters
         self.dataPointBuffer = 5000        # A Prepended Buffer in the Filtered Data that Represents BAD Filtering; Units: Points
         self.cutOffFreq = [.1, 15]        # Optimal LPF Cutoff in Literatrue is 6-8 or 20 Hz (Max 35 or 50); I Found 20 Hz was the Best, but can go to 15 if noisy (small amplitude cutoff)
+        # The filter stages, designed once per sampling frequency: low-pass -> savgol smoothing (0.05 seconds).
+        self.filterPipeline = _filteringProtocols.filterPipeline().addButter(self.cutOffFreq[1], order = 5, filterType = 'low').addSavgol(0.05, 2)
+        self.lookaheadTime = None         # Seconds. If set, the low-pass runs forward-backward on the new points only, final after this lookahead (See _filteringProtocols.lookaheadFilter); None re-filters the whole buffer.
         
         # Blink Parameters
         self.minPeakHeight_Volts = 0.05    # The Minimum Peak Height in Volts; Removes Small Oscillations
@@ -69,6 +73,9 @@ class eogProtocol(_globalProtocol.globalProtocol):
     def setSamplingFrequencyParams(self):
         # Set Blink Parameters
         self.minPoints_halfBaseline = max(1, int(self.samplingFreq*0.015))  # The Minimum Points in the Left/Right Baseline
+        # Run the Low-Pass Forward-Backward on the New Points Only (If Asked)
+        if self.lookaheadTime is not None:
+            self.lookaheadFilter = _filteringProtocols.lookaheadFilter(self.filterPipeline.stageSOS("lowPass", self.samplingFreq), int(self.samplingFreq*self.lookaheadTime), self.numChannels)
     
     def initPlotPeaks(self): 
         # Establish pointers to the figure
@@ -120,25 +127,34 @@ class eogProtocol(_globalProtocol.globalProtocol):
     # ----------------------------------------------------------------------- #
     # ------------------------- Data Analysis Begins ------------------------ #
     
-    def analyzeData(self, dataFinger, calibrateModel = False):     
+    def analyzeData(self, dataFinger, calibrateModel = False, predictionModel = None, actionControl = None):     
         
         eyeAngles = []
+        # ---------------------- Filter the Data ----------------------- #    
+        # Find the starting/ending points of the data to analyze.
+        startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
+        dataBuffers = [self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch] for channelIndex in range(self.numChannels)]
+        bufferTimes = self.data[0][startFilterPointer:dataFinger + self.numPointsPerBatch]
+        
+        # Extract sampling frequency from the first batch of data.
+        if not self.samplingFreq:
+            self.setSamplingFrequency(startFilterPointer)
+            
+        # Filter every channel at once and remove bad indices.
+        if self.lookaheadFilter is not None:
+            # Only the new points go through the low-pass.
+            with self.latencyMonitor.span("lookaheadFilter", self.protocolName):
+                lowPassBuffers = [self.lookaheadFilterChannel(channelIndex, startFilterPointer, dataFinger + self.numPointsPerBatch) for channelIndex in range(self.numChannels)]
+            channelsFilteredTime, channelsFilteredData, channelsGoodIndicesMask = self.filterChannels(bufferTimes, dataBuffers, np.asarray(lowPassBuffers))
+        else:
+            channelsFilteredTime, channelsFilteredData, channelsGoodIndicesMask = self.filterChannels(bufferTimes, dataBuffers)
+        # -------------------------------------------------------------- #
+
         # Analyze all incoming EOG channels.
         for channelIndex in range(self.numChannels):
-            
-            # ---------------------- Filter the Data ----------------------- #    
-            # Find the starting/ending points of the data to analyze.
-            startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
-            dataBuffer = np.array(self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch])
-            timePoints = np.array(self.data[0][startFilterPointer:dataFinger + self.numPointsPerBatch])
-            
-            # Extract sampling frequency from the first batch of data.
-            if not self.samplingFreq:
-                self.setSamplingFrequency(startFilterPointer)
-                
-            # Filter the data and remove bad indices.
-            filteredTime, filteredData, goodIndicesMask = self.filterData(timePoints, dataBuffer)
-            # --------------------------------------------------------------- #
+            # The channel's buffer and its filtered data.
+            timePoints, dataBuffer = bufferTimes, dataBuffers[channelIndex]
+            filteredTime, filteredData, goodIndicesMask = channelsFilteredTime[channelIndex], channelsFilteredData[channelIndex], channelsGoodIndicesMask[channelIndex]
             
             # ------------------- Extract Blink Features  ------------------- #
             # Extract EOG peaks only from the vertical channel (channelIndex = 0).
@@ -151,7 +167,8 @@ class eogProtocol(_globalProtocol.globalProtocol):
                 unAnalyzedTimes = filteredTime[unAnalyzedDataPointer:]
                 
                 # Find and record the blinks in the EOG data.
-                self.findBlinks(unAnalyzedTimes, unAnalyzedData)
+                with self.latencyMonitor.span("findBlinks", self.protocolName):
+                    self.findBlinks(unAnalyzedTimes, unAnalyzedData)
             # --------------------------------------------------------------- #
             
             # --------------------- Calibrate Eye Angle --------------------- #
@@ -193,8 +210,8 @@ class eogProtocol(_globalProtocol.globalProtocol):
                 filterOffset = (goodIndicesMask[0:dataFinger - startFilterPointer]).sum(axis = 0, dtype=int)
 
                 # Plot Raw Bioelectric Data (Slide Window as Points Stream in)
-                self.bioelectricDataPlots[channelIndex].set_data(timePoints, rawData)
-                self.bioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1])
+                self.plottingClass.setLineData(self.bioelectricDataPlots[channelIndex], timePoints, rawData)
+                self.plottingClass.setXLimits(self.bioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1])
                                             
                 # Keep Track of Recently Digitized Data
                 # for voltageInd in range(len(channelVoltages)):
@@ -202,15 +219,15 @@ class eogProtocol(_globalProtocol.globalProtocol):
                 # self.trailingAverageData[channelIndex] = self.trailingAverageData[channelIndex][len(channelVoltages)*self.predictEyeAngleGap:]
                 # self.trailingAveragePlots[channelIndex].set_data(filteredTime, self.trailingAverageData[channelIndex][-len(timePoints):])
                 # Plot the Filtered + Digitized Data
-                self.filteredBioelectricDataPlots[channelIndex].set_data(filteredTime[filterOffset:], filteredData[filterOffset:])
-                self.filteredBioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1]) 
+                self.plottingClass.setLineData(self.filteredBioelectricDataPlots[channelIndex], filteredTime[filterOffset:], filteredData[filterOffset:])
+                self.plottingClass.setXLimits(self.filteredBioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1]) 
                 # Plot the Eye's Angle if Electrodes are Calibrated
                 if self.predictEyeAngle[channelIndex]:
                     self.filteredBioelectricPlotAxes[channelIndex].legend(["Eye's Angle: " + "%.3g"%eyeAngle, "Current State: " + self.currentState], loc="upper left")
                 # Add Eye Blink Peaks
                 if channelIndex == 0:
-                    self.eyeBlinkLocPlots[channelIndex].set_data(self.blinksXLocs, self.blinksYLocs)
-                    self.eyeBlinkCulledLocPlots[channelIndex].set_data(self.culledBlinkX, self.culledBlinkY)
+                    self.plottingClass.setLineData(self.eyeBlinkLocPlots[channelIndex], self.blinksXLocs, self.blinksYLocs)
+                    self.plottingClass.setLineData(self.eyeBlinkCulledLocPlots[channelIndex], self.culledBlinkX, self.culledBlinkY)
             # --------------------------------------------------------------- #   
             
         # -------------------- Update Virtual Reality  ---------------------- #
@@ -219,18 +236,26 @@ class eogProtocol(_globalProtocol.globalProtocol):
         #     actionControl.setGaze(eyeAngles)
         # ------------------------------------------------------------------- #
 
-    def filterData(self, timePoints, data):
+    def extractRecordingFeatures(self):
+        # Filter the Vertical Channel Once, Then Find Every Blink in the Recording
+        filteredTime, filteredData, goodIndicesMask = self.filterRecording(channelIndex = 0)
+        unAnalyzedDataPointer = (goodIndicesMask[0:self.lastAnalyzedDataInd]).sum(axis = 0, dtype=int)
+        with self.latencyMonitor.span("findBlinks", self.protocolName):
+            self.findBlinks(filteredTime[unAnalyzedDataPointer:], filteredData[unAnalyzedDataPointer:])
+
+    def filterData(self, timePoints, data, lowPassData = None):
         # Find the bad points associated with motion artifacts
         motionIndices = np.logical_or(data < 0.1, data > 3.18)
-        motionIndices_Broadened = scipy.signal.savgol_filter(motionIndices, max(3, int(self.samplingFreq*2)), 1, mode='nearest', deriv=0)
+        motionIndices_Broadened = self.filteringMethods.savgolFilter.movingAverage(motionIndices, max(3, int(self.samplingFreq*2)))
         goodIndicesMask = motionIndices_Broadened < 0.01
         
-        # Filtering the whole dataset
-        filteredData = self.filteringMethods.bandPassFilter.butterFilter(data, self.cutOffFreq[1], self.samplingFreq, order = 5, filterType = 'low')
-        filteredData = scipy.signal.savgol_filter(filteredData, max(3, int(self.samplingFreq*0.05)), 2, mode='nearest', deriv=0)
+        # Filtering the whole dataset (unless the low-pass was already applied by the lookaheadFilter)
+        if lowPassData is None:
+            filteredData = self.filterPipeline.filterData(data, self.samplingFreq)
+        else:
+            filteredData = self.filterPipeline.filterData(lowPassData, self.samplingFreq, skippedStages = ("lowPass",))
         # Remove the bad points from the filtered data
-        filteredTime = timePoints[goodIndicesMask]
-        filteredData = filteredData[goodIndicesMask]
+        filteredTime, filteredData = self.removeBadPoints(timePoints, filteredData, goodIndicesMask)
         
         return filteredTime, filteredData, goodIndicesMask
 
@@ -281,60 +306,15 @@ class eogProtocol(_globalProtocol.globalProtocol):
                 continue
             
             # Add a buffer to the baseline
-            leftBaselineIndex -= max(leftBaselineIndex, int(self.samplingFreq*0.05))
+            leftBaselineIndex -= min(leftBaselineIndex, int(self.samplingFreq*0.05))
             rightBaselineIndex += int(self.samplingFreq*0.05)
             # --------------------------------------------------------------- #
             
             # -------------------- Extract Blink Features ------------------- #
             peakInd = self.universalMethods.findLocalMax(yData, peakInd, binarySearchWindow = max(1, int(self.samplingFreq*0.005)), maxPointsSearch = len(yData))
-            newFeatures = self.extractFeatures(xData[leftBaselineIndex:rightBaselineIndex+1], yData[leftBaselineIndex:rightBaselineIndex+1].copy(), peakInd-leftBaselineIndex, debugBlinkDetection)
-
-            # Remove Peaks that are not Blinks
-            if len(newFeatures) == 0:
-                #if debugBlinkDetection: print("\t\tNo Features; Time = ", peakTimePoint)
-                continue
-            # Label/Remove Possible Winks
-            elif len(newFeatures) == 1:
-                if debugBlinkDetection: print("\t\tWink")
-                self.culledBlinkX.append(peakTimePoint)
-                self.culledBlinkY.append(yData[peakInd])
-                continue
-            
-            # Record the Blink's Location
-            self.blinksXLocs.append(peakTimePoint)
-            self.blinksYLocs.append(yData[peakInd])
-            # Keep track of the new features
-            self.readData.averageFeatures([peakTimePoint], [newFeatures], self.featureTimes, self.rawFeatures, self.compiledFeatures, self.featureAverageWindow)
-            # --------------------------------------------------------------- #
-            
-            # ----------------- Singular or Multiple Blinks? ---------------- #
-            multPeakSepMax = 0.5   # No Less Than 0.25
-            # Check if the Blink is a Part of a Multiple Blink Sequence
-            if self.singleBlinksX and peakTimePoint - self.singleBlinksX[-1] < multPeakSepMax:
-                # If So, Remove the Last Single Blink as its a Multiple
-                lastBlinkX = self.singleBlinksX.pop()
-                # Check if Other Associated Multiples Have Been Found
-                if self.multipleBlinksX and peakTimePoint - self.multipleBlinksX[-1][-1] < multPeakSepMax:
-                    self.multipleBlinksX[-1].append(peakTimePoint)
-                else:
-                    self.multipleBlinksX.append([lastBlinkX, peakTimePoint])
-            else:
-                self.singleBlinksX.append(peakTimePoint)
-            # --------------------------------------------------------------- #
-            
-            # ----------------------- Plot Tent Shape ----------------------- #
-            if False:
-                peakTentX, peakTentY = newFeatures[0], newFeatures[1]
-                xData = np.array(xData); yData = np.array(yData)
-                # Plot the Peak
-                plt.plot(xData, yData);
-                plt.plot(xData[peakInd], yData[peakInd], 'ko');
-                plt.plot(xData[leftBaselineIndex], yData[leftBaselineIndex], 'go');
-                plt.plot(xData[rightBaselineIndex], yData[rightBaselineIndex], 'ro');
-                plt.plot(peakTentX, peakTentY, 'kx')
-                # Figure Aesthetics
-                plt.xlim([xData[leftBaselineIndex], xData[rightBaselineIndex]])
-                plt.show()
+            # Label the Blink Once its Features are Extracted (Now, or Later if Queued on the featureExtractor)
+            self.extractWindowFeatures(peakTimePoint, [("extractFeatures", xData[leftBaselineIndex:rightBaselineIndex+1], yData[leftBaselineIndex:rightBaselineIndex+1].copy(), peakInd-leftBaselineIndex, debugBlinkDetection)],
+                                       self.recordBlink, yData[peakInd], debugBlinkDetection)
             # --------------------------------------------------------------- #
             
         # Even if no blinks found, we know that blinks wnt reappear in old data.
@@ -397,6 +377,41 @@ class eogProtocol(_globalProtocol.globalProtocol):
 
         return velInds, accelInds, thirdDerivInds, peakBoundaries
     
+    def recordBlink(self, featureTime, features, peakVoltage, debugBlinkDetection = False):
+        # ------------------ Label the Peak by its Features ------------------ #
+        # Remove Peaks that are not Blinks
+        if len(features) == 0:
+            #if debugBlinkDetection: print("\t\tNo Features; Time = ", featureTime)
+            return
+        # Label/Remove Possible Winks
+        elif len(features) == 1:
+            if debugBlinkDetection: print("\t\tWink")
+            self.culledBlinkX.append(featureTime)
+            self.culledBlinkY.append(peakVoltage)
+            return
+        
+        # Record the Blink's Location
+        self.blinksXLocs.append(featureTime)
+        self.blinksYLocs.append(peakVoltage)
+        # Keep track of the new features
+        self.recordFeatures(featureTime, features)
+        # ------------------------------------------------------------------- #
+        
+        # ------------------- Singular or Multiple Blinks? ------------------ #
+        multPeakSepMax = 0.5   # No Less Than 0.25
+        # Check if the Blink is a Part of a Multiple Blink Sequence
+        if self.singleBlinksX and featureTime - self.singleBlinksX[-1] < multPeakSepMax:
+            # If So, Remove the Last Single Blink as its a Multiple
+            lastBlinkX = self.singleBlinksX.pop()
+            # Check if Other Associated Multiples Have Been Found
+            if self.multipleBlinksX and featureTime - self.multipleBlinksX[-1][-1] < multPeakSepMax:
+                self.multipleBlinksX[-1].append(featureTime)
+            else:
+                self.multipleBlinksX.append([lastBlinkX, featureTime])
+        else:
+            self.singleBlinksX.append(featureTime)
+        # ------------------------------------------------------------------- #
+
     def extractFeatures(self, xData, yData, peakInd, debugBlinkDetection = True):
         if len(xData) < int(self.samplingFreq*0.01):
             if debugBlinkDetection: print("\t\tPeak was around noisy data", len(xData), xData[peakInd])
@@ -8,6 +8,7 @@ import numpy as np
 
 # Import Files
 import _globalProtocol
+import _filteringProtocols
 
 # ---------------------------------------------------------------------------#
 # ---------------------------------------------------------------------------#
@@ -22,6 +23,11 @@ class generalProtocol(_globalProtocol.globalProtocol):
         self.stopband_edge = 1           # Common values for EEG are 1 Hz and 2 Hz. If you need to remove more noise, you can choose a higher stopband edge frequency. If you need to preserve the signal more, you can choose a lower stopband edge frequency.
         self.passband_ripple = 0.1       # Common values for EEG are 0.1 dB and 0.5 dB. If you need to remove more noise, you can choose a lower passband ripple. If you need to preserve the signal more, you can choose a higher passband ripple.
         self.stopband_attenuation = 60   # Common values for EEG are 40 dB and 60 dB. If you need to remove more noise, you can choose a higher stopband attenuation. If you need to preserve the signal more, you can choose a lower stopband attenuation.
+        # The filter stages, designed once per sampling frequency: low-pass -> Chebyshev high-pass.
+        self.filterPipeline = _filteringProtocols.filterPipeline().addButter(self.cutOffFreq[1], order = 3, filterType = 'low') \
+                                    .addChebyHighPass(self.cutOffFreq[0], self.stopband_edge, self.passband_ripple, self.stopband_attenuation)
+        # Streaming filter stages: "lowPass" and/or "highPass" filter only the new points (causal, delayed by the group delay; See _filteringProtocols.streamingFilter). The other stages re-filter the buffer with zero phase.
+        self.streamingStages = []
         
         # Initialize common model class
         super().__init__(numPointsPerBatch, moveDataFinger, numChannels, plottingClass, readData)
@@ -33,7 +39,12 @@ class generalProtocol(_globalProtocol.globalProtocol):
         pass
     
     def setSamplingFrequencyParams(self):
-        pass
+        # Design the Streaming Stages Once (The Filters are Linear, so They Can Run Before the Zero-Phase Stages)
+        self.streamingFilters = []
+        if "lowPass" in self.streamingStages:
+            self.streamingFilters.append(_filteringProtocols.streamingFilter(self.filterPipeline.stageSOS("lowPass", self.samplingFreq), self.numChannels))
+        if "highPass" in self.streamingStages:
+            self.streamingFilters.append(_filteringProtocols.streamingFilter(self.filterPipeline.stageSOS("highPass", self.samplingFreq), self.numChannels))
 
     def initPlotPeaks(self): 
         # Establish pointers to the figure
@@ -82,43 +93,52 @@ class generalProtocol(_globalProtocol.globalProtocol):
     # ------------------------- Data Analysis Begins ------------------------ #
 
     def analyzeData(self, dataFinger, predictionModel = None, actionControl = None):
+        # Get the Sampling Frequency from the First Batch (If Not Given)
+        if not self.samplingFreq:
+            self.setSamplingFrequency(max(dataFinger - self.dataPointBuffer, 0))
         
-        # Add incoming Data to Each Respective Channel's Plot
-        for channelIndex in range(self.numChannels):
-            
-            # ---------------------- Filter the Data ----------------------- #    
-            # Band Pass Filter to Remove Noise
-            startBPFindex = max(dataFinger - self.dataPointBuffer, 0)
-            yDataBuffer = self.data[1][channelIndex][startBPFindex:dataFinger + self.numPointsPerBatch].copy()
-            
-            # Get the Sampling Frequency from the First Batch (If Not Given)
-            if not self.samplingFreq:
-                self.setSamplingFrequency(startBPFindex)
+        # ---------------------- Filter the Data ----------------------- #    
+        # Band Pass Filter to Remove Noise
+        startBPFindex = max(dataFinger - self.dataPointBuffer, 0)
+        endDataInd = dataFinger + self.numPointsPerBatch
+        if self.streamingFilters:
+            # Only the New Points Go Through the Streaming Stages; No Buffer is Needed if Every Stage Streams
+            if len(self.streamingFilters) == 2: startBPFindex = dataFinger
+            with self.latencyMonitor.span("streamFilter", self.protocolName):
+                dataBuffers = [self.streamFilterChannel(channelIndex, endDataInd)[startBPFindex:endDataInd] for channelIndex in range(self.numChannels)]
+        else:
+            dataBuffers = [self.data[1][channelIndex][startBPFindex:endDataInd] for channelIndex in range(self.numChannels)]
 
-            # Filter the Data: Low pass Filter and Savgol Filter
-            _, filteredData, _ = self.filterData([], yDataBuffer)
-            # --------------------------------------------------------------- #
-                    
-            # ------------------- Plot Biolectric Signals ------------------- #
-            if self.plotStreamedData:
-                # Get X Data: Shared Axis for All Channels
-                timePoints = np.array(self.data[0][dataFinger:dataFinger + self.numPointsPerBatch])
+        # Filter Every Channel at Once: Low pass and High pass Filters
+        _, channelsFilteredData, _ = self.filterChannels([], dataBuffers, self.streamingStages)
+        # --------------------------------------------------------------- #
+        
+        # Add incoming Data to Each Respective Channel's Plot
+        if self.plotStreamedData:
+            for channelIndex in range(self.numChannels):
+                self.plotChannel(channelIndex, dataFinger, channelsFilteredData)
     
-                # Get New Y Data
-                newYData = self.data[1][channelIndex][dataFinger:dataFinger + self.numPointsPerBatch]
-                # Plot Raw Bioelectric Data (Slide Window as Points Stream in)
-                self.bioelectricDataPlots[channelIndex].set_data(timePoints, newYData)
-                self.bioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1])
+    def plotChannel(self, channelIndex, dataFinger, channelsFilteredData):
+        filteredData = channelsFilteredData[channelIndex]
+                
+        # ------------------- Plot Biolectric Signals ------------------- #
+        # Get X Data: Shared Axis for All Channels
+        timePoints = np.array(self.data[0][dataFinger:dataFinger + self.numPointsPerBatch])
+
+        # Get New Y Data
+        newYData = self.data[1][channelIndex][dataFinger:dataFinger + self.numPointsPerBatch]
+        # Plot Raw Bioelectric Data (Slide Window as Points Stream in)
+        self.plottingClass.setLineData(self.bioelectricDataPlots[channelIndex], timePoints, newYData)
+        self.plottingClass.setXLimits(self.bioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1])
 
-                # Plot the Filtered + Digitized Data
-                self.filteredBioelectricDataPlots[channelIndex].set_data(timePoints, filteredData[-len(timePoints):])
-                self.filteredBioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1]) 
-            # --------------------------------------------------------------- #   
+        # Plot the Filtered + Digitized Data
+        self.plottingClass.setLineData(self.filteredBioelectricDataPlots[channelIndex], timePoints, filteredData[-len(timePoints):])
+        self.plottingClass.setXLimits(self.filteredBioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1]) 
+        # --------------------------------------------------------------- #   
     
-    def filterData(self, timePoints, data):
-        # Filter the Data: Low pass Filter and Savgol Filter
-        filteredData = self.filteringMethods.bandPassFilter.butterFilter(data, self.cutOffFreq[1], self.samplingFreq, order = 3, filterType = 'low')
-        filteredData = self.filteringMethods.bandPassFilter.high_pass_filter(filteredData, self.samplingFreq, self.cutOffFreq[0], self.stopband_edge, self.passband_ripple, self.stopband_attenuation)
+    def filterData(self, timePoints, data, streamedStages = ()):
+        # Filter the Data: Low pass Filter and High pass Filter in One Pass (Skip the Stages Already Streamed)
+        filteredData = self.filterPipeline.filterData(data, self.samplingFreq, streamedStages)
         # filteredData = scipy.signal.savgol_filter(filteredData, 15, 2, mode='nearest', deriv=0)[-(endDataPointer - dataFinger + 1):]
 
         return [], filteredData, []
@@ -11,6 +11,7 @@ import antropy
 
 # Import Files
 import _globalProtocol
+import _filteringProtocols
         
 # ---------------------------------------------------------------------------#
 # ---------------------------------------------------------------------------#
@@ -25,6 +26,9 @@ class gsrProtocol(_globalProtocol.globalProtocol):
         self.tonicFrequencyCutoff = 0.05   # Maximum tonic component frequency.
         self.dataPointBuffer = 5000        # A Prepended Buffer in the Filtered Data that Represents BAD Filtering; Units: Points
         self.cutOffFreq = [None, 15]       # Filter cutoff frequencies: [HPF, LPF].
+        # The filter stages, designed once per sampling frequency: a first order low-pass.
+        self.filterPipeline = _filteringProtocols.filterPipeline().addButter(self.cutOffFreq[1], order = 1, filterType = 'low')
+        self.lookaheadTime = None          # Seconds. If set, the LPF runs forward-backward on the new points only, final after this lookahead (See _filteringProtocols.lookaheadFilter); None re-filters the whole buffer.
         
         # Initialize common model class
         super().__init__(numPointsPerBatch, moveDataFinger, numChannels, plottingClass, readData)
@@ -45,6 +49,13 @@ class gsrProtocol(_globalProtocol.globalProtocol):
         self.minPointsPerBatchPhasic = int(self.samplingFreq*self.featureTimeWindow_Phasic*3/4)
         self.lastAnalyzedDataInd = int(self.samplingFreq*maxFeatureTimeWindow)
         self.dataPointBuffer = max(self.dataPointBuffer, int(self.samplingFreq*15))
+        # Run the LPF Forward-Backward on the New Points Only (If Asked)
+        if self.lookaheadTime is not None:
+            self.lookaheadFilter = _filteringProtocols.lookaheadFilter(self.filterPipeline.stageSOS("lowPass", self.samplingFreq), int(self.samplingFreq*self.lookaheadTime), self.numChannels)
+
+    def getLookBackPoints(self):
+        # The Filter Buffer and the Longer Feature Window
+        return self.dataPointBuffer + int(self.samplingFreq*max(self.featureTimeWindow_Tonic, self.featureTimeWindow_Phasic))
 
     def initPlotPeaks(self): 
         # Establish pointers to the figure
@@ -91,23 +102,33 @@ class gsrProtocol(_globalProtocol.globalProtocol):
     # ----------------------------------------------------------------------- #
     # ------------------------- Data Analysis Begins ------------------------ #
     
-    def analyzeData(self, dataFinger):
+    def analyzeData(self, dataFinger, predictionModel = None, actionControl = None):
+        
+        # ---------------------- Filter the Data ----------------------- #    
+        # Find the starting/ending points of the data to analyze
+        startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
+        dataBuffers = [self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch] for channelIndex in range(self.numChannels)]
+        bufferTimes = self.data[0][startFilterPointer:dataFinger + self.numPointsPerBatch]
         
+        # Extract sampling frequency from the first batch of data
+        if not self.samplingFreq:
+            self.setSamplingFrequency(startFilterPointer)
+            
+        # Filter every channel at once and remove bad indices
+        if self.lookaheadFilter is not None:
+            # Only the new points go through the LPF.
+            with self.latencyMonitor.span("lookaheadFilter", self.protocolName):
+                lowPassBuffers = [self.lookaheadFilterChannel(channelIndex, startFilterPointer, dataFinger + self.numPointsPerBatch) for channelIndex in range(self.numChannels)]
+            channelsFilteredTime, channelsFilteredData, channelsGoodIndicesMask = self.filterChannels(bufferTimes, dataBuffers, np.asarray(lowPassBuffers))
+        else:
+            channelsFilteredTime, channelsFilteredData, channelsGoodIndicesMask = self.filterChannels(bufferTimes, dataBuffers)
+        # -------------------------------------------------------------- #
+
         # Add incoming Data to Each Respective Channel's Plot
         for channelIndex in range(self.numChannels):
-            
-            # ---------------------- Filter the Data ----------------------- #    
-            # Find the starting/ending points of the data to analyze
-            startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
-            dataBuffer = np.array(self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch])
-            timePoints = np.array(self.data[0][startFilterPointer:dataFinger + self.numPointsPerBatch])
-            
-            # Extract sampling frequency from the first batch of data
-            if not self.samplingFreq:
-                self.setSamplingFrequency(startFilterPointer)
-                
-            # Filter the data and remove bad indices
-            filteredTime, filteredData, goodIndicesMask = self.filterData(timePoints, dataBuffer)
+            # The channel's buffer and its filtered data.
+            timePoints, dataBuffer = bufferTimes, dataBuffers[channelIndex]
+            filteredTime, filteredData, goodIndicesMask = channelsFilteredTime[channelIndex], channelsFilteredData[channelIndex], channelsGoodIndicesMask[channelIndex]
             
             # Seperate the tonic (baseline) from the phasic (peaks) data
             tonicComponent, phasicComponent = self.splitPhasicTonic(filteredData)
@@ -131,11 +152,9 @@ class gsrProtocol(_globalProtocol.globalProtocol):
                     
                     # Only extract features if enough information is provided.
                     if self.minPointsPerBatchTonic < len(intervalTimesTonic) and self.minPointsPerBatchPhasic < len(intervalTimesPhasic):
-                        # Calculate the features in this window.
-                        gsrFeatures = self.extractTonicFeatures(intervalTimesTonic, intervalTonicData)
-                        gsrFeatures.extend(self.extractPhasicFeatures(intervalTimesPhasic, intervalPhasicData))
-                        # Keep track of the new features.
-                        self.readData.averageFeatures([featureTime], [gsrFeatures], self.featureTimes, self.rawFeatures, self.compiledFeatures, self.featureAverageWindow)
+                        # Calculate and save the features in this window: the tonic features, then the phasic features.
+                        self.extractWindowFeatures(featureTime, [("extractTonicFeatures", intervalTimesTonic, intervalTonicData), 
+                                                                 ("extractPhasicFeatures", intervalTimesPhasic, intervalPhasicData)], self.recordFeatures)
                 
                     # Keep track of which data has been analyzed 
                     self.lastAnalyzedDataInd += int(self.samplingFreq*10)
@@ -150,21 +169,42 @@ class gsrProtocol(_globalProtocol.globalProtocol):
                 filterOffset = (goodIndicesMask[0:dataFinger - startFilterPointer]).sum(axis = 0, dtype=int)
 
                 # Plot Raw Bioelectric Data (Slide Window as Points Stream in)
-                self.bioelectricDataPlots[channelIndex].set_data(timePoints, rawData)
-                self.bioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1])
+                self.plottingClass.setLineData(self.bioelectricDataPlots[channelIndex], timePoints, rawData)
+                self.plottingClass.setXLimits(self.bioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1])
                                             
                 # Plot the Filtered + Digitized Data
-                self.filteredBioelectricDataPlots[channelIndex].set_data(filteredTime[filterOffset:], filteredData[filterOffset:])
-                self.filteredBioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1]) 
+                self.plottingClass.setLineData(self.filteredBioelectricDataPlots[channelIndex], filteredTime[filterOffset:], filteredData[filterOffset:])
+                self.plottingClass.setXLimits(self.filteredBioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1]) 
             # -------------------------------------------------------------- #   
 
-    def filterData(self, timePoints, data):
-        # Filter the data: LPF and moving average (Savgol) filter
-        filteredData = self.filteringMethods.bandPassFilter.butterFilter(data, self.cutOffFreq[1], self.samplingFreq, order = 1, filterType = 'low')
+    def extractRecordingFeatures(self):
+        # Filter the Whole Recording Once (Like analyzeData, the Features Come From the First Channel)
+        filteredTime, filteredData, goodIndicesMask = self.filterRecording(channelIndex = 0)
+        tonicComponent, phasicComponent = self.splitPhasicTonic(filteredData)
+        timePoints = self.data[0]
+        
+        # Find Every Tonic and Phasic Feature Window at Once
+        stepSize = int(self.samplingFreq*10)
+        endDataInds, startTonicInds, endTonicInds = self.findFeatureWindows(self.lastAnalyzedDataInd, stepSize, self.featureTimeWindow_Tonic, goodIndicesMask)
+        endDataInds, startPhasicInds, endPhasicInds = self.findFeatureWindows(self.lastAnalyzedDataInd, stepSize, self.featureTimeWindow_Phasic, goodIndicesMask)
+        for endDataInd, startTonicInd, endTonicInd, startPhasicInd, endPhasicInd in zip(endDataInds, startTonicInds, endTonicInds, startPhasicInds, endPhasicInds):
+            # Only extract features if enough information is provided.
+            if self.minPointsPerBatchTonic < endTonicInd - startTonicInd and self.minPointsPerBatchPhasic < endPhasicInd - startPhasicInd:
+                self.extractWindowFeatures(timePoints[endDataInd], [("extractTonicFeatures", filteredTime[startTonicInd:endTonicInd], tonicComponent[startTonicInd:endTonicInd]), 
+                                                                    ("extractPhasicFeatures", filteredTime[startPhasicInd:endPhasicInd], phasicComponent[startPhasicInd:endPhasicInd])], self.recordFeatures)
+        # Keep track of which data has been analyzed
+        self.lastAnalyzedDataInd += stepSize*len(endDataInds)
+        
+    def filterData(self, timePoints, data, lowPassData = None):
+        # Filter the data: LPF (unless already applied by the lookaheadFilter) and moving average (Savgol) filter
+        if lowPassData is None:
+            filteredData = self.filterPipeline.filterData(data, self.samplingFreq)
+        else:
+            filteredData = self.filterPipeline.filterData(lowPassData, self.samplingFreq, skippedStages = ("lowPass",))
         #filteredData = scipy.signal.savgol_filter(filteredData, max(int(self.samplingFreq*5), 3), 1, mode='nearest', deriv=0)
-        filteredTime = timePoints.copy()
+        filteredTime = np.broadcast_to(timePoints, filteredData.shape).copy()
         
-        return filteredTime, filteredData, np.ones(len(filteredTime))
+        return filteredTime, filteredData, np.ones(filteredData.shape)
     
     def splitPhasicTonic(self, data):
         # Isolate the tonic component (baseline) of the GSR
@@ -183,6 +223,8 @@ class gsrProtocol(_globalProtocol.globalProtocol):
     
     def compileBatchData(self, filteredTime, filteredData, goodIndicesMask, startFilterPointer, startFeatureTimePointer):
         assert len(goodIndicesMask) >= len(filteredData) == len(filteredTime), print(len(goodIndicesMask), len(filteredData), len(filteredTime))
+        # A window reaching past the buffer starts at the buffer.
+        startFeatureTimePointer = max(startFeatureTimePointer, startFilterPointer)
         
         # Accounts for the missing points (count the number of viable points within each pointer).
         startReferenceFinger = (goodIndicesMask[0:startFeatureTimePointer - startFilterPointer]).sum(axis = 0, dtype=int)
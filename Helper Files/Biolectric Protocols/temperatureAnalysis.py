@@ -82,24 +82,27 @@ class tempProtocol(_globalProtocol.globalProtocol):
     # ----------------------------------------------------------------------- #
     # ------------------------- Data Analysis Begins ------------------------ #
 
-    def analyzeData(self, dataFinger):
+    def analyzeData(self, dataFinger, predictionModel = None, actionControl = None):
         
+        # ---------------------- Filter the Data ----------------------- #    
+        # Find the starting/ending points of the data to analyze
+        startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
+        dataBuffers = [self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch] for channelIndex in range(self.numChannels)]
+        bufferTimes = self.data[0][startFilterPointer:dataFinger + self.numPointsPerBatch]
+        
+        # Get the Sampling Frequency from the First Batch (If Not Given)
+        if not self.samplingFreq:
+            self.setSamplingFrequency(startFilterPointer)
+            
+        # Filter every channel at once and remove bad indices
+        channelsFilteredTime, channelsFilteredData, channelsGoodIndicesMask = self.filterChannels(bufferTimes, dataBuffers)
+        # -------------------------------------------------------------- #
+
         # Add incoming Data to Each Respective Channel's Plot
         for channelIndex in range(self.numChannels):
-            
-            # ---------------------- Filter the Data ----------------------- #    
-            # Find the starting/ending points of the data to analyze
-            startFilterPointer = max(dataFinger - self.dataPointBuffer, 0)
-            dataBuffer = np.array(self.data[1][channelIndex][startFilterPointer:dataFinger + self.numPointsPerBatch])
-            timePoints = np.array(self.data[0][startFilterPointer:dataFinger + self.numPointsPerBatch])
-            
-            # Get the Sampling Frequency from the First Batch (If Not Given)
-            if not self.samplingFreq:
-                self.setSamplingFrequency(startFilterPointer)
-                
-            # Filter the data and remove bad indices
-            filteredTime, filteredData, goodIndicesMask = self.filterData(timePoints, dataBuffer)
-            # --------------------------------------------------------------- #
+            # The channel's buffer and its filtered data.
+            timePoints, dataBuffer = bufferTimes, dataBuffers[channelIndex]
+            filteredTime, filteredData, goodIndicesMask = channelsFilteredTime[channelIndex], channelsFilteredData[channelIndex], channelsGoodIndicesMask[channelIndex]
             
             # ---------------------- Feature Extraction --------------------- #
             if self.collectFeatures:                
@@ -131,30 +134,47 @@ class tempProtocol(_globalProtocol.globalProtocol):
                 filterOffset = (goodIndicesMask[0:dataFinger - startFilterPointer]).sum(axis = 0, dtype=int)
 
                 # Plot Raw Bioelectric Data (Slide Window as Points Stream in)
-                self.bioelectricDataPlots[channelIndex].set_data(timePoints, rawData)
-                self.bioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1])
+                self.plottingClass.setLineData(self.bioelectricDataPlots[channelIndex], timePoints, rawData)
+                self.plottingClass.setXLimits(self.bioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1])
                                             
                 # Plot the Filtered + Digitized Data
-                self.filteredBioelectricDataPlots[channelIndex].set_data(filteredTime[filterOffset:], filteredData[filterOffset:])
-                self.filteredBioelectricPlotAxes[channelIndex].set_xlim(timePoints[0], timePoints[-1]) 
+                self.plottingClass.setLineData(self.filteredBioelectricDataPlots[channelIndex], filteredTime[filterOffset:], filteredData[filterOffset:])
+                self.plottingClass.setXLimits(self.filteredBioelectricPlotAxes[channelIndex], timePoints[0], timePoints[-1]) 
             # --------------------------------------------------------------- #   
     
+    def extractRecordingFeatures(self):
+        # Filter the Whole Recording Once (Like analyzeData, the Features Come From the First Channel)
+        filteredTime, filteredData, goodIndicesMask = self.filterRecording(channelIndex = 0)
+        timePoints = self.data[0]
+        
+        # Find Every Feature Window at Once
+        stepSize = int(self.samplingFreq*1)
+        endDataInds, startGoodInds, endGoodInds = self.findFeatureWindows(self.lastAnalyzedDataInd, stepSize, self.featureTimeWindow, goodIndicesMask)
+        for endDataInd, startGoodInd, endGoodInd in zip(endDataInds, startGoodInds, endGoodInds):
+            # Only extract features if enough information is provided.
+            if self.minPointsPerBatch < endGoodInd - startGoodInd:
+                self.extractWindowFeatures(timePoints[endDataInd], [("extractFeatures", filteredTime[startGoodInd:endGoodInd], filteredData[startGoodInd:endGoodInd])], self.recordFeatures)
+        # Keep track of which data has been analyzed
+        self.lastAnalyzedDataInd += stepSize*len(endDataInds)
+        
     def filterData(self, timePoints, data):
         # Filter the data
         filteredData = self.filteringMethods.bandPassFilter.butterFilter(data, self.cutOffFreq[1], self.samplingFreq, order = 1, filterType = 'low')
         
         # Find the bad points associated with motion artifacts
-        deriv = abs(np.gradient(filteredData, timePoints))
+        deriv = abs(np.gradient(filteredData, timePoints, axis=-1))
         motionIndices = deriv > 0.1
-        motionIndices_Broadened = scipy.signal.savgol_filter(motionIndices, max(3, int(self.samplingFreq*20)), 1, mode='nearest', deriv=0)
+        motionIndices_Broadened = self.filteringMethods.savgolFilter.movingAverage(motionIndices, max(3, int(self.samplingFreq*20)))
         goodIndicesMask = motionIndices_Broadened < 0.01
         
         # Remove the bad points from the data
-        filteredTime = timePoints[goodIndicesMask]
-        filteredData = filteredData[goodIndicesMask]
+        filteredTime, filteredData = self.removeBadPoints(timePoints, filteredData, goodIndicesMask)
 
-        # Finish filtering the data
-        filteredData = scipy.signal.savgol_filter(filteredData, max(3, int(self.samplingFreq*15)), 1, mode='nearest', deriv=0)
+        # Finish filtering the data (each channel kept different points)
+        if np.ndim(goodIndicesMask) == 1:
+            filteredData = self.filteringMethods.savgolFilter.movingAverage(filteredData, max(3, int(self.samplingFreq*15)))
+        else:
+            filteredData = [self.filteringMethods.savgolFilter.movingAverage(channelData, max(3, int(self.samplingFreq*15))) for channelData in filteredData]
         
         return filteredTime, filteredData, goodIndicesMask
 
@@ -167,6 +187,8 @@ class tempProtocol(_globalProtocol.globalProtocol):
     
     def compileBatchData(self, filteredTime, filteredData, goodIndicesMask, startFilterPointer, startFeatureTimePointer):
         assert len(goodIndicesMask) >= len(filteredData) == len(filteredTime), print(len(goodIndicesMask), len(filteredData), len(filteredTime))
+        # A window reaching past the buffer starts at the buffer.
+        startFeatureTimePointer = max(startFeatureTimePointer, startFilterPointer)
         
         # Accounts for the missing points (count the number of viable points within each pointer).
         startReferenceFinger = (goodIndicesMask[0:startFeatureTimePointer - startFilterPointer]).sum(axis = 0, dtype=int)
@@ -206,7 +228,7 @@ class tempProtocol(_globalProtocol.globalProtocol):
         signalChange = data[-1] - data[0]
         averageNoise = np.mean(abs(np.diff(data)))
         averageSquaredNoise = np.mean(np.diff(data)**2) / np.mean(np.diff(timePoints)**2)
-        signalPower = np.trapz(data**2, timePoints) / (timePoints[-1] - timePoints[0])
+        signalPower = np.trapezoid(data**2, timePoints) / (timePoints[-1] - timePoints[0])
         
         # ------------------------------------------------------------------ #  
         # ----------------- Features from Normalized Data ------------------ #
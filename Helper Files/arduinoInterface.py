@@ -10,44 +10,605 @@ Created on Tue Mar  2 13:44:26 2021
 # ---------------------------- Imported Modules ---------------------------- #
 
 # General Modules
+import os
 import sys
 import time
+import threading
+import collections
+import numpy as np
 # Stream Data from Arduino
 import serial
 import pyfirmata2
 import serial.tools.list_ports
+# Time the Reads (The Monitor is Shared With the Analysis)
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "Biolectric Protocols"))
+import _latencyMonitor
+
+# --------------------------------------------------------------------------- #
+# -------------------- Circular Buffer for Streamed Data -------------------- #
+
+class circularBuffer():
+
+    def __init__(self, bufferSize, numChannels):
+        """
+        A fixed-size ring of streamed points shared between the serial reading
+        thread (the producer) and the analysis loop (the consumer). Each row
+        holds one point: [time, channel 1, ..., channel N].
+
+        If the consumer falls behind by more than 'bufferSize' points, the
+        oldest unread points are overwritten and counted as overruns.
+        """
+        # Preallocate the Buffer: [Time, Channel 1, ..., Channel N] per Row
+        self.buffer = np.zeros((bufferSize, numChannels + 1), dtype=np.float64)
+        self.numChannels = numChannels
+        self.bufferSize = bufferSize
+
+        # Total Points Written/Read (Only Wrapped When Indexing the Buffer)
+        self.writePointer = 0
+        self.readPointer = 0
+        # Keep Track of the Points Lost When the Consumer Falls Behind
+        self.numOverrunPoints = 0
+        self.numOverrunEvents = 0
+
+        # Protect the Pointers Across Threads
+        self.bufferCondition = threading.Condition()
+        self.producerFinished = False
+
+    def numUnreadPoints(self):
+        with self.bufferCondition:
+            return self.writePointer - self.readPointer
+
+    def write(self, timePoints, Voltages):
+        """
+        timePoints: 1D array of the new times (numPoints)
+        Voltages: 2D array of the new data (numChannels, numPoints)
+        """
+        numPoints = len(timePoints)
+        if numPoints == 0: return
+
+        # Organize the Block as Rows of [Time, Channel 1, ..., Channel N]
+        newBlock = np.empty((numPoints, self.numChannels + 1), dtype=np.float64)
+        newBlock[:, 0] = timePoints
+        newBlock[:, 1:] = np.asarray(Voltages, dtype=np.float64).T
+        # If the Block is Larger than the Buffer, Only the Newest Points Fit
+        if numPoints > self.bufferSize:
+            newBlock = newBlock[-self.bufferSize:]
+
+        with self.bufferCondition:
+            # If the Consumer Fell Behind, Drop the Oldest Unread Points
+            numOverwritten = self.writePointer + numPoints - self.readPointer - self.bufferSize
+            if numOverwritten > 0:
+                self.readPointer += numOverwritten
+                self.numOverrunPoints += numOverwritten
+                self.numOverrunEvents += 1
+
+            # Copy the Block into the Buffer (Wrapping Around the End)
+            startIndex = (self.writePointer + numPoints - len(newBlock)) % self.bufferSize
+            firstSegment = min(len(newBlock), self.bufferSize - startIndex)
+            self.buffer[startIndex:startIndex + firstSegment] = newBlock[:firstSegment]
+            self.buffer[0:len(newBlock) - firstSegment] = newBlock[firstSegment:]
+            self.writePointer += numPoints
+
+            # Wake Up the Consumer
+            self.bufferCondition.notify_all()
+
+    def closeBuffer(self):
+        # Tell the Consumer No More Data is Coming
+        with self.bufferCondition:
+            self.producerFinished = True
+            self.bufferCondition.notify_all()
+
+    def readBlock(self, timeout = None):
+        """
+        Take ALL the unread points out of the buffer as one block. Waits up to
+        'timeout' seconds for data (None waits forever).
+
+        Returns:
+            timePoints: 1D array (numPoints)
+            Voltages: 2D array (numChannels, numPoints)
+        """
+        with self.bufferCondition:
+            # Wait for the Producer to Add Data
+            self.bufferCondition.wait_for(lambda: self.writePointer > self.readPointer or self.producerFinished, timeout = timeout)
+
+            # Find the Unread Rows in the Buffer
+            numPoints = self.writePointer - self.readPointer
+            startIndex = self.readPointer % self.bufferSize
+            # Copy the Rows Out (Wrapping Around the End)
+            if startIndex + numPoints <= self.bufferSize:
+                newBlock = self.buffer[startIndex:startIndex + numPoints].copy()
+            else:
+                newBlock = np.concatenate((self.buffer[startIndex:], self.buffer[0:startIndex + numPoints - self.bufferSize]))
+            self.readPointer += numPoints
+
+        return newBlock[:, 0], newBlock[:, 1:].T
+
+# --------------------------------------------------------------------------- #
+# ----------------------- Receive Buffer for Serial Bytes ------------------- #
+
+class receiveBuffer():
+
+    def __init__(self, bufferSize = 2**16):
+        """
+        A reusable buffer for the bytes read from the serial port. The port is
+        read straight into a preallocated bytearray (readinto), and the unread
+        bytes are tracked with two cursors, so taking out a line or a block of
+        lines returns a memoryview without copying. The unread bytes are only
+        moved back to the start (compacted) when the end of the buffer is reached.
+
+        The views returned are only valid until the next read into the buffer.
+        """
+        self.buffer = bytearray(bufferSize)
+        self.bufferView = memoryview(self.buffer)
+        self.readCursor = 0     # The first unread byte.
+        self.writeCursor = 0    # The end of the received bytes.
+
+    def __len__(self):
+        return self.writeCursor - self.readCursor
+
+    def clear(self):
+        self.readCursor = 0; self.writeCursor = 0
+
+    def makeRoom(self, numBytes):
+        """Make sure 'numBytes' can be written after the received bytes."""
+        if self.writeCursor + numBytes <= len(self.buffer): return
+        numUnreadBytes = len(self)
+
+        # Grow the Buffer if the Unread Bytes Would Not Leave Room
+        if numUnreadBytes + numBytes > len(self.buffer):
+            newBuffer = bytearray(max(2*len(self.buffer), numUnreadBytes + numBytes))
+            newBuffer[0:numUnreadBytes] = self.bufferView[self.readCursor:self.writeCursor]
+            self.buffer = newBuffer; self.bufferView = memoryview(self.buffer)
+        # Otherwise, Move the Unread Bytes to the Start
+        else:
+            self.buffer[0:numUnreadBytes] = bytes(self.bufferView[self.readCursor:self.writeCursor])
+        self.readCursor = 0; self.writeCursor = numUnreadBytes
+
+    def readFromPort(self, ser):
+        """Read everything waiting in the port (waiting up to its timeout for at least one byte). Returns the number of bytes read."""
+        numBytes = max(1, ser.in_waiting)
+        self.makeRoom(numBytes)
+        # Read Directly into the Buffer
+        numBytesRead = ser.readinto(self.bufferView[self.writeCursor:self.writeCursor + numBytes]) or 0
+        self.writeCursor += numBytesRead
+
+        return numBytesRead
+
+    def extend(self, newBytes):
+        """Add bytes that did not come from the port (Ex: synthetic streams)."""
+        self.makeRoom(len(newBytes))
+        self.buffer[self.writeCursor:self.writeCursor + len(newBytes)] = newBytes
+        self.writeCursor += len(newBytes)
+
+    def unreadBytes(self):
+        return self.bufferView[self.readCursor:self.writeCursor]
+
+    def consume(self, numBytes):
+        """Mark the first 'numBytes' unread bytes as read."""
+        self.readCursor += numBytes
+        # Start Over at the Beginning When Everything is Read
+        if self.readCursor == self.writeCursor: self.clear()
+
+    def readline(self):
+        """Returns the next complete line (with its newline), or None if it has not fully arrived."""
+        lineEnd = self.buffer.find(b"\n", self.readCursor, self.writeCursor)
+        if lineEnd < 0: return None
+        # Return the Line Without Copying It
+        line = self.bufferView[self.readCursor:lineEnd + 1]
+        self.readCursor = lineEnd + 1
+
+        return line
+
+    def readLines(self):
+        """Returns all the complete lines as one block (empty if no line has fully arrived)."""
+        lastLineEnd = self.buffer.rfind(b"\n", self.readCursor, self.writeCursor)
+        lines = self.bufferView[self.readCursor:lastLineEnd + 1]
+        self.consume(len(lines))
+
+        return lines
+
+# --------------------------------------------------------------------------- #
+# --------------------- Binary Frames from the Arduino ---------------------- #
+
+class binaryFrameDecoder():
+
+    def __init__(self, numChannels):
+        """
+        Decodes the binary frames sent by analogPortMonitoring.ino when
+        'binaryStreaming' is true. Each frame is little-endian and packed:
+            syncWord (uint16, 0x5AA5) | sequenceNumber (uint8) | deltaMicros (uint32) |
+            adcCounts (uint16 x numChannels) | checksum (uint8)
+        The checksum is the sum (mod 256) of the bytes between the sync word and itself.
+        """
+        self.numChannels = numChannels
+        # Specify the Frame's Layout
+        self.syncWord = 0x5AA5
+        self.frameDtype = np.dtype([('syncWord', '<u2'), ('sequenceNumber', 'u1'), ('deltaMicros', '<u4'),
+                                    ('adcCounts', '<u2', (numChannels,)), ('checksum', 'u1')])
+        self.frameSize = self.frameDtype.itemsize
+
+        # Keep Track of the Stream's Health
+        self.numCorruptBytes = 0        # Bytes skipped while searching for the next valid frame.
+        self.numDroppedFrames = 0       # Frames missing from the sequence numbers.
+        self.lastSequenceNumber = None  # The sequence number of the last decoded frame.
+
+    def validFrames(self, frameBytes):
+        """frameBytes: 2D uint8 array (numFrames, frameSize). Returns a boolean mask of the good frames."""
+        # Check the Sync Word
+        goodSyncWord = (frameBytes[:, 0] == (self.syncWord & 0xFF)) & (frameBytes[:, 1] == (self.syncWord >> 8))
+        # Check the Checksum
+        checksums = frameBytes[:, 2:-1].sum(axis = 1, dtype=np.uint64) % 256
+
+        return goodSyncWord & (checksums == frameBytes[:, -1])
+
+    def decodeFrames(self, byteChunk):
+        """
+        Parameters
+        ----------
+        byteChunk : bytes-like
+            Raw bytes from the Arduino. May start/end in the middle of a frame.
+
+        Returns
+        -------
+        frames : structured array (numFrames) with the frameDtype fields.
+        remainingBytes : bytes; The trailing bytes that may be the start of the next frame.
+        """
+        rawBytes = np.frombuffer(byteChunk, dtype=np.uint8)
+        numFrames = len(rawBytes) // self.frameSize
+
+        # Fast Path: The Chunk is Aligned and Every Frame is Good (No Copies)
+        if numFrames != 0:
+            frameBytes = rawBytes[:numFrames*self.frameSize].reshape(numFrames, self.frameSize)
+            if self.validFrames(frameBytes).all():
+                frames = np.frombuffer(byteChunk, dtype=self.frameDtype, count=numFrames)
+                self.checkSequence(frames)
+                return frames, bytes(rawBytes[numFrames*self.frameSize:])
+
+        # Otherwise, Resynchronize: Find Every Possible Start of a Complete Frame
+        possibleStarts = np.flatnonzero((rawBytes[:-1] == (self.syncWord & 0xFF)) & (rawBytes[1:] == (self.syncWord >> 8)))
+        possibleStarts = possibleStarts[possibleStarts + self.frameSize <= len(rawBytes)]
+        # Keep the Frames that Pass the Checksum
+        frameBytes = rawBytes[possibleStarts[:, np.newaxis] + np.arange(self.frameSize)]
+        goodFrames = self.validFrames(frameBytes)
+        possibleStarts = possibleStarts[goodFrames]; frameBytes = frameBytes[goodFrames]
+
+        # Remove Good Checksums Found Inside Another Frame
+        keepFrames = np.zeros(len(possibleStarts), dtype=bool)
+        frameEnd = 0
+        for frameInd, frameStart in enumerate(possibleStarts):
+            if frameStart >= frameEnd:
+                keepFrames[frameInd] = True
+                frameEnd = frameStart + self.frameSize
+        frames = np.ascontiguousarray(frameBytes[keepFrames]).view(self.frameDtype).reshape(-1)
+
+        # Keep Any Bytes that Could Begin an Incomplete Frame
+        startRemainingBytes = max(frameEnd, len(rawBytes) - self.frameSize + 1, 0)
+        self.numCorruptBytes += startRemainingBytes - len(frames)*self.frameSize
+        self.checkSequence(frames)
+
+        return frames, bytes(rawBytes[startRemainingBytes:])
+
+    def checkSequence(self, frames):
+        # Count the Frames Missing Between Sequence Numbers (Wrapping at 255)
+        if len(frames) == 0: return
+        sequenceNumbers = frames['sequenceNumber'].astype(np.int64)
+        if self.lastSequenceNumber is not None:
+            sequenceNumbers = np.concatenate(([self.lastSequenceNumber], sequenceNumbers))
+        self.numDroppedFrames += int(((np.diff(sequenceNumbers) - 1) % 256).sum())
+        self.lastSequenceNumber = sequenceNumbers[-1]
+
+    def encodeFrames(self, deltaMicros, adcCounts, firstSequenceNumber = 0):
+        """
+        Build the bytes the Arduino would send. Used to test the decoder without a board.
+            deltaMicros: 1D array (numFrames)
+            adcCounts: 2D array (numFrames, numChannels)
+        """
+        frames = np.zeros(len(deltaMicros), dtype=self.frameDtype)
+        frames['syncWord'] = self.syncWord
+        frames['sequenceNumber'] = (firstSequenceNumber + np.arange(len(deltaMicros))) % 256
+        frames['deltaMicros'] = deltaMicros
+        frames['adcCounts'] = np.asarray(adcCounts).reshape(len(deltaMicros), self.numChannels)
+        # Add the Checksum
+        frameBytes = frames.view(np.uint8).reshape(len(frames), self.frameSize)
+        frames['checksum'] = frameBytes[:, 2:-1].sum(axis = 1, dtype=np.uint64) % 256
+
+        return frames.tobytes()
+
+# --------------------------------------------------------------------------- #
+# -------------------------- Repair Lost Data Points ------------------------ #
+
+class sampleGapRepair():
+
+    def __init__(self, repairPolicy = "interpolate", gapThreshold = 1.5, maxRepairPoints = 5, maxGapEvents = 1000):
+        """
+        Finds the points lost from the stream and repairs them before analysis.
+        Lost points are the NaN points left by the parsers (malformed lines or
+        missing binary frames) and jumps in time longer than 'gapThreshold'
+        times the typical time between points (Ex: buffer overruns).
+
+        repairPolicy:
+            "mark": Record where the points were lost (gapEvents) without adding points.
+            "interpolate": Fill the lost points linearly between their neighbors.
+            "hold": Fill the lost points with the last good point.
+        Only runs of up to 'maxRepairPoints' lost points are filled; longer outages, and the
+        outage of a reconnect (See markNextGap), are always just marked.
+        """
+        assert repairPolicy in ["mark", "interpolate", "hold"], "Unknown repair policy: " + str(repairPolicy)
+        self.repairPolicy = repairPolicy
+        self.gapThreshold = gapThreshold
+        self.maxRepairPoints = maxRepairPoints
+        self.maxGapEvents = maxGapEvents    # The number of recent gaps to remember.
+        self.resetCounters()
+
+    def resetCounters(self):
+        # Streaming Statistics
+        self.numLostPoints = 0              # Points lost from the stream.
+        self.numRepairedPoints = 0          # Lost points filled in by the repair policy.
+        self.gapEvents = collections.deque(maxlen = self.maxGapEvents)  # (Time, Number of Lost Points) for each gap.
+        # The Stream's Previous State
+        self.samplingPeriod = None          # The typical time between points.
+        self.lastTimePoint = None; self.lastVoltages = None
+        self.markNextGap = False            # Only mark the next jump in time (Ex: the board was reconnected).
+
+    def repairBlock(self, timePoints, Voltages):
+        """
+        timePoints: 1D array (numPoints)
+        Voltages: 2D array (numChannels, numPoints); NaN where a point was lost.
+
+        Returns the repaired timePoints and Voltages.
+        """
+        if len(timePoints) == 0: return timePoints, Voltages
+        timePoints = np.asarray(timePoints, dtype=np.float64); Voltages = np.asarray(Voltages, dtype=np.float64)
+        # Start from the Last Point of the Previous Block (to Find the Gaps Between Blocks)
+        continuingStream = self.lastTimePoint is not None
+        if continuingStream:
+            timePoints = np.concatenate(([self.lastTimePoint], timePoints))
+            Voltages = np.concatenate((self.lastVoltages[:, np.newaxis], Voltages), axis = 1)
+
+        # Learn the Typical Time Between Points
+        timeSteps = np.diff(timePoints)
+        if len(timeSteps) >= 10 or (self.samplingPeriod is None and len(timeSteps) != 0):
+            self.samplingPeriod = np.median(timeSteps)
+
+        # Add NaN Points Inside the Jumps in Time
+        markedGapIndex = None
+        if self.samplingPeriod:
+            numMissing = np.where(timeSteps > self.gapThreshold*self.samplingPeriod, np.round(timeSteps/self.samplingPeriod).astype(int) - 1, 0)
+            if numMissing.any():
+                gapIndices = np.repeat(np.arange(1, len(timePoints)), numMissing)
+                # The First Added Point Starts the Gap to Only Mark
+                if self.markNextGap:
+                    markedGapIndex = gapIndices[0]; self.markNextGap = False
+                # Step Evenly from the Point Before Each Gap
+                gapSteps = np.arange(len(gapIndices)) - np.repeat(np.cumsum(numMissing) - numMissing, numMissing) + 1
+                timePoints = np.insert(timePoints, gapIndices, timePoints[gapIndices - 1] + gapSteps*self.samplingPeriod)
+                Voltages = np.insert(Voltages, gapIndices, np.nan, axis = 1)
+
+        lostPoints = np.isnan(Voltages).any(axis = 0)
+        if lostPoints.any():
+            # Record Each Run of Lost Points
+            runStarts = np.flatnonzero(lostPoints & ~np.concatenate(([False], lostPoints[:-1])))
+            runEnds = np.flatnonzero(lostPoints & ~np.concatenate((lostPoints[1:], [False]))) + 1
+            self.gapEvents.extend(zip(timePoints[runStarts].tolist(), (runEnds - runStarts).tolist()))
+            self.numLostPoints += int(lostPoints.sum())
+
+            # Only Fill the Short Runs; Longer Outages (and a Reconnect's) are Marked
+            repairedRuns = (runEnds - runStarts <= self.maxRepairPoints) if self.repairPolicy != "mark" else np.zeros(len(runStarts), dtype=bool)
+            if markedGapIndex is not None:
+                repairedRuns &= ~((runStarts <= markedGapIndex) & (markedGapIndex < runEnds))
+            repairedPoints = np.repeat(repairedRuns, runEnds - runStarts)
+            # Only Keep the Points Received (and the Ones to Fill)
+            keptPoints = ~lostPoints
+            keptPoints[lostPoints] = repairedPoints
+            goodPoints = ~lostPoints[keptPoints]
+            timePoints = timePoints[keptPoints]; Voltages = Voltages[:, keptPoints]
+            
+            if repairedPoints.any() and goodPoints.any():
+                if self.repairPolicy == "hold":
+                    # Repeat the Last Good Point
+                    lastGoodPoints = np.maximum.accumulate(np.where(goodPoints, np.arange(len(goodPoints)), 0))
+                    Voltages[:, ~goodPoints] = Voltages[:, lastGoodPoints[~goodPoints]]
+                # Interpolate (Also Fills Lost Points Before the First Good Point)
+                for channelVoltages in Voltages:
+                    lostChannelPoints = np.isnan(channelVoltages)
+                    channelVoltages[lostChannelPoints] = np.interp(timePoints[lostChannelPoints], timePoints[~lostChannelPoints], channelVoltages[~lostChannelPoints])
+                self.numRepairedPoints += int(repairedPoints.sum())
+            elif not goodPoints.all():
+                # Nothing to Fill From
+                timePoints = timePoints[goodPoints]; Voltages = Voltages[:, goodPoints]
+
+        # Remember the Last Point for the Next Block
+        if len(timePoints) != 0:
+            self.lastTimePoint = timePoints[-1]; self.lastVoltages = Voltages[:, -1].copy()
+        # Remove the Previous Block's Point
+        if continuingStream:
+            timePoints = timePoints[1:]; Voltages = Voltages[:, 1:]
+
+        return timePoints, Voltages
+
+# --------------------------------------------------------------------------- #
+# ------------------------ Align Board and Host Clocks ---------------------- #
+
+class boardClock():
+
+    def __init__(self, maxArrivals = 2000):
+        """
+        Maps a board's time (the summed Arduino time deltas) onto the host's clock
+        (time.perf_counter). Every parsed block is recorded with the host time it
+        arrived. The arrival times are regressed against the board times to get
+        the board's clock drift, and the offset is taken from the least-delayed
+        arrival (the lower envelope), since the serial link only ever adds delay.
+        """
+        self.maxArrivals = maxArrivals      # The number of recent arrivals used in the fit.
+        self.clockLock = threading.Lock()
+        self.resetClock()
+
+    def resetClock(self):
+        with self.clockLock:
+            self.boardTimes = []; self.hostTimes = []
+            self.numPoints = 0; self.firstBoardTime = None
+        # Clock Parameters: hostTime = clockOffset + clockSlope*boardTime
+        self.clockSlope = 1; self.clockOffset = None
+
+    def addArrival(self, hostTime, timePoints):
+        """Record a block of points (board times) that finished arriving at 'hostTime'."""
+        with self.clockLock:
+            if self.firstBoardTime is None: self.firstBoardTime = timePoints[0]
+            self.boardTimes.append(timePoints[-1]); self.hostTimes.append(hostTime)
+            self.numPoints += len(timePoints)
+            # Only Keep the Recent Arrivals
+            if len(self.boardTimes) > self.maxArrivals:
+                del self.boardTimes[0]; del self.hostTimes[0]
+
+    def fitClock(self):
+        with self.clockLock:
+            boardTimes = np.array(self.boardTimes); hostTimes = np.array(self.hostTimes)
+        if len(boardTimes) == 0: return
+
+        # Fit the Drift Once the Arrivals Span Some Time
+        if len(boardTimes) > 10 and boardTimes[-1] - boardTimes[0] > 1:
+            clockSlope, clockIntercept = np.polyfit(boardTimes - boardTimes[0], hostTimes, 1)
+            # Refit on the Less-Delayed Half of the Arrivals (Ignores Backlogs and Scheduling Delays)
+            arrivalDelays = hostTimes - clockIntercept - clockSlope*(boardTimes - boardTimes[0])
+            fastArrivals = arrivalDelays <= np.median(arrivalDelays)
+            if boardTimes[fastArrivals][-1] - boardTimes[fastArrivals][0] > 1:
+                clockSlope = np.polyfit(boardTimes[fastArrivals] - boardTimes[0], hostTimes[fastArrivals], 1)[0]
+            self.clockSlope = clockSlope
+        # The Least-Delayed Arrival Sets the Offset
+        self.clockOffset = np.min(hostTimes - self.clockSlope*boardTimes)
+
+    def toHostTime(self, timePoints):
+        self.fitClock()
+        return self.clockOffset + self.clockSlope*np.asarray(timePoints)
+
+    def clockStatistics(self):
+        """Returns the board's sampling rate (in host seconds) and how much faster its clock runs than the host's (ppm)."""
+        with self.clockLock:
+            boardTimeSpan = self.boardTimes[-1] - self.firstBoardTime if self.boardTimes else 0
+            numPoints = self.numPoints
+        samplingFreq = (numPoints - 1) / (boardTimeSpan*self.clockSlope) if boardTimeSpan > 0 else 0
+
+        return samplingFreq, (1/self.clockSlope - 1)*1E6
 
 # --------------------------------------------------------------------------- #
 # ----------------- Stream Data from Arduino Can Edit ----------------------- #
 
 class arduinoRead():
-    def __init__(self, mainSerialNum = None):
+    def __init__(self, mainSerialNum = None, streamingFormat = "ascii"):
         # Save Arduino Serial Numbers
         self.mainSerialNum = mainSerialNum
+        self.streamingFormat = streamingFormat.lower()  # "ascii" lines or "binary" frames (See analogPortMonitoring.ino)
         
         self.currentTime = 0
 
         # Connect to the Arduinos
         self.mainArduino = self.initiateArduino(self.mainSerialNum)
         
+        # Reconnect Parameters (See reconnectArduino)
+        self.autoReconnect = True       # Reopen the port if the link drops, instead of ending the stream.
+        self.reconnectTimeout = 60      # Seconds to keep trying before giving up.
+        self.maxReconnectDelay = 5      # The longest wait (seconds) between attempts; starts at 0.1 and doubles.
+        self.numReconnects = 0
+        self.stopReconnecting = threading.Event()
+        self.resyncToLine = False       # Drop the partial line received first after reconnecting (or a fast start).
+        
         # Initialize Arduino Buffer
-        self.arduinoBuffer = bytearray()
+        self.arduinoBuffer = receiveBuffer()
+        self.numBadReads = 0            # The number of malformed lines skipped by parseReadBlock
+        self.frameDecoder = None        # Decodes binary frames; created once the number of channels is known
+        self.gapRepair = None           # A sampleGapRepair to fill the lost points (None leaves the stream as parsed)
         
+        # Background Acquisition Thread (Started with startReadingThread)
+        self.readingThread = None
+        self.dataBuffer = None
+        self.readingError = None
+        self.streamingActive = threading.Event()
+        self.boardClock = boardClock()  # Records when each block arrives (to align several boards)
+        
+    # ---------------------------------------------------------------------- #
+    # ----------------------- Background Acquisition ----------------------- #
+
+    def startReadingThread(self, numChannels, maxVolt = 5, adcResolution = 1023, bufferSize = 2**18):
+        """
+        Continuously drain the serial port into a circular buffer on a
+        background thread, so slow analysis batches do not stall the port.
+        The analysis loop collects the points with readBlock().
+        """
+        # Initialize the Shared Buffer
+        self.dataBuffer = circularBuffer(bufferSize, numChannels)
+        self.readingError = None
+        self.boardClock.resetClock()
+        self.stopReconnecting.clear()
+
+        # Start the Acquisition Thread
+        self.streamingActive.set()
+        self.readingThread = threading.Thread(target = self.readingLoop, args = (numChannels, maxVolt, adcResolution),
+                                              name = "arduinoReadingThread", daemon = True)
+        self.readingThread.start()
+
+    def stopReadingThread(self, timeout = 5):
+        # Tell the Thread to Stop and Wait for it
+        self.streamingActive.clear()
+        self.stopReconnecting.set()
+        if self.readingThread is not None:
+            self.readingThread.join(timeout)
+        self.readingThread = None
+
+    def readingLoop(self, numChannels, maxVolt, adcResolution):
+        try:
+            while self.streamingActive.is_set():
+                # Read and Parse Everything Waiting in the Port (Reconnecting if the Link Drops)
+                try:
+                    Voltages, timePoints = self.readParsedBlock(self.mainArduino, numChannels, maxVolt, adcResolution, repairGaps = False)
+                except (serial.SerialException, OSError) as error:
+                    if not self.reconnectArduino(error): raise
+                    continue
+                if len(timePoints) != 0: self.boardClock.addArrival(time.perf_counter(), timePoints)
+                # Hand the Data to the Analysis Loop
+                self.dataBuffer.write(timePoints, Voltages)
+        except Exception as error:
+            # Let the Analysis Loop Know the Stream Failed
+            self.readingError = error
+        finally:
+            self.streamingActive.clear()
+            # Wake Up the Analysis Loop
+            self.dataBuffer.closeBuffer()
+
+    def readBlock(self, timeout = 1):
+        """Returns all the points collected by the reading thread as (timePoints, Voltages)."""
+        timePoints, Voltages = self.dataBuffer.readBlock(timeout = timeout)
+        # Report any Errors From the Reading Thread
+        if len(timePoints) == 0 and self.readingError is not None:
+            raise self.readingError
+        # Fill the Lost Points (Including Points Overwritten in the Buffer)
+        if self.gapRepair is not None:
+            timePoints, Voltages = self.gapRepair.repairBlock(timePoints, Voltages)
+
+        return timePoints, Voltages
+    
+    def numOverrunPoints(self):
+        return self.dataBuffer.numOverrunPoints if self.dataBuffer is not None else 0
+
     def printPortNums(self):
         ports = serial.tools.list_ports.comports()
         for port in ports:
             print(port.serial_number)
 
-    def initiateArduino(self, arduinoSerialNum):
+    def initiateArduino(self, arduinoSerialNum, exitOnFailure = True):
         arduinoControl = None
         if arduinoSerialNum:
             try:
                 # Try to Connect to the Arduino
                 arduinoPort = self.findArduino(serialNum = arduinoSerialNum)
+                # Connect Directly to a Device Path (Ex: virtualArduino.devicePath)
+                if arduinoPort is None and os.path.exists(arduinoSerialNum):
+                    arduinoPort = arduinoSerialNum
                 arduinoControl = serial.Serial(arduinoPort, baudrate=115200, timeout=1)
                 arduinoControl.close(); arduinoControl.open();
 
             except Exception as e:
+                # When Reconnecting, Let the Caller Try Again
+                if not exitOnFailure: return None
                 # If No Connection Established, Exit Program and Inform User
                 print("Cannot Connect to Arudino", arduinoSerialNum);
                 print("Error Message:", e)
@@ -57,6 +618,46 @@ class arduinoRead():
         # Retun the Arduino actionControl
         return arduinoControl
 
+    def reconnectArduino(self, error):
+        """
+        Reopen the board after the link drops: find it again by its serial number
+        (the port name may change), retrying with a growing delay until
+        'reconnectTimeout'. The stream continues where it left off. The time
+        without data is added to the stream's time, so the gap is found and
+        marked (never filled) by the gapRepair. Returns True if reconnected.
+        """
+        if not self.autoReconnect or not self.mainSerialNum: return False
+        print("\t !!! Lost the Arduino " + str(self.mainSerialNum) + " (" + str(error) + "); Reconnecting !!!")
+        disconnectTime = time.perf_counter()
+        try:
+            self.mainArduino.close()
+        except Exception:
+            pass
+        
+        # Try to Reconnect, Waiting Longer Each Time
+        reconnectDelay = 0.1
+        while time.perf_counter() - disconnectTime < self.reconnectTimeout:
+            if self.stopReconnecting.wait(reconnectDelay): return False
+            arduinoControl = self.initiateArduino(self.mainSerialNum, exitOnFailure = False)
+            if arduinoControl is not None: break
+            reconnectDelay = min(2*reconnectDelay, self.maxReconnectDelay)
+        else:
+            print("\t !!! Could Not Reconnect to the Arduino " + str(self.mainSerialNum) + " !!!")
+            return False
+        
+        # Start Reading at the Next Complete Line/Frame
+        self.mainArduino = arduinoControl
+        self.arduinoBuffer.clear()
+        self.resyncToLine = self.streamingFormat != "binary"
+        if self.frameDecoder is not None: self.frameDecoder.lastSequenceNumber = None
+        # The Board Restarts its Clock: Count the Time Without Data
+        self.currentTime += time.perf_counter() - disconnectTime
+        if self.gapRepair is not None: self.gapRepair.markNextGap = True
+        self.numReconnects += 1
+        print("\tReconnected to the Arduino After %.1f Seconds" % (time.perf_counter() - disconnectTime))
+        
+        return True
+
     def initiateArduinoFirmata(self):
         # Find and Connect to the Arduino Board
         PORT =  pyfirmata2.Arduino.AUTODETECT
@@ -165,22 +766,172 @@ class arduinoRead():
         return raw
     
     def readline(self, ser):
-        i = self.arduinoBuffer.find(b"\n")
-        if i >= 0:
-            r = self.arduinoBuffer[:i+1]
-            self.arduinoBuffer = self.arduinoBuffer[i+1:]
-            return r
-        while True:
-            i = max(1, min(2048, ser.in_waiting))
-            data = ser.read(i)
-            i = data.find(b"\n")
-            if i >= 0:
-                r = self.arduinoBuffer + data[:i+1]
-                self.arduinoBuffer[0:] = data[i+1:]
-                return r
+        """Returns the next line from the port (a memoryview, valid until the next read)."""
+        line = self.arduinoBuffer.readline()
+        while line is None:
+            self.arduinoBuffer.readFromPort(ser)
+            line = self.arduinoBuffer.readline()
+        return line
+
+
+    def readParsedBlock(self, ser, numChannels, maxVolt = 5, adcResolution = 1023, repairGaps = True):
+        """
+        Read all the bytes waiting in the port (waiting up to the port's timeout for at
+        least one byte) and parse every complete line in one pass. The partial line at
+        the end is left in self.arduinoBuffer for the next read. If there is a gapRepair,
+        the lost points are marked, and repaired if 'repairGaps'.
+
+        Returns the Voltages (numChannels, numPoints) and timePoints (numPoints). Both
+        are empty if no complete line has arrived yet.
+        """
+        # Wait for New Bytes (Limited by the Port's Timeout), then Take Everything Waiting
+        with _latencyMonitor.monitor.span("serialRead"):
+            self.arduinoBuffer.readFromPort(ser)
+        
+        markLostPoints = self.gapRepair is not None
+        with _latencyMonitor.monitor.span("parseRead"):
+            if self.streamingFormat == "binary":
+                # Decode Binary Frames
+                unreadBytes = self.arduinoBuffer.unreadBytes()
+                Voltages, timePoints, remainingBytes = self.parseBinaryBlock(unreadBytes, numChannels, maxVolt, adcResolution, markLostPoints)
+                self.arduinoBuffer.consume(len(unreadBytes) - len(remainingBytes))
             else:
-                self.arduinoBuffer.extend(data)
+                # After Reconnecting, Skip to the First Complete Line
+                if self.resyncToLine:
+                    firstLine = self.arduinoBuffer.readline()
+                    self.resyncToLine = firstLine is None
+                    if firstLine is None: self.arduinoBuffer.clear()
+                # Parse the Complete Lines
+                Voltages, timePoints, numBadReads, _ = self.parseReadBlock(self.arduinoBuffer.readLines(), numChannels, maxVolt, adcResolution, markLostPoints)
+                # Keep Track of the Corrupted Lines
+                self.numBadReads += numBadReads
+        
+        # Fill the Lost Points
+        if markLostPoints and repairGaps:
+            timePoints, Voltages = self.gapRepair.repairBlock(timePoints, Voltages)
+
+        return Voltages, timePoints
+
+    def parseReadBlock(self, byteChunk, numChannels, maxVolt = 5, adcResolution = 1023, markLostPoints = False):
+        """
+        Vectorized replacement for parseRead: parse a contiguous chunk of many
+        'time,value1,...,valueN' lines in one pass.
+
+        Parameters
+        ----------
+        byteChunk : bytes-like
+            Raw bytes from the Arduino. Anything after the last newline is
+            treated as an incomplete line and returned unparsed.
+        numChannels : int
+            The number of values expected after the time on each line.
+        markLostPoints : bool
+            Keep a NaN point where each malformed line was (see sampleGapRepair),
+            instead of skipping it. Its time step is the block's median step.
+
+        Returns
+        -------
+        Voltages : 2D array (numChannels, numPoints); Voltages in volts.
+        timePoints : 1D array (numPoints); The cumulative time of each point.
+        numBadReads : int; The number of malformed lines that were skipped.
+        remainingBytes : bytes; The unparsed bytes after the last newline.
+        """
+        byteChunk = bytes(byteChunk)
+        # Seperate the Complete Lines from the Partial Line at the End
+        lastNewline = byteChunk.rfind(b"\n")
+        remainingBytes = byteChunk[lastNewline + 1:]
+        rawReads = byteChunk[:lastNewline + 1]
+        if len(rawReads) == 0:
+            return np.zeros((numChannels, 0)), np.zeros(0), 0, remainingBytes
+        
+        # Find Where Each Line Ends and How Many Values it Holds
+        rawBytes = np.frombuffer(rawReads, dtype=np.uint8)
+        lineEnds = np.flatnonzero(rawBytes == ord("\n"))
+        numCommas = np.cumsum(rawBytes == ord(","))[lineEnds]
+        goodReads = np.diff(numCommas, prepend = 0) == numChannels
+        
+        # Only Keep the Lines with the Expected Number of Values
+        if not goodReads.all():
+            lineStarts = np.concatenate(([0], lineEnds[:-1] + 1))
+            rawReads = b"".join([rawReads[lineStart:lineEnd + 1] for lineStart, lineEnd in zip(lineStarts[goodReads], lineEnds[goodReads])])
+        numBadReads = len(goodReads) - int(goodReads.sum())
+        
+        # Convert All the Values at Once (Whitespace, Like '\r', is Ignored)
+        try:
+            arduinoValues = np.fromstring(rawReads[:-1].replace(b"\n", b",").decode(), sep=",").reshape(-1, numChannels + 1)
+        except (ValueError, UnicodeDecodeError):
+            # A Line Had the Right Shape but Unreadable Values: Find it Line by Line
+            arduinoValues, numUnreadable = self.parseReadLines(rawReads.split(b"\n")[:-1], numChannels)
+            numBadReads += numUnreadable
+        
+        if markLostPoints:
+            # Put the Malformed Lines Back as NaN Points
+            if numBadReads != 0:
+                allValues = np.full((len(goodReads), numChannels + 1), np.nan)
+                allValues[goodReads] = arduinoValues; arduinoValues = allValues
+                # The Lost Lines Take the Typical Time Between Points
+                lostPoints = np.isnan(arduinoValues[:, 0])
+                arduinoValues[lostPoints, 0] = np.median(arduinoValues[~lostPoints, 0]) if not lostPoints.all() else 0
+        else:
+            # Skip the Unreadable Lines
+            arduinoValues = arduinoValues[~np.isnan(arduinoValues).any(axis = 1)]
+        
+        # Accumulate the Time Between Points
+        timePoints = self.currentTime + np.cumsum(arduinoValues[:, 0])
+        if len(timePoints) != 0: self.currentTime = timePoints[-1]
+        # Convert Arduino Data to Voltage
+        Voltages = arduinoValues[:, 1:].T * (maxVolt/adcResolution)
+        
+        return Voltages, timePoints, numBadReads, remainingBytes
+
+    def parseBinaryBlock(self, byteChunk, numChannels, maxVolt = 5, adcResolution = 1023, markLostPoints = False):
+        """
+        Binary counterpart of parseReadBlock. Decodes all the complete frames in
+        the chunk (resynchronizing past corrupted bytes). If markLostPoints, a NaN
+        point is added for each frame missing from the sequence numbers.
+
+        Returns the Voltages (numChannels, numPoints), timePoints (numPoints),
+        and the remaining bytes that may begin the next frame.
+        """
+        if self.frameDecoder is None:
+            self.frameDecoder = binaryFrameDecoder(numChannels)
+        # Decode the Frames
+        lastSequenceNumber = self.frameDecoder.lastSequenceNumber
+        frames, remainingBytes = self.frameDecoder.decodeFrames(byteChunk)
+        deltaMicros = frames['deltaMicros'].astype(np.float64)
+        adcCounts = frames['adcCounts'].astype(np.float64)
+        
+        # Find the Frames Missing Before Each Frame
+        if markLostPoints and len(frames) != 0:
+            sequenceNumbers = frames['sequenceNumber'].astype(np.int64)
+            previousNumbers = np.concatenate(([sequenceNumbers[0] - 1 if lastSequenceNumber is None else lastSequenceNumber], sequenceNumbers[:-1]))
+            numMissingFrames = (sequenceNumbers - previousNumbers - 1) % 256
+            if numMissingFrames.any():
+                # Add NaN Points for the Missing Frames, with the Typical Time Between Points
+                framePositions = np.cumsum(numMissingFrames + 1) - 1
+                allDeltaMicros = np.full(framePositions[-1] + 1, np.median(deltaMicros))
+                allAdcCounts = np.full((framePositions[-1] + 1, numChannels), np.nan)
+                allDeltaMicros[framePositions] = deltaMicros; allAdcCounts[framePositions] = adcCounts
+                deltaMicros = allDeltaMicros; adcCounts = allAdcCounts
+
+        # Accumulate the Time Between Points
+        timePoints = self.currentTime + np.cumsum(deltaMicros)*1E-6
+        if len(timePoints) != 0: self.currentTime = timePoints[-1]
+        # Convert Arduino Data to Voltage
+        Voltages = adcCounts.T * (maxVolt/adcResolution)
 
+        return Voltages, timePoints, remainingBytes
+
+    def parseReadLines(self, rawReads, numChannels):
+        """Slow path for parseReadBlock: convert the lines one at a time. Unreadable lines become NaN."""
+        arduinoValues = []; numUnreadable = 0
+        for rawRead in rawReads:
+            try:
+                arduinoValues.append([float(arduinoValue) for arduinoValue in rawRead.split(b",")])
+            except ValueError:
+                arduinoValues.append([np.nan]*(numChannels + 1))
+                numUnreadable += 1
+        
+        return np.array(arduinoValues, dtype=np.float64).reshape(-1, numChannels + 1), numUnreadable
 
     def parseRead(self, byteArrayList, numChannels, maxVolt = 5, adcResolution = 1023, verbose = True):
         """Parse a read with time, volage data
@@ -238,3 +989,235 @@ class arduinoRead():
         # Return the Final Characters
         return str(leftInt) + str(rightInt);
 
+
+
+# --------------------------------------------------------------------------- #
+# ------------------------ Stream Data from Many Arduinos ------------------- #
+
+class multiArduinoRead():
+
+    def __init__(self, serialNums, numChannelsPerBoard, streamingFormat = "ascii"):
+        """
+        Streams from several Arduinos at once, each drained by its own reading
+        thread. The points are aligned on the host's clock and resampled onto
+        the first (reference) board's points, with each board's channels placed
+        in order: [board 1 channels, board 2 channels, ...].
+
+        serialNums: A list of the boards' serial numbers (or device paths).
+        numChannelsPerBoard: A list of the number of channels streamed by each board.
+        """
+        assert len(serialNums) == len(numChannelsPerBoard), "Specify the number of channels for each board: " + str(serialNums)
+        self.numChannelsPerBoard = list(numChannelsPerBoard)
+        self.streamingFormat = streamingFormat.lower()
+        
+        # Connect to the Arduinos
+        self.boardReaders = [arduinoRead(mainSerialNum = serialNum, streamingFormat = streamingFormat) for serialNum in serialNums]
+        self.readingThread = None
+        self.resetAlignment()
+        
+    @property
+    def mainArduino(self):
+        # The Reference Board's Port
+        return self.boardReaders[0].mainArduino
+        
+    def resetAlignment(self):
+        # Points Waiting for the Other Boards: Host Times and Voltages per Board
+        self.pendingTimes = [np.zeros(0) for _ in self.boardReaders]
+        self.pendingVoltages = [np.zeros((numChannels, 0)) for numChannels in self.numChannelsPerBoard]
+        self.lastBoardTimes = [-np.inf for _ in self.boardReaders]  # The host time of each board's last point.
+        self.startHostTime = None   # The host time of the first merged point.
+
+    def startReadingThread(self, numChannels, maxVolt = 5, adcResolution = 1023, bufferSize = 2**18):
+        assert numChannels == sum(self.numChannelsPerBoard), "The boards do not stream " + str(numChannels) + " channels: " + str(self.numChannelsPerBoard)
+        self.resetAlignment()
+        # Start a Reading Thread for Each Board
+        for arduinoReader, numBoardChannels in zip(self.boardReaders, self.numChannelsPerBoard):
+            # Drop the Points Waiting from Setup so Every Board Starts Fresh
+            arduinoReader.mainArduino.reset_input_buffer()
+            arduinoReader.arduinoBuffer.clear()
+            arduinoReader.startReadingThread(numBoardChannels, maxVolt, adcResolution, bufferSize)
+        self.readingThread = [arduinoReader.readingThread for arduinoReader in self.boardReaders]
+
+    def stopReadingThread(self, timeout = 5):
+        for arduinoReader in self.boardReaders:
+            arduinoReader.stopReadingThread(timeout)
+        self.readingThread = None
+
+    def readBlock(self, timeout = 1):
+        """
+        Returns the merged points every board has caught up to as (timePoints, Voltages).
+        The times are host seconds since the first merged point.
+        """
+        # Collect the New Points from Each Board (Waiting on the Reference Board)
+        for boardInd, arduinoReader in enumerate(self.boardReaders):
+            timePoints, Voltages = arduinoReader.readBlock(timeout = timeout if boardInd == 0 else 0)
+            if len(timePoints) == 0: continue
+            
+            # Move the Points onto the Host's Clock
+            hostTimes = arduinoReader.boardClock.toHostTime(timePoints)
+            # If Refitting the Clock Moved the Block Back in Time, Shift it After the Previous Point
+            if hostTimes[0] <= self.lastBoardTimes[boardInd]:
+                hostTimes += self.lastBoardTimes[boardInd] - hostTimes[0] + (hostTimes[1] - hostTimes[0] if len(hostTimes) > 1 else 1E-6)
+            self.lastBoardTimes[boardInd] = hostTimes[-1]
+            # Store the Points Until Every Board Reaches Them
+            self.pendingTimes[boardInd] = np.concatenate((self.pendingTimes[boardInd], hostTimes))
+            self.pendingVoltages[boardInd] = np.concatenate((self.pendingVoltages[boardInd], Voltages), axis = 1)
+        
+        # Wait Until Every Board Has Data
+        if any(len(boardTimes) == 0 for boardTimes in self.pendingTimes):
+            return np.zeros(0), np.zeros((sum(self.numChannelsPerBoard), 0))
+        
+        # Merge the Reference Points that All the Boards Have Reached
+        caughtUpTime = min(boardTimes[-1] for boardTimes in self.pendingTimes[1:]) if len(self.boardReaders) > 1 else np.inf
+        numMergedPoints = np.searchsorted(self.pendingTimes[0], caughtUpTime, side = 'right')
+        mergedTimes = self.pendingTimes[0][:numMergedPoints]
+        mergedVoltages = [self.pendingVoltages[0][:, :numMergedPoints]]
+        # Interpolate the Other Boards at the Reference Times
+        for boardInd in range(1, len(self.boardReaders)):
+            boardTimes = self.pendingTimes[boardInd]
+            boardVoltages = np.empty((self.numChannelsPerBoard[boardInd], numMergedPoints))
+            for channelIndex, channelVoltages in enumerate(self.pendingVoltages[boardInd]):
+                boardVoltages[channelIndex] = np.interp(mergedTimes, boardTimes, channelVoltages)
+            mergedVoltages.append(boardVoltages)
+            
+            # Keep the Last Point Before the Merged Time for the Next Interpolation
+            if numMergedPoints != 0:
+                firstKeptPoint = max(np.searchsorted(boardTimes, mergedTimes[-1], side = 'right') - 1, 0)
+                self.pendingTimes[boardInd] = boardTimes[firstKeptPoint:]
+                self.pendingVoltages[boardInd] = self.pendingVoltages[boardInd][:, firstKeptPoint:]
+        # Remove the Merged Reference Points
+        self.pendingTimes[0] = self.pendingTimes[0][numMergedPoints:]
+        self.pendingVoltages[0] = self.pendingVoltages[0][:, numMergedPoints:]
+        
+        if numMergedPoints == 0:
+            return np.zeros(0), np.zeros((sum(self.numChannelsPerBoard), 0))
+        # Start the Time at the First Merged Point
+        if self.startHostTime is None: self.startHostTime = mergedTimes[0]
+        
+        return mergedTimes - self.startHostTime, np.vstack(mergedVoltages)
+    
+    def numOverrunPoints(self):
+        return sum(arduinoReader.numOverrunPoints() for arduinoReader in self.boardReaders)
+    
+    def boardStatistics(self):
+        """Returns a list with each board's sampling rate (Hz), clock drift (ppm), and points lost to overruns."""
+        boardStatistics = []
+        for arduinoReader in self.boardReaders:
+            samplingFreq, clockDrift = arduinoReader.boardClock.clockStatistics()
+            boardStatistics.append({'serialNum': arduinoReader.mainSerialNum, 'samplingFreq': samplingFreq, 'clockDrift': clockDrift, 
+                                    'numOverrunPoints': arduinoReader.numOverrunPoints(), 'numBadReads': arduinoReader.numBadReads,
+                                    'numLostPoints': arduinoReader.gapRepair.numLostPoints if arduinoReader.gapRepair else 0,
+                                    'numRepairedPoints': arduinoReader.gapRepair.numRepairedPoints if arduinoReader.gapRepair else 0})
+        return boardStatistics
+    
+    def closeArduinos(self):
+        for arduinoReader in self.boardReaders:
+            arduinoReader.mainArduino.close()
+
+# -------------------------------------------------------------------------- #
+# ------------------------ Benchmark the Data Parsers ---------------------- #
+
+if __name__ == "__main__":
+    # Simulate Streamed Lines in the Firmware's Format: 'SS.MMMMMM,VVVV,...'
+    numPoints = 100000; numChannels = 4
+    adcReadings = np.random.randint(0, 1024, size=(numPoints, numChannels))
+    rawReads = b"".join([b"00.001000," + b",".join(b"%04d" % adcReading for adcReading in pointReadings) + b"\r\n" for pointReadings in adcReadings])
+    
+    # Time the Line-by-Line Parser
+    readData = arduinoRead()
+    startTime = time.perf_counter()
+    Voltages, timePoints = readData.parseRead(rawReads.splitlines(keepends=True), numChannels)
+    lineParserTime = time.perf_counter() - startTime
+    
+    # Time the Block Parser
+    readData = arduinoRead()
+    startTime = time.perf_counter()
+    blockVoltages, blockTimePoints, numBadReads, remainingBytes = readData.parseReadBlock(rawReads, numChannels)
+    blockParserTime = time.perf_counter() - startTime
+    
+    # Compare the Results
+    assert np.allclose(blockVoltages, Voltages) and np.allclose(blockTimePoints, timePoints[0]), "The parsers disagree"
+    print("Parsing", numPoints, "Lines with", numChannels, "Channels:")
+    print("\tparseRead:      %.1f ms (%.0f Lines/Second)" % (lineParserTime*1000, numPoints/lineParserTime))
+    print("\tparseReadBlock: %.1f ms (%.0f Lines/Second); %.1fx Faster; %d Bad Reads" % (blockParserTime*1000, numPoints/blockParserTime, lineParserTime/blockParserTime, numBadReads))
+    
+    # Send the Same Data as Binary Frames
+    frameDecoder = binaryFrameDecoder(numChannels)
+    binaryReads = frameDecoder.encodeFrames(np.full(numPoints, 1000), adcReadings)
+    # Time the Binary Decoder
+    readData = arduinoRead()
+    startTime = time.perf_counter()
+    binaryVoltages, binaryTimePoints, remainingBytes = readData.parseBinaryBlock(binaryReads, numChannels)
+    binaryParserTime = time.perf_counter() - startTime
+    assert np.allclose(binaryVoltages, Voltages) and np.allclose(binaryTimePoints, timePoints[0]), "The binary decoder disagrees"
+    print("\tparseBinaryBlock: %.1f ms (%.0f Frames/Second); %d Bytes per Point Instead of %d" % (binaryParserTime*1000, numPoints/binaryParserTime, len(binaryReads)//numPoints, len(rawReads)//numPoints))
+    
+    # Corrupt the Stream and Check that the Decoder Resynchronizes
+    corruptedReads = bytearray(binaryReads[:1000*frameDecoder.frameSize + 5])
+    corruptedReads[10*frameDecoder.frameSize + 3] ^= 0xFF                   # Flip a byte in frame 10
+    del corruptedReads[20*frameDecoder.frameSize:20*frameDecoder.frameSize + 4]  # Lose part of frame 20
+    frames, remainingBytes = binaryFrameDecoder(numChannels).decodeFrames(bytes(corruptedReads))
+    print("\tCorrupted Stream: Decoded %d of 1000 Frames; %d Bytes Left for the Next Chunk" % (len(frames), len(remainingBytes)))
+    
+    # ---------------------------------------------------------------------- #
+    # Read Lines Out of a 1 MB Backlog Waiting in the Port
+    class backlogPort():
+        # Serves a Fixed Backlog of Bytes Like serial.Serial
+        def __init__(self, backlog): self.backlog = memoryview(backlog); self.position = 0
+        @property
+        def in_waiting(self): return len(self.backlog) - self.position
+        def read(self, size = 1):
+            data = bytes(self.backlog[self.position:self.position + size]); self.position += len(data)
+            return data
+        def readinto(self, buffer):
+            data = self.backlog[self.position:self.position + len(buffer)]; buffer[:len(data)] = data; self.position += len(data)
+            return len(data)
+    
+    def copyingReadline(readData, ser):
+        # The Previous arduinoRead.readline: Slices and Concatenates a New Buffer for Every Line
+        i = readData.copyingBuffer.find(b"\n")
+        if i >= 0:
+            r = readData.copyingBuffer[:i+1]
+            readData.copyingBuffer = readData.copyingBuffer[i+1:]
+            return r
+        while True:
+            i = max(1, min(2048, ser.in_waiting))
+            data = ser.read(i)
+            i = data.find(b"\n")
+            if i >= 0:
+                r = readData.copyingBuffer + data[:i+1]
+                readData.copyingBuffer[0:] = data[i+1:]
+                return r
+            else:
+                readData.copyingBuffer.extend(data)
+    
+    backlog = rawReads[:2**20]; backlog = backlog[:backlog.rfind(b"\n") + 1]
+    numBacklogLines = backlog.count(b"\n"); numCopyingLines = 2000
+    print("\nReading %d Lines from a %.1f MB Backlog:" % (numBacklogLines, len(backlog)/2**20))
+    for backlogInBuffer in [False, True]:
+        # The Backlog is Either Waiting in the Port or Already in the Buffer (Ex: After a Bulk Read)
+        print("\tBacklog Already in the Buffer:" if backlogInBuffer else "\tBacklog Waiting in the Port:")
+        
+        # Time the Previous readline (Only the First Lines if Every Line Copies the Backlog)
+        readData = arduinoRead(); readData.copyingBuffer = bytearray(backlog if backlogInBuffer else b""); ser = backlogPort(b"" if backlogInBuffer else backlog)
+        numTimedLines = numCopyingLines if backlogInBuffer else numBacklogLines
+        startTime = time.perf_counter()
+        for _ in range(numTimedLines): copyingReadline(readData, ser)
+        copyingRate = numTimedLines/(time.perf_counter() - startTime)
+        print("\t\tCopying readline:  %.0f Lines/Second" % copyingRate)
+        
+        # Time the Cursor readline
+        readData = arduinoRead(); ser = backlogPort(b"" if backlogInBuffer else backlog)
+        if backlogInBuffer: readData.arduinoBuffer.extend(backlog)
+        startTime = time.perf_counter()
+        for _ in range(numBacklogLines): readData.readline(ser)
+        cursorRate = numBacklogLines/(time.perf_counter() - startTime)
+        print("\t\tCursor readline:   %.0f Lines/Second; %.1fx the Speed" % (cursorRate, cursorRate/copyingRate))
+    
+    # Time Taking the Whole Block of Lines
+    readData = arduinoRead(); ser = backlogPort(backlog)
+    startTime = time.perf_counter()
+    readData.arduinoBuffer.readFromPort(ser); backlogLines = readData.arduinoBuffer.readLines()
+    blockTime = time.perf_counter() - startTime
+    assert bytes(backlogLines) == backlog, "The receive buffer changed the bytes"
+    print("\tCursor readLines:    %.0f Lines/Second (One Block, No Copies)" % (numBacklogLines/blockTime))
@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+    Benchmarks of the streaming pipeline (streamData and the Biolectric Protocols). Run from 'Helper Files/':
+        python benchmarks.py parallel offline ...
+
+    The correctness checks live in tests/; these only time the pipeline and print how far apart the results are.
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# General modules
+import os
+import sys
+import glob
+import math
+import time
+import argparse
+import numpy as np
+import scipy.signal
+from scipy.fft import rfft, rfftfreq, irfft
+# Plotting
+import matplotlib.pyplot as plt
+
+# Folder with Data Aquisition Files
+sys.path.append('Helper Files/Biolectric Protocols/')
+sys.path.append('Biolectric Protocols/')
+# Import Bioelectric Analysis Files
+from emgAnalysis import emgProtocol
+from eogAnalysis import eogProtocol
+from eegAnalysis import eegProtocol
+from gsrAnalysis import gsrProtocol
+from generalAnalysis import generalProtocol
+import _filteringProtocols                       # The Shared Filter Designs
+# Import Data Aquisition Files
+import excelProcessing as excelDataProtocol      # Functions to Read in Data from Excel
+import streamData as streamDataProtocol          # Functions to Handle Data from Arduino
+
+# The Recordings in Data/
+dataFolder = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Data")
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Shared Setup ------------------------------- #
+
+def syntheticSignal(timePoints, sineWaves, randomGenerator):
+    # A Noisy Sum of Sines Around the Middle of the Range; sineWaves: [(amplitude, frequency)]
+    return 1.5 + sum(amplitude*np.sin(2*np.pi*frequency*timePoints) for amplitude, frequency in sineWaves) + 0.05*randomGenerator.standard_normal(len(timePoints))
+
+def syntheticChannels(timePoints, numChannels):
+    # Each Channel a Noisy Sine at its Own Frequency
+    randomGenerator = np.random.default_rng(0)
+    return np.array([syntheticSignal(timePoints, [(0.3, 5 + channelIndex)], randomGenerator) for channelIndex in range(numChannels)])
+
+def loadRecording(recordingFile):
+    # The Time Points and First Channel of a Recording in Data/
+    compiledRawData = excelDataProtocol.getExcelData().getData(recordingFile, numberOfChannels = 1, testSheetNum = 0)[0]
+    return np.array(compiledRawData[0]), np.array(compiledRawData[1][0])
+
+def medianLatency(timedFunction, numTimedRuns):
+    # The Median Seconds per Call (And the Last Result)
+    runLatencies = []
+    for runInd in range(numTimedRuns):
+        startTime = time.perf_counter()
+        result = timedFunction()
+        runLatencies.append(time.perf_counter() - startTime)
+
+    return np.median(runLatencies), result
+
+# -------------------------------------------------------------------------- #
+# ------------------------------- Benchmarks ------------------------------- #
+
+def parallelBenchmark():
+    # Batch Latency vs. Analysis Threads
+    streamingOrder = ["emg", "eog", "eeg", "gsr", "temp", "general", "general"]  # A multi-modal recording.
+    samplingFreq = 1000             # Points per second.
+    recordingTime = 110             # Seconds of data before the timed batches (fills the filter buffers).
+    numTimedBatches = 5             # Batches timed for each number of threads.
+    numWorkersList = [1, 2, 4, 8]   # The number of analysis threads (1 analyzes the protocols in order).
+
+    timePoints = np.arange(samplingFreq*recordingTime) / samplingFreq
+    Voltages = syntheticChannels(timePoints, len(streamingOrder))
+
+    print("Batch Latency for", streamingOrder, "on", os.cpu_count(), "CPU(s)")
+    for numWorkers in numWorkersList:
+        # Load the Recording
+        readData = streamDataProtocol.mainArduinoRead(None, None, 2000, 200, streamingOrder, streamingOrder, False)
+        readData.organizeData([timePoints], Voltages)
+        readData.setAnalysisWorkers(numWorkers)
+        # Set the Sampling Frequency (Not Timed)
+        dataFinger = len(timePoints) - readData.numPointsPerBatch - numTimedBatches*readData.moveDataFinger
+        readData.analyzeBatchData(dataFinger - readData.moveDataFinger, timePoints[-1], None, None)
+
+        # Time the Batches
+        batchLatencies = []
+        for batchInd in range(numTimedBatches):
+            startTime = time.perf_counter()
+            dataFinger = readData.analyzeBatchData(dataFinger, timePoints[-1], None, None)
+            batchLatencies.append(time.perf_counter() - startTime)
+        readData.setAnalysisWorkers(None)
+        print("\t%d Thread(s): %.1f ms per Batch" % (numWorkers, 1000*np.median(batchLatencies)))
+
+def offlineBenchmark():
+    # analyzeRecording vs. streamExcelData (The Feature Tolerance is Checked in tests/test_offlineAnalysis.py)
+    recordingFile = os.path.join(dataFolder, "ECG - Yadong", "2023-04-06 ECG Trial 3.xlsx")  # Its Channel is Given to Each Protocol
+    streamingOrder = ["eeg", "gsr", "temp", "eog"]     # The protocols analyzed offline.
+    numPointsPerBatch = 2000; moveDataFinger = 200      # The batches of streamExcelData (Too Short for the GSR and Temperature Windows: Only Their Filtering is Compared).
+    numRepeats = [1, 4]             # Also analyze the recording joined to itself, as a stand-in for a longer session.
+
+    def analyzeFeatures(timePoints, recordedData, protocolName, offlineAnalysis):
+        readData = streamDataProtocol.mainArduinoRead(None, None, numPointsPerBatch, moveDataFinger, [protocolName], [protocolName], False)
+        readData.analysisList[0].collectFeatures = True
+        # Time the Analysis
+        startTime = time.perf_counter()
+        if offlineAnalysis:
+            readData.analyzeRecording([timePoints, np.array([recordedData])])
+        else:
+            readData.streamExcelData([timePoints.tolist(), [recordedData.tolist()]], [], [], [], [], [], [], [])
+        analysisTime = time.perf_counter() - startTime
+
+        return analysisTime, np.array(readData.analysisList[0].featureTimes), np.array(readData.analysisList[0].rawFeatures, dtype=float)
+
+    recordingTimes, recordingData = loadRecording(recordingFile)
+    for numRepeat in numRepeats:
+        # Join the Recording to Itself (Keeping the Time Increasing)
+        samplingPeriod = np.median(np.diff(recordingTimes))
+        timePoints = np.concatenate([recordingTimes + repeatInd*(recordingTimes[-1] - recordingTimes[0] + samplingPeriod) for repeatInd in range(numRepeat)])
+        recordedData = np.tile(recordingData, numRepeat)
+        print("\nOffline Analysis of %s x%d (%.0f s of Data; numPointsPerBatch = %d, moveDataFinger = %d)" % (os.path.basename(recordingFile), numRepeat, timePoints[-1] - timePoints[0], numPointsPerBatch, moveDataFinger))
+
+        totalTimes = np.zeros(2)
+        for protocolName in streamingOrder:
+            offlineTime, offlineTimes, offlineRawFeatures = analyzeFeatures(timePoints, recordedData, protocolName, offlineAnalysis = True)
+            replayTime, streamedTimes, streamedRawFeatures = analyzeFeatures(timePoints, recordedData, protocolName, offlineAnalysis = False)
+            totalTimes += [offlineTime, replayTime]
+
+            # Compare the Shared Windows (Feature Differences in Units of Each Feature's RMS)
+            sharedTimes, offlineInds, streamedInds = np.intersect1d(offlineTimes, streamedTimes, return_indices = True)
+            featureScales = np.sqrt(np.mean(streamedRawFeatures[streamedInds]**2, axis = 0)) if len(sharedTimes) else 1
+            featureDifferences = np.abs(offlineRawFeatures[offlineInds] - streamedRawFeatures[streamedInds])/np.where(featureScales == 0, 1, featureScales)
+            print("\t%s: %.2f s Offline, %.2f s Streamed (%.1fx Faster); %d of %d Streamed Windows Offline, Median Difference %.2g RMS" % (protocolName, offlineTime, replayTime, replayTime/offlineTime,
+                                                                                                                            len(sharedTimes), len(streamedTimes), np.median(featureDifferences) if featureDifferences.size else 0))
+        print("\tAll Protocols: %.2f s Offline, %.2f s Streamed (%.1fx Faster)" % (*totalTimes, totalTimes[1]/totalTimes[0]))
+
+def plottingBenchmark():
+    # Full Redraws vs. Blitted Frames
+    numChannels = 8                 # Each channel plots a raw and a filtered line.
+    samplingFreq = 2000             # Points per second.
+    numPointsPerBatch = 20000       # The points shown on each line (10 seconds).
+    moveDataFinger = 200            # New points per batch (a batch every 0.1 seconds).
+    numBatches = 50                 # Batches timed for each way of plotting.
+    plottingBackend = "Agg"         # Draw off screen (Qt5Agg to watch the plot).
+
+    timePoints = np.arange(numPointsPerBatch + numBatches*moveDataFinger) / samplingFreq
+    Voltages = syntheticChannels(timePoints, numChannels)
+
+    print("Plotting %d Channels at %d Hz (%d Points per Line, a Batch Every %.2f s)" % (numChannels, samplingFreq, numPointsPerBatch, moveDataFinger/samplingFreq))
+    for blitFrames in [False, True]:
+        plottingClass = streamDataProtocol.plotDataTopLevel(numChannels, [list(range(numChannels))], ["general"], backend = plottingBackend)
+        channelLines = [[axis.plot([], [], linewidth=1)[0] for axis in channelAxes] for channelAxes in plottingClass.axes["general"]]
+
+        # Time the Plotting of Each Batch
+        handOverTimes = []; batchTimes = []
+        for batchInd in range(numBatches):
+            batchTime = batchInd*moveDataFinger/samplingFreq
+            batchPoints = slice(batchInd*moveDataFinger, batchInd*moveDataFinger + numPointsPerBatch)
+            startTime = time.perf_counter()
+            for channelIndex, channelAxes in enumerate(plottingClass.axes["general"]):
+                for axis, line in zip(channelAxes, channelLines[channelIndex]):
+                    if blitFrames:
+                        # What the Protocols Do: Hand Over a Snapshot
+                        plottingClass.setLineData(line, timePoints[batchPoints], Voltages[channelIndex][batchPoints])
+                        plottingClass.setXLimits(axis, timePoints[batchPoints][0], timePoints[batchPoints][-1])
+                    else:
+                        line.set_data(timePoints[batchPoints], Voltages[channelIndex][batchPoints])
+                        axis.set_xlim(timePoints[batchPoints][0], timePoints[batchPoints][-1])
+            handOverTimes.append(time.perf_counter() - startTime)
+            # Draw the Frame
+            if blitFrames:
+                plottingClass.renderFrame(batchTime)
+            else:
+                plottingClass.fig.canvas.draw()
+            batchTimes.append(time.perf_counter() - startTime)
+        plt.close(plottingClass.fig)
+
+        print("\t%s: %.1f ms per Batch (%.1f ms in the Analysis Thread)%s" % ("Decimated + Blitted" if blitFrames else "Full Redraw", 1000*np.median(batchTimes), 1000*np.median(handOverTimes),
+                                                                        "; %d of %d Frames Redrew the Axes" % (plottingClass.numAxesRedraws, plottingClass.numFrames) if blitFrames else ""))
+
+def streamingFilterBenchmark():
+    # Zero-Phase vs. Streaming Filter Stages
+    samplingFreq = 1000             # Points per second.
+    recordingTime = 120             # Seconds of data before the timed batches (fills the filter buffer).
+    numTimedBatches = 20            # Batches timed for each choice of streaming stages.
+    stageChoices = [[], ["lowPass"], ["lowPass", "highPass"]]   # The generalProtocol.streamingStages compared.
+
+    timePoints = np.arange(samplingFreq*recordingTime) / samplingFreq
+    Voltages = np.array([syntheticSignal(timePoints, [(0.3, 5), (0.2, 0.5)], np.random.default_rng(0))])
+
+    print("General Protocol Batch Cost at %d Hz (Buffer of %d Points)" % (samplingFreq, generalProtocol().dataPointBuffer))
+    for streamingStages in stageChoices:
+        # Load the Recording
+        readData = streamDataProtocol.mainArduinoRead(None, None, 2000, 200, ["general"], ["general"], False)
+        readData.generalAnalysis.streamingStages = streamingStages
+        readData.organizeData([timePoints], Voltages)
+        # Stream Up to the Timed Batches (Not Timed)
+        dataFinger = len(timePoints) - readData.numPointsPerBatch - numTimedBatches*readData.moveDataFinger
+        readData.generalAnalysis.analyzeData(0)
+        readData.generalAnalysis.analyzeData(dataFinger - readData.moveDataFinger)
+
+        # Time the Batches
+        batchLatencies = []
+        for batchInd in range(numTimedBatches):
+            startTime = time.perf_counter()
+            readData.generalAnalysis.analyzeData(dataFinger)
+            batchLatencies.append(time.perf_counter() - startTime)
+            dataFinger += readData.moveDataFinger
+
+        # The Delay of the Streamed Signal
+        groupDelays = ", ".join("%.0f ms at %g Hz" % (1000*sum(streamingFilter.groupDelay(signalFreq, samplingFreq) for streamingFilter in readData.generalAnalysis.streamingFilters), signalFreq) for signalFreq in [0.5, 5])
+        print("\tStreaming Stages %s: %.2f ms per Batch%s" % (streamingStages, 1000*np.median(batchLatencies), "; Delay " + groupDelays if streamingStages else " (Zero Phase)"))
+
+def filterPipelineBenchmark():
+    # Separate Filters vs. the SOS Cascade
+    samplingFreq = 1000             # Points per second.
+    bufferTime = 100                # Seconds filtered each batch (the EEG buffer).
+    numTimedBatches = 20            # Batches timed for each way of filtering.
+
+    timePoints = np.arange(samplingFreq*bufferTime) / samplingFreq
+    dataBuffer = syntheticSignal(timePoints, [(0.3, 10), (0.2, 0.5)], np.random.default_rng(0))
+
+    # The EEG Filter Stages: Each Filter Separately (ba, filtfilt), or the Protocol's Pipeline (One SOS Cascade)
+    eegAnalysis = eegProtocol(numChannels = 1); eegAnalysis.samplingFreq = samplingFreq
+    bandPassFilter = _filteringProtocols.bandPassFilter()
+    def separateFilters(data):
+        filteredData = bandPassFilter.butterFilter(data, eegAnalysis.cutOffFreq[1], samplingFreq, order = 3, filterType = 'low')
+        return bandPassFilter.high_pass_filter(filteredData, samplingFreq, eegAnalysis.cutOffFreq[0], eegAnalysis.stopband_edge, eegAnalysis.passband_ripple, eegAnalysis.stopband_attenuation)
+    def redesignedFilters(data):
+        # The Old Path: Design Every Filter on Every Call
+        bandPassFilter.filterDesigns.clear()
+        return separateFilters(data)
+
+    print("Filtering a %d Second EEG Buffer at %d Hz" % (bufferTime, samplingFreq))
+    filterResults = {}
+    for filterName, filterFunction in [("Redesigned Each Batch", redesignedFilters), ("Designs Cached", separateFilters), ("Pipeline (SOS Cascade)", lambda data: eegAnalysis.filterPipeline.filterData(data, samplingFreq))]:
+        batchLatency, filterResults[filterName] = medianLatency(lambda: filterFunction(dataBuffer), numTimedBatches)
+        print("\t%s: %.2f ms per Batch" % (filterName, 1000*batchLatency))
+    # The Cascade Pads the Edges Once Instead of per Stage; at 0.05 Hz the Edge Transients Take Tens of Seconds to Fade
+    interiorPoints = slice(bufferTime//4*samplingFreq, -bufferTime//4*samplingFreq)
+    pipelineDifference = np.abs(filterResults["Pipeline (SOS Cascade)"] - filterResults["Designs Cached"])[interiorPoints].max()
+    print("\tLargest Difference Between the Pipeline and the Separate Filters (Away From the Edges): %.2g Volts" % pipelineDifference)
+
+def channelFilteringBenchmark():
+    # Each Channel vs. Every Channel at Once (The Filtered Data is Compared in tests/test_filterChannels.py)
+    samplingFreq = 1000             # Points per second.
+    bufferTime = 20                 # Seconds filtered each batch.
+    numTimedBatches = 10            # Batches timed for each number of channels.
+    numChannelsList = [2, 8, 32]    # The channels of one modality.
+
+    timePoints = np.arange(samplingFreq*bufferTime) / samplingFreq
+    print("Filtering %d Second Buffers at %d Hz: Each Channel (filterData) vs. Every Channel at Once (filterChannels)" % (bufferTime, samplingFreq))
+    for protocolClass in [eegProtocol, emgProtocol]:
+        for numChannels in numChannelsList:
+            analysis = protocolClass(numChannels = numChannels); analysis.samplingFreq = samplingFreq
+            analysis.setSamplingFrequencyParams()
+            dataBuffers = list(syntheticChannels(timePoints, numChannels))
+
+            # Time Both Ways
+            channelLatency = medianLatency(lambda: [analysis.filterData(timePoints, dataBuffer) for dataBuffer in dataBuffers], numTimedBatches)[0]
+            batchedLatency = medianLatency(lambda: analysis.filterChannels(timePoints, dataBuffers), numTimedBatches)[0]
+            print("\t%s, %2d Channels: %.1f ms Each Channel; %.1f ms at Once (%.2fx)" % (analysis.protocolName, numChannels, 1000*channelLatency, 1000*batchedLatency, channelLatency/batchedLatency))
+
+def lookaheadBenchmark():
+    # Re-Filtering the Buffer vs. the Lookahead Filter (The Final Points are Checked in tests/test_lookaheadFilter.py)
+    samplingFreq = 1000             # Points per second.
+    recordingTime = 120             # Seconds of data streamed.
+    batchTime = 0.1                 # Seconds of new points each batch (moveDataFinger).
+    lookaheadTimes = [0.05, 0.1, 0.25, 0.5, 1]  # The lookaheadTime compared (Seconds).
+
+    timePoints = np.arange(int(samplingFreq*recordingTime)) / samplingFreq
+    recordedData = syntheticSignal(timePoints, [(0.3, 2), (0.2, 0.2), (0.1, 25)], np.random.default_rng(0))
+    numBatchPoints = int(samplingFreq*batchTime)
+    # Compare Away From the Start of the Recording (Both Filters Start Up Differently There)
+    startPoint = 2*samplingFreq
+
+    for protocolClass in [eogProtocol, gsrProtocol]:
+        analysis = protocolClass(numChannels = 1); analysis.samplingFreq = samplingFreq
+        analysis.lookaheadTime = lookaheadTimes[0]; analysis.setSamplingFrequencyParams()
+        lowPassSOS = analysis.lookaheadFilter.sos
+        # The Reference: Forward-Backward Over the Whole Recording
+        referenceData = scipy.signal.sosfiltfilt(lowPassSOS, recordedData)
+        bufferPoints = analysis.dataPointBuffer
+        print("%s Low-Pass at %d Hz (%d Point Buffer, %d Point Batches); Largest Error vs. Filtering the Whole Recording (Volts)" % (analysis.protocolName, samplingFreq, bufferPoints, numBatchPoints))
+
+        # The Current Path: Re-Filter the Buffer Each Batch
+        newestErrors = []; batchLatencies = []
+        for endPoint in range(startPoint + numBatchPoints, len(recordedData) + 1, numBatchPoints):
+            startTime = time.perf_counter()
+            bufferData = scipy.signal.sosfiltfilt(lowPassSOS, recordedData[max(0, endPoint - bufferPoints):endPoint])
+            batchLatencies.append(time.perf_counter() - startTime)
+            newestErrors.append(np.abs(bufferData[-numBatchPoints:] - referenceData[endPoint - numBatchPoints:endPoint]).max())
+        print("\tRe-Filtering the Buffer: %.3f ms per Batch; Newest Batch %.2g" % (1000*np.median(batchLatencies), np.max(newestErrors)))
+
+        # The Lookahead Filter: Only the New Points Each Batch
+        for lookaheadTime in lookaheadTimes:
+            lookaheadFilter = _filteringProtocols.lookaheadFilter(lowPassSOS, int(samplingFreq*lookaheadTime))
+            finalData = []; provisionalErrors = []; batchLatencies = []
+            for endPoint in range(numBatchPoints, len(recordedData) + 1, numBatchPoints):
+                startTime = time.perf_counter()
+                finalPoints, provisionalPoints = lookaheadFilter.filterPoints(recordedData[endPoint - numBatchPoints:endPoint])
+                batchLatencies.append(time.perf_counter() - startTime)
+                finalData.extend(finalPoints)
+                if endPoint > startPoint:
+                    # The Newest Batch as Analyzed: the Final Points Joined to the Provisional Ones
+                    newestPoints = np.concatenate((finalData[-numBatchPoints:], provisionalPoints))[-numBatchPoints:]
+                    provisionalErrors.append(np.abs(newestPoints - referenceData[endPoint - numBatchPoints:endPoint]).max())
+            # Compare Away From the End Too (The Reference Pads the End of the Recording)
+            finalError = np.abs(np.array(finalData) - referenceData[:len(finalData)])[startPoint:len(finalData) - startPoint].max()
+            print("\tLookahead %4d ms: %.3f ms per Batch; Final Points %.2g; Newest Batch %.2g" % (1000*lookaheadTime, 1000*np.median(batchLatencies), finalError, np.max(provisionalErrors)))
+
+def fourierFilterBenchmark():
+    # butterFilter vs. the FFT Filters on the Recordings in Data/
+    recordingFiles = sorted(glob.glob(os.path.join(dataFolder, "*", "*.xlsx")))  # The offline recordings.
+    cutoffFreq = [0.5, 10]          # The band kept (Hz).
+    numRepeats = [1, 20]            # Also filter each recording joined to itself, as a stand-in for a longer session.
+    numTimedRuns = 3                # The fastest run is reported.
+
+    def listPaddedFilter(f_noise, samplingFreq, cutoffFreq):
+        # The Old removeFrequencies: List Padding to a Power of Two, Then Mirrored
+        closestPowerOfTwo = 2**(math.ceil(math.log(len(f_noise))/math.log(2)))
+        numZerosToPad = closestPowerOfTwo - len(f_noise)
+        f_noisePadded = [0]*numZerosToPad
+        f_noisePadded.extend(f_noise)
+        f_noisePadded.extend(f_noisePadded[::-1])
+        xf = rfftfreq(len(f_noisePadded), 1/samplingFreq)
+        return irfft(np.logical_and(cutoffFreq[0] < xf, xf < cutoffFreq[1]) * rfft(f_noisePadded))[numZerosToPad:numZerosToPad+len(f_noise)]
+
+    filteringMethods = _filteringProtocols.filteringMethods()
+    for recordingFile in recordingFiles:
+        timePoints, recordedData = loadRecording(recordingFile)
+        samplingFreq = (len(timePoints) - 1)/(timePoints[-1] - timePoints[0])
+
+        for numRepeat in numRepeats:
+            recordingData = np.tile(recordedData, numRepeat)
+            print("%s x%d: %d Points at %.0f Hz (%.0f Seconds); Keeping %g-%g Hz" % (os.path.basename(recordingFile), numRepeat, len(recordingData), samplingFreq, len(recordingData)/samplingFreq, *cutoffFreq))
+            filterMethods = [("butterFilter (Order 3, filtfilt)", lambda data: filteringMethods.bandPassFilter.butterFilter(data, cutoffFreq, samplingFreq, order = 3, filterType = 'bandpass')),
+                             ("butterFilter (Order 3, sosfiltfilt)", lambda data: filteringMethods.bandPassFilter.butterFilter(data, cutoffFreq, samplingFreq, order = 3, filterType = 'bandpass', fastFilt = True)),
+                             ("Old removeFrequencies (Lists)", lambda data: listPaddedFilter(data.tolist(), samplingFreq, cutoffFreq)),
+                             ("removeFrequencies", lambda data: filteringMethods.fourierFilter.removeFrequencies(data, samplingFreq, cutoffFreq)),
+                             ("removeFrequenciesBlocks", lambda data: filteringMethods.fourierFilter.removeFrequenciesBlocks(data, samplingFreq, cutoffFreq))]
+            filterResults = {}
+            for filterName, filterFunction in filterMethods:
+                runTimes = []
+                for runInd in range(numTimedRuns):
+                    startTime = time.perf_counter()
+                    filterResults[filterName] = filterFunction(recordingData)
+                    runTimes.append(time.perf_counter() - startTime)
+                print("\t%-36s %8.1f ms" % (filterName, 1000*min(runTimes)))
+
+            # The Old and New removeFrequencies Only Differ in the Edge Padding
+            interiorPoints = slice(int(10*samplingFreq), -int(10*samplingFreq))
+            signalRange = np.ptp(filterResults["removeFrequencies"][interiorPoints])
+            for filterName in ["Old removeFrequencies (Lists)", "removeFrequenciesBlocks"]:
+                print("\t\tLargest Difference From removeFrequencies (Away From the Edges): %.2g%% of the Filtered Range (%s)" % (100*np.abs(filterResults[filterName] - filterResults["removeFrequencies"])[interiorPoints].max()/signalRange, filterName))
+
+# The Benchmarks by Name
+benchmarkFunctions = {
+    "parallel": parallelBenchmark,                  # Batch Latency vs. Analysis Threads
+    "offline": offlineBenchmark,                    # analyzeRecording vs. streamExcelData
+    "plotting": plottingBenchmark,                  # Full Redraws vs. Blitted Frames
+    "streamingFilter": streamingFilterBenchmark,    # Zero-Phase vs. Streaming Filter Stages
+    "filterPipeline": filterPipelineBenchmark,      # Separate Filters vs. the SOS Cascade
+    "channelFiltering": channelFilteringBenchmark,  # Each Channel vs. Every Channel at Once
+    "lookahead": lookaheadBenchmark,                # Re-Filtering the Buffer vs. the Lookahead Filter
+    "fourierFilter": fourierFilterBenchmark,        # butterFilter vs. the FFT Filters on the Recordings in Data/
+}
+
+if __name__ == "__main__":
+    # Choose the Benchmarks
+    parser = argparse.ArgumentParser(description = "Benchmark the streaming pipeline.")
+    parser.add_argument("benchmarkNames", nargs = "+", choices = list(benchmarkFunctions), help = "The benchmarks to run (in order).")
+
+    for benchmarkName in parser.parse_args().benchmarkNames:
+        benchmarkFunctions[benchmarkName]()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Remembers each board between sessions (keyed by its serial number): the
+measured sampling rate, the channel count, the streaming format, and the
+filter designs the protocols used. A known board skips the warm-up reads and
+the sampling rate estimate, so analysis begins with the first points.
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# General Modules
+import os
+import json
+import time
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Board Profiles ----------------------------- #
+
+class boardProfiles():
+
+    def __init__(self, profileFile = os.path.join(os.path.dirname(os.path.abspath(__file__)), "boardProfiles.json")):
+        # The JSON File Holding Every Profile: {serialNum: profile}
+        self.profileFile = profileFile
+        self.profiles = {}
+        self.loadProfiles()
+
+    def loadProfiles(self):
+        if os.path.exists(self.profileFile):
+            try:
+                with open(self.profileFile, "r") as profileFile:
+                    self.profiles = json.load(profileFile)
+            except (OSError, ValueError) as error:
+                # A Bad File Only Costs the Fast Start
+                print("\t !!! Could Not Read the Board Profiles (" + str(error) + "); Starting Fresh !!!")
+                self.profiles = {}
+
+    def getProfile(self, serialNum, numChannels, streamingFormat):
+        """Returns the saved profile if the board is known and streams the same way, otherwise None."""
+        profile = self.profiles.get(str(serialNum))
+        if profile is None or profile.get("numChannels") != numChannels or profile.get("streamingFormat") != streamingFormat:
+            return None
+        if not profile.get("samplingFreq"):
+            return None
+        return profile
+
+    def updateProfile(self, serialNum, samplingFreq, numChannels, streamingFormat, filterDesigns = None):
+        # Record What This Session Measured
+        profile = self.profiles.setdefault(str(serialNum), {})
+        profile.update({
+            "samplingFreq": samplingFreq,
+            "numChannels": numChannels,
+            "streamingFormat": streamingFormat,
+            "lastUpdated": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        if filterDesigns is not None:
+            profile["filterDesigns"] = filterDesigns
+
+    def saveProfiles(self):
+        # Write to a Temporary File First so a Crash Never Leaves Half a File
+        temporaryFile = self.profileFile + ".tmp"
+        with open(temporaryFile, "w") as profileFile:
+            json.dump(self.profiles, profileFile, indent = 2)
+        os.replace(temporaryFile, self.profileFile)
@@ -12,6 +12,11 @@ Created on Tue Mar  2 13:44:26 2021
 # General modules
 import sys
 import math
+import bisect
+import time
+import asyncio
+import threading
+import concurrent.futures
 import numpy as np
 from datetime import datetime
 # Plotting
@@ -29,14 +34,28 @@ from eegAnalysis import eegProtocol
 from gsrAnalysis import gsrProtocol
 from generalAnalysis import generalProtocol
 from temperatureAnalysis import tempProtocol
+import _filteringProtocols                       # The Shared Filter Designs
+import _dataStorage                              # The Shared Time Column
+import _featureExtraction                        # Extract the Window Features on Worker Processes
+import _latencyMonitor                           # Time Each Stage of the Pipeline
+
 
 # Import Modules to Read in Data
 import arduinoInterface as arduinoInterface      # Functions to Read in Data from Arduino
+import boardProfiles as boardProfiles            # Saved Sampling Rates and Filters of Each Board
+import streamRecorder as streamRecorder          # Record the Data to Disk While Streaming
 
 class plotDataTopLevel():
     
-    def __init__(self, numChannels, channelDist, analysisOrder):
-        matplotlib.use('Qt5Agg') # Set Plotting GUI Backend   
+    def __init__(self, numChannels, channelDist, analysisOrder, frameRate = 30, axesRedrawInterval = 1, backend = 'Qt5Agg'):
+        """
+        The live plot. The protocols only hand over snapshots of their lines (setLineData, setXLimits),
+        decimated to the width of the axis in pixels; displayData draws the newest snapshots at most
+        'frameRate' times a second, so plotting never sets the pace of the analysis. Each frame only
+        redraws the lines over a saved background (blitting); the ticks and labels are redrawn at most
+        every 'axesRedrawInterval' seconds.
+        """
+        matplotlib.use(backend) # Set Plotting GUI Backend   
         # use ggplot style for more sophisticated visuals
         plt.style.use('seaborn-poster')
         
@@ -76,23 +95,198 @@ class plotDataTopLevel():
 
         # Finalize figure spacing
         plt.tight_layout()
+        
+        # Frame Parameters
+        self.frameRate = frameRate                      # The most frames drawn per second.
+        self.axesRedrawInterval = axesRedrawInterval    # The most often (seconds) the ticks and labels are redrawn.
+        # The Newest Snapshots (Handed Over by the Analysis Threads)
+        self.snapshotLock = threading.Lock()
+        self.lineSnapshots = {}     # {line: (xData, yData)}
+        self.axisLimits = {}        # {axis: (lowerLimit, upperLimit)}
+        self.animatedLines = []     # The lines drawn every frame (left out of the background).
+        # Blitting
+        self.background = None      # The figure without the animated lines.
+        self.axesChanged = False    # The limits moved since the background was drawn.
+        self.fig.canvas.mpl_connect('draw_event', self.saveBackground)
+        # Frame Statistics
+        self.lastFrameTime = -math.inf
+        self.lastAxesRedrawTime = -math.inf
+        self.numFrames = 0; self.numAxesRedraws = 0
+        self.figureShown = False
+    
+    # ---------------------------------------------------------------------- #
+    # ------------------------ Snapshots of the Lines ---------------------- #
+    
+    def setLineData(self, line, xData, yData):
+        """Replaces line.set_data: keep a decimated copy of the points until the next frame."""
+        xData, yData = self.decimateLine(line, xData, yData)
+        with self.snapshotLock:
+            self.lineSnapshots[line] = (xData, yData)
+    
+    def setXLimits(self, axis, lowerLimit, upperLimit):
+        """Replaces axis.set_xlim until the next frame."""
+        with self.snapshotLock:
+            self.axisLimits[axis] = (lowerLimit, upperLimit)
+    
+    def decimateLine(self, line, xData, yData):
+        # Keep the Min and Max of the Points in Each Pixel Column (The Drawn Line Looks the Same)
+        xData = np.asarray(xData, dtype=float); yData = np.asarray(yData, dtype=float)
+        numColumns = max(1, int(line.axes.bbox.width))
+        if len(xData) <= 4*numColumns:
+            return xData.copy(), yData.copy()
+        
+        # Split the Points Into One Bin per Column
+        binStarts = np.linspace(0, len(xData), numColumns, endpoint=False).astype(int)
+        binMinima = np.minimum.reduceat(yData, binStarts)
+        binMaxima = np.maximum.reduceat(yData, binStarts)
+        # Draw Each Bin as a Vertical Segment From its Min to its Max
+        decimatedX = np.repeat(xData[binStarts], 2)
+        decimatedY = np.column_stack((binMinima, binMaxima)).ravel()
+        
+        return decimatedX, decimatedY
+    
+    # ---------------------------------------------------------------------- #
+    # ------------------------------- Drawing ------------------------------ #
+    
+    def saveBackground(self, drawEvent):
+        # Every Full Draw (Including Resizing the Window) Saves the New Background
+        self.background = self.fig.canvas.copy_from_bbox(self.fig.bbox)
     
     def displayData(self):
-        self.fig.show(); 
+        """Draw a frame with the newest snapshots (at most 'frameRate' times a second)."""
+        if not self.figureShown:
+            self.fig.show(); self.figureShown = True
         self.fig.canvas.flush_events()
-        self.fig.canvas.draw()
+        
+        # Wait for the Next Frame
+        currentTime = time.perf_counter()
+        if currentTime - self.lastFrameTime < 1/self.frameRate: return
+        self.lastFrameTime = currentTime
+        self.renderFrame(currentTime)
+    
+    def renderFrame(self, currentTime):
+        # Take the Newest Snapshots
+        with self.snapshotLock:
+            lineSnapshots, self.lineSnapshots = self.lineSnapshots, {}
+            axisLimits, self.axisLimits = self.axisLimits, {}
+        
+        # Update the Lines
+        for line, (xData, yData) in lineSnapshots.items():
+            line.set_data(xData, yData)
+            if not line.get_animated():
+                # Leave the Line Out of the Background From Now on
+                line.set_animated(True); self.animatedLines.append(line)
+                self.background = None
+        for axis, (lowerLimit, upperLimit) in axisLimits.items():
+            axis.set_xlim(lowerLimit, upperLimit)
+        self.axesChanged = self.axesChanged or bool(axisLimits)
+        
+        # Redraw the Ticks and Labels if Needed (This Saves the Background)
+        redrawAxes = self.axesChanged and currentTime - self.lastAxesRedrawTime >= self.axesRedrawInterval
+        if self.background is None or redrawAxes or not self.fig.canvas.supports_blit:
+            self.fig.canvas.draw()
+            self.lastAxesRedrawTime = currentTime; self.axesChanged = False
+            self.numAxesRedraws += 1
+        else:
+            self.fig.canvas.restore_region(self.background)
+        
+        # Draw the Lines Over the Background
+        for line in self.animatedLines:
+            self.fig.draw_artist(line)
+        self.fig.canvas.blit(self.fig.bbox)
+        self.numFrames += 1
+
+class queuedActionControl():
+    
+    def __init__(self, actionControl, actionQueue):
+        """
+        Stands in for 'actionControl' during asyncio streaming. Each command
+        (Ex: actionControl.moveLeft()) is queued instead of run, and the
+        actionTask coroutine sends it to the real actionControl.
+        """
+        self.actionControl = actionControl
+        self.actionQueue = actionQueue
+        
+    def __getattr__(self, methodName):
+        # Check the Command Exists Before Queuing it
+        getattr(self.actionControl, methodName)
+        def queueAction(*args, **kwargs):
+            self.actionQueue.put_nowait((methodName, args, kwargs))
+        return queueAction
+
+class batchScheduler():
+    
+    def __init__(self, moveDataFinger, numPointsPerBatch, targetLag = 0.5, targetUsage = 0.8, skipPlots = True):
+        """
+        Chooses how many new points each batch analyzes (the effective moveDataFinger) so the
+        analysis keeps up with the Arduino. A batch must finish before its new points have
+        arrived again (the deadline: moveDataFinger/samplingFreq seconds). When the batches get
+        slower, the step grows until they take 'targetUsage' of that time; when they get
+        faster, it shrinks back to the requested moveDataFinger. If the points waiting to be
+        analyzed ever span more than 'targetLag' seconds, the next batch jumps over them (and,
+        with skipPlots, the plots are not redrawn until it catches up).
+        """
+        # Scheduling Parameters
+        self.minMoveDataFinger = moveDataFinger         # Never analyze fewer new points than requested.
+        self.maxMoveDataFinger = numPointsPerBatch - 1  # The protocols need moveDataFinger < numPointsPerBatch.
+        self.targetLag = targetLag                      # The most seconds of data left waiting after a batch.
+        self.targetUsage = targetUsage                  # The fraction of each deadline a batch should take.
+        self.skipPlots = skipPlots
+        self.batchTimeWeight = 0.2                      # How fast the average batch time follows the latest batch.
+        self.resetScheduler()
+    
+    def resetScheduler(self):
+        self.moveDataFinger = self.minMoveDataFinger    # The new points in the next batch.
+        self.batchTime = None                           # The (exponential) average seconds per batch.
+        # Scheduling Statistics
+        self.currentLag = 0                             # Seconds of data waiting after the last batch.
+        self.maxLag = 0
+        self.numBatches = 0
+        self.numDeadlineMisses = 0                      # Batches slower than the time their new points span.
+        self.numSkippedPlots = 0
+        
+    def recordBatch(self, batchTime, numWaitingPoints, samplingFreq):
+        """Update the schedule after a batch that took 'batchTime' seconds, with 'numWaitingPoints' still to analyze."""
+        # Check the Deadline of This Batch
+        self.numBatches += 1
+        if batchTime > self.moveDataFinger/samplingFreq:
+            self.numDeadlineMisses += 1
+        self.batchTime = batchTime if self.batchTime is None else self.batchTime + self.batchTimeWeight*(batchTime - self.batchTime)
+        self.currentLag = max(0, numWaitingPoints)/samplingFreq
+        self.maxLag = max(self.maxLag, self.currentLag)
+        
+        # Step Far Enough That a Batch Uses 'targetUsage' of its Deadline
+        moveDataFinger = math.ceil(self.batchTime*samplingFreq/self.targetUsage)
+        # Jump Over the Waiting Points if We Fell Behind
+        if self.currentLag > self.targetLag:
+            moveDataFinger += numWaitingPoints
+        self.moveDataFinger = min(max(moveDataFinger, self.minMoveDataFinger), self.maxMoveDataFinger)
+    
+    def skipPlot(self):
+        # Only Redraw Once the Analysis Has Caught Up
+        skipPlot = self.skipPlots and self.currentLag > self.targetLag
+        self.numSkippedPlots += skipPlot
+        return skipPlot
+    
+    def __str__(self):
+        return "Batches: %d; Deadline Misses: %d; Lag: %.2f s (Max %.2f s); moveDataFinger: %d; Skipped Plots: %d" % \
+                (self.numBatches, self.numDeadlineMisses, self.currentLag, self.maxLag, self.moveDataFinger, self.numSkippedPlots)
 
 # -------------------------------------------------------------------------- #
 # ---------------------------- Global Function ----------------------------- #
 
 class streamingFunctions():
     
-    def __init__(self, mainSerialNum, therapySerialNum, actionControl, numPointsPerBatch, moveDataFinger, streamingOrder, biomarkerOrder, plotStreamedData):
+    def __init__(self, mainSerialNum, therapySerialNum, actionControl, numPointsPerBatch, moveDataFinger, streamingOrder, biomarkerOrder, plotStreamedData, streamingFormat = "ascii", numChannelsPerBoard = None):
 
         # Store the arduinoRead Instance
-        if mainSerialNum != None:
-            self.arduinoRead = arduinoInterface.arduinoRead(mainSerialNum = mainSerialNum)
-            self.mainArduino = self.arduinoRead.mainArduino
+        self.multiBoard = isinstance(mainSerialNum, (list, tuple))
+        if self.multiBoard:
+            # Stream from Several Boards; Their Channels Follow 'streamingOrder' Board by Board
+            numChannelsPerBoard = numChannelsPerBoard or [1 for _ in mainSerialNum]
+            self.arduinoRead = arduinoInterface.multiArduinoRead(mainSerialNum, numChannelsPerBoard, streamingFormat)
+        elif mainSerialNum != None:
+            self.arduinoRead = arduinoInterface.arduinoRead(mainSerialNum = mainSerialNum, streamingFormat = streamingFormat)
         
         # Variables that specify order of signals.
         self.biomarkerOrder = biomarkerOrder            # The order the features from each analysis are spliced together.
@@ -104,6 +298,16 @@ class streamingFunctions():
         self.plotStreamedData = plotStreamedData    # Graph the Data to Show Incoming Signals + Analysis
         self.numChannels = len(self.streamingOrder) # The number of signals being streamed in.
         self.storeIncomingData = True
+        # Known Boards Start Without Warm-Up Reads (See boardProfiles)
+        self.useBoardProfiles = True
+        self.boardProfiles = boardProfiles.boardProfiles()
+        self.warmUpTime = 0.05                      # Seconds of data from a known board before the first analysis.
+        self.recorder = None                        # Records each block to disk (See startRecording).
+        self.analysisExecutor = None                # Analyzes the protocols at once (See setAnalysisWorkers).
+        self.featureExtractor = None                # Extracts the window features on worker processes (See setFeatureWorkers).
+        self.batchScheduler = None                  # Adapts moveDataFinger to the analysis cost (See setRealTimeTarget).
+        self.latencyMonitor = _latencyMonitor.monitor   # Times each stage, if enabled (See setLatencyMonitoring).
+        self.latencyFile = None                     # Export the stage latencies here at the end of the session (.json or .csv).
 
         # Variables that rely on the sensor data's order
         self.numChannelDist = [0 for _ in range(len(self.analysisOrder))] # Track the number of channels used by each sensor
@@ -147,17 +351,45 @@ class streamingFunctions():
         # Initialize mutable variables
         self.resetGlobalVariables()
     
+    @property
+    def mainArduino(self):
+        # The Current Port (it Changes if the Arduino Reconnects)
+        return self.arduinoRead.mainArduino
+    
     def resetGlobalVariables(self):
-        # Reset the analysis information
+        # Reset the streaming information
+        self.numReportedOverrunPoints = 0
+        self.numReportedLostPoints = 0
+        # Reset the startup information
+        self.streamingStartTime = time.perf_counter()
+        self.timeToFirstBatch = None        # Seconds from the start of streaming until the first analyzed batch.
+        self.numWarmUpPoints = None         # Analyze this many points before a full batch (known boards only).
+        if self.batchScheduler is not None: self.batchScheduler.resetScheduler()
+        # Reset the analysis information: Every Protocol Shares One Time Column
+        self.timePoints = _dataStorage.dataColumn()
         for analysis in self.analysisList:
-            analysis.resetGlobalVariables()
+            analysis.resetGlobalVariables(self.timePoints)
         
     def setupArduinoStream(self, stopTimeStreaming, usingTimestamps = False):
         # self.arduinoRead.resetArduino(self.mainArduino, 10)
-        # Read and throw out first few reads
-        rawReadsList = []
-        while (int(self.mainArduino.in_waiting) > 0 or len(rawReadsList) < 2000):
-            rawReadsList.append(self.arduinoRead.readline(ser=self.mainArduino))
+        boardChannels = self.arduinoRead.numChannelsPerBoard if self.multiBoard else [self.numChannels]
+        self.streamingProfiles = []
+        for arduinoReader, numBoardChannels in zip(self.arduinoReaders(), boardChannels):
+            boardProfile = self.boardProfiles.getProfile(arduinoReader.mainSerialNum, numBoardChannels, arduinoReader.streamingFormat) if self.useBoardProfiles else None
+            self.streamingProfiles.append(boardProfile)
+            
+            if arduinoReader.streamingFormat == "binary" or boardProfile is not None:
+                # Throw out the startup bytes; the decoder finds the next frame (or line)
+                arduinoReader.mainArduino.reset_input_buffer()
+                arduinoReader.resyncToLine = arduinoReader.streamingFormat != "binary"
+            else:
+                # Read and throw out first few reads
+                rawReadsList = []
+                while (int(arduinoReader.mainArduino.in_waiting) > 0 or len(rawReadsList) < 2000):
+                    rawReadsList.append(arduinoReader.readline(ser=arduinoReader.mainArduino))
+        # The Analysis Follows the First Board's Timeline
+        if self.streamingProfiles[0] is not None:
+            self.applyBoardProfile(self.streamingProfiles[0])
         
         if usingTimestamps:
             # Calculate the Stop Time
@@ -173,28 +405,201 @@ class streamingFunctions():
         
         return stopTimeStreaming
     
-    def recordData(self, maxVolt = 5, adcResolution = 1023):
-        # Read in at least one point
-        rawReadsList = []
-        while (int(self.mainArduino.in_waiting) > 0 or len(rawReadsList) == 0):
-            rawReadsList.append(self.arduinoRead.readline(ser=self.mainArduino))
+    def applyBoardProfile(self, boardProfile):
+        # Use the Saved Sampling Frequency Instead of Estimating it from the First Batch
+        samplingFreq = boardProfile["samplingFreq"]
+        print("\tKnown Board: Using the Saved Sampling Frequency", samplingFreq)
+        for analysis in self.analysisList:
+            analysis.samplingFreq = samplingFreq
+            analysis.setSamplingFrequencyParams()
+            analysis.setDataRetention()
+        # Reuse the Saved Filter Designs
+        _filteringProtocols.bandPassFilter().loadFilterDesigns(boardProfile.get("filterDesigns", {}))
+        # Begin Analysis With the First Few Points
+        self.numWarmUpPoints = min(self.numPointsPerBatch, max(32, int(samplingFreq*self.warmUpTime)))
+    
+    def saveBoardProfiles(self):
+        # Remember What Each Board Streamed for the Next Session
+        if not self.useBoardProfiles: return
+        filterDesigns = _filteringProtocols.bandPassFilter().saveFilterDesigns()
+        if self.multiBoard:
+            boardChannels = self.arduinoRead.numChannelsPerBoard
+            samplingFreqs = [boardStatistics["samplingFreq"] for boardStatistics in self.arduinoRead.boardStatistics()]
+        else:
+            # The Average Rate Over the Whole Session
+            timePoints = self.timePoints
+            boardChannels = [self.numChannels]
+            samplingFreqs = [(len(timePoints) - 1)/(timePoints[-1] - timePoints[0]) if len(timePoints) > 1 and timePoints[-1] > timePoints[0] else None]
+        
+        for arduinoReader, numBoardChannels, samplingFreq in zip(self.arduinoReaders(), boardChannels, samplingFreqs):
+            if samplingFreq and np.isfinite(samplingFreq):
+                self.boardProfiles.updateProfile(arduinoReader.mainSerialNum, float(samplingFreq), numBoardChannels, arduinoReader.streamingFormat, filterDesigns)
+        try:
+            self.boardProfiles.saveProfiles()
+        except OSError as error:
+            print("\t !!! Could Not Save the Board Profiles:", error, "!!!")
+    
+    def setAnalysisWorkers(self, numWorkers):
+        """
+        Analyze the protocols in each batch at once on 'numWorkers' threads (the filters and
+        features mostly run in numpy/scipy, which release the GIL). The channels of a protocol
+        are filtered together in one call (See globalProtocol.filterChannels), so they are not
+        split further. numWorkers = None or 1 analyzes everything in order.
+        """
+        # Stop the Old Threads
+        if self.analysisExecutor is not None: self.analysisExecutor.shutdown()
+        self.analysisExecutor = None
+        
+        # Start the New Threads
+        if numWorkers and numWorkers > 1:
+            self.analysisExecutor = concurrent.futures.ThreadPoolExecutor(numWorkers, thread_name_prefix = "analysisWorker")
+    
+    def setFeatureWorkers(self, numWorkers):
+        """
+        Extract the windowed features (EEG, GSR, and EOG blinks) on 'numWorkers' processes. The
+        analysis only queues each finished window; its features are recorded in timestamp order
+        at the start of a later batch (See _featureExtraction). numWorkers = None or 0 extracts them inline.
+        """
+        # Record the Backlog, Then Stop the Old Processes
+        if self.featureExtractor is not None:
+            self.featureExtractor.shutdown()
+        self.featureExtractor = None
+        
+        # Start the New Processes
+        if numWorkers:
+            self.featureExtractor = _featureExtraction.featureExtractionPool(numWorkers)
+        for analysis in self.analysisList:
+            analysis.featureExtractor = self.featureExtractor
+            
+    def collectFeatures(self, waitForAll = False):
+        # Record the Features Extracted on the Worker Processes
+        if self.featureExtractor is not None:
+            with self.latencyMonitor.span("collectFeatures"):
+                self.featureExtractor.collectFeatures(waitForAll)
+            
+    def setLatencyMonitoring(self, enabled = True, latencyFile = None):
+        """
+        Time each stage of the session (reading, parsing, organizeData, each protocol's analyzeData
+        and filterData, feature extraction, averageFeatures, and plotting). The p50/p95/p99 of each
+        stage are printed when streaming ends, and saved to 'latencyFile' (.json or .csv) if given.
+        """
+        self.latencyMonitor.enable(enabled)
+        self.latencyMonitor.reset()
+        self.latencyFile = latencyFile
+        
+    def reportLatency(self):
+        # Report Where the Time Went
+        if not self.latencyMonitor.enabled: return
+        self.latencyMonitor.printSummary()
+        if self.latencyFile:
+            try:
+                self.latencyMonitor.export(self.latencyFile)
+            except OSError as error:
+                print("\t !!! Could Not Save the Stage Latencies:", error, "!!!")
+            
+    def averageFeatures(self, newFeatureTimes, newRawFeatures, featureTimes, rawFeatures, compiledFeatures, featureAverageWindow):
+        with self.latencyMonitor.span("averageFeatures"):
+            # Add the New Features (in Time Order)
+            featureTimes.extend(newFeatureTimes)
+            rawFeatures.extend(newRawFeatures)
             
-        # Parse the Data
-        Voltages, timePoints = self.arduinoRead.parseRead(rawReadsList, self.numChannels, maxVolt, adcResolution)
+            # Compile Each New Feature: the Average of the Features Within 'featureAverageWindow' Seconds Before it
+            for featureInd in range(len(featureTimes) - len(newFeatureTimes), len(featureTimes)):
+                if featureAverageWindow is None:
+                    compiledFeatures.append(rawFeatures[featureInd])
+                else:
+                    startFeatureInd = bisect.bisect_left(featureTimes, featureTimes[featureInd] - featureAverageWindow, 0, featureInd)
+                    compiledFeatures.append(np.mean(rawFeatures[startFeatureInd:featureInd + 1], axis=0).tolist())
+    
+    def startRecording(self, recordingFile):
+        # Save Every Block to 'recordingFile' as it Arrives (Convert with streamRecorder.convertToExcel)
+        self.stopRecording()
+        self.recorder = streamRecorder.streamRecorder(recordingFile, self.streamingOrder)
+        
+    def stopRecording(self):
+        if self.recorder is not None:
+            self.recorder.close()
+            print("\tRecorded", self.recorder.numRows, "Points to", self.recorder.recordingFile)
+            self.recorder = None
+    
+    def reportFeatureBacklog(self):
+        # Record the Features Still Being Extracted
+        if self.featureExtractor is None: return
+        print("\tFeature Windows Extracted on Worker Processes:", self.featureExtractor.numSubmittedWindows, "; Largest Backlog:", self.featureExtractor.maxPendingWindows)
+        self.collectFeatures(waitForAll = True)
+        
+    def arduinoReaders(self):
+        # The arduinoRead of Each Board
+        return self.arduinoRead.boardReaders if self.multiBoard else [self.arduinoRead]
+    
+    def setGapRepair(self, repairPolicy):
+        # Fill the Points Lost from Each Board's Stream ('mark', 'interpolate', 'hold'; None to Leave as Parsed)
+        for arduinoReader in self.arduinoReaders():
+            arduinoReader.gapRepair = arduinoInterface.sampleGapRepair(repairPolicy) if repairPolicy else None
+    
+    def recordData(self, maxVolt = 5, adcResolution = 1023):
+        # If the Serial Port is Drained in the Background, Take Everything Collected as One Block
+        if self.arduinoRead.readingThread is not None:
+            with self.latencyMonitor.span("readBlock"):
+                timePoints, Voltages = self.arduinoRead.readBlock(timeout = 1)
+            self.checkBufferOverruns()
+            self.checkSampleLoss()
+            # Organize the Data for Processing
+            if len(timePoints) != 0:
+                self.organizeData([timePoints], Voltages)
+            return
+        
+        # Read and parse everything waiting, with at least one point
+        timePoints = []
+        while len(timePoints) == 0:
+            try:
+                Voltages, timePoints = self.arduinoRead.readParsedBlock(self.mainArduino, self.numChannels, maxVolt, adcResolution)
+            except OSError as error:
+                # If the Link Drops (serial.SerialException is an OSError), Reconnect and Keep Streaming
+                if not self.arduinoRead.reconnectArduino(error): raise
+        self.checkSampleLoss()
         # Organize the Data for Processing
-        self.organizeData(timePoints, Voltages)
+        self.organizeData([timePoints], Voltages)
+        
+    def checkBufferOverruns(self):
+        # Warn the User if the Reading Thread Overwrote Points We Never Analyzed
+        numOverrunPoints = self.arduinoRead.numOverrunPoints()
+        if numOverrunPoints != self.numReportedOverrunPoints:
+            print("\t !!! Analysis Fell Behind: " + str(numOverrunPoints - self.numReportedOverrunPoints) + " Points Overwritten in the Buffer (" + str(numOverrunPoints) + " Total) !!!")
+            self.numReportedOverrunPoints = numOverrunPoints
+    
+    def checkSampleLoss(self):
+        # Warn the User When Points are Lost from the Stream (Malformed Lines, Missing Frames, Overruns)
+        numLostPoints = sum(arduinoReader.gapRepair.numLostPoints for arduinoReader in self.arduinoReaders() if arduinoReader.gapRepair is not None)
+        if numLostPoints != self.numReportedLostPoints:
+            print("\t !!! " + str(numLostPoints - self.numReportedLostPoints) + " Points Lost from the Stream (" + str(numLostPoints) + " Total) !!!")
+            self.numReportedLostPoints = numLostPoints
         
     def organizeData(self, timePoints, Voltages):
         if len(timePoints[0]) == 0:
             print("\t !!! NO POINTS FOUND !!!")
+        self.latencyMonitor.count("pointsStreamed", len(timePoints[0]))
+        # Save the Block Before Analyzing it
+        if self.recorder is not None:
+            with self.latencyMonitor.span("recordBlock"):
+                self.recorder.recordBlock(timePoints[0], Voltages)
         
-        # Update the data (if present) for each sensor
-        for analysisInd in range(len(self.analysisList)):
-            analysis = self.analysisList[analysisInd]
-
-            analysis.data[0].extend(timePoints[0])            
-            # Add the Data to the Correct Channel
-            analysis.data[1][analysisInd].extend(Voltages[analysisInd])
+        with self.latencyMonitor.span("organizeData"):
+            # Add the Time Points Once (Every Protocol Shares Them)
+            self.timePoints.extend(timePoints[0])
+            # Update the data (if present) for each sensor
+            for analysisInd in range(len(self.analysisList)):
+                analysis = self.analysisList[analysisInd]
+    
+                # Add the Data to the Correct Channel
+                for channelIndex, streamingChannel in enumerate(self.channelDist[analysisInd]):
+                    analysis.data[1][channelIndex].extend(Voltages[streamingChannel])
+    
+    def closeArduinos(self):
+        if self.multiBoard:
+            self.arduinoRead.closeArduinos()
+        else:
+            self.mainArduino.close()
             
     def convertToTime(self, timeStamp):
         if type(timeStamp) == str:
@@ -222,31 +627,96 @@ class streamingFunctions():
 
 class mainArduinoRead(streamingFunctions):
 
-    def __init__(self, mainSerialNum, actionControl, numPointsPerBatch, moveDataFinger, streamingOrder, biomarkerOrder, plotStreamedData):
+    def __init__(self, mainSerialNum, actionControl, numPointsPerBatch, moveDataFinger, streamingOrder, biomarkerOrder, plotStreamedData, streamingFormat = "ascii", numChannelsPerBoard = None):
         # Create Pointer to Common Functions
-        super().__init__(mainSerialNum, None, actionControl, numPointsPerBatch, moveDataFinger, streamingOrder, biomarkerOrder, plotStreamedData)
+        super().__init__(mainSerialNum, None, actionControl, numPointsPerBatch, moveDataFinger, streamingOrder, biomarkerOrder, plotStreamedData, streamingFormat, numChannelsPerBoard)
 
-    def analyzeBatchData(self, dataFinger, lastTimePoint, predictionModel, actionControl):
+    def setRealTimeTarget(self, targetLag = 0.5, targetUsage = 0.8, skipPlots = True):
+        """
+        Adapt the batch cadence to the analysis cost so the analysis lags the Arduino by at most
+        'targetLag' seconds (See batchScheduler). Read the current lag, moveDataFinger, and
+        deadline misses from self.batchScheduler. targetLag = None analyzes every moveDataFinger points.
+        """
+        self.batchScheduler = None
+        if targetLag is not None:
+            self.batchScheduler = batchScheduler(self.moveDataFinger, self.numPointsPerBatch, targetLag, targetUsage, skipPlots)
+        # Start From the Requested Cadence
+        for analysis in self.analysisList: analysis.moveDataFinger = self.moveDataFinger
+    
+    def analyzeBatchData(self, dataFinger, lastTimePoint, predictionModel, actionControl, displayData = True):
+        # Record the Features Finished Since the Last Batch
+        self.collectFeatures()
+        
+        # Tell the Protocols How Many New Points This Batch Has
+        moveDataFinger = self.moveDataFinger
+        if self.batchScheduler is not None:
+            moveDataFinger = self.batchScheduler.moveDataFinger
+            for analysis in self.analysisList: analysis.moveDataFinger = moveDataFinger
+            batchStartTime = time.perf_counter()
+        
         # Analyze the current data
-        for analysis in self.analysisList:
-            analysis.analyzeData(dataFinger, predictionModel = predictionModel, actionControl = actionControl)
+        self.latencyMonitor.count("batchesAnalyzed")
+        with self.latencyMonitor.span("analyzeBatch"):
+            if self.analysisExecutor is None or len(self.analysisList) == 1:
+                for analysis in self.analysisList:
+                    self.analyzeProtocol(analysis, dataFinger, predictionModel, actionControl)
+            else:
+                # The Protocols are Independent: Analyze Them at Once
+                analysisJobs = [self.analysisExecutor.submit(self.analyzeProtocol, analysis, dataFinger, predictionModel, actionControl) for analysis in self.analysisList]
+                # Wait for Every Protocol Before Plotting (Raises the First Error)
+                for analysisJob in analysisJobs: analysisJob.result()
 
         # Plot the Data
-        if self.plotStreamedData: self.plottingClass.displayData()
+        if self.plotStreamedData and displayData and not (self.batchScheduler is not None and self.batchScheduler.skipPlot()):
+            with self.latencyMonitor.span("displayData"):
+                self.plottingClass.displayData()
+        
+        # Report the Startup Time
+        if self.timeToFirstBatch is None:
+            self.timeToFirstBatch = time.perf_counter() - self.streamingStartTime
+            print("\tFirst Batch Analyzed After %.0f ms" % (1000*self.timeToFirstBatch))
+            if self.recorder is not None: self.recorder.setSamplingFreq(self.analysisList[0].samplingFreq)
+    
+        # Schedule the Next Batch
+        samplingFreq = self.analysisList[0].samplingFreq
+        if self.batchScheduler is not None and samplingFreq:
+            numWaitingPoints = len(self.timePoints) - (dataFinger + self.numPointsPerBatch)
+            self.batchScheduler.recordBatch(time.perf_counter() - batchStartTime, numWaitingPoints, samplingFreq)
+            moveDataFinger = self.batchScheduler.moveDataFinger
     
         # Move the dataFinger pointer to analyze the next batch of data
-        return dataFinger + self.moveDataFinger
+        return dataFinger + moveDataFinger
             
-    def streamArduinoData(self, maxVolt, adcResolution, stopTimeStreaming, predictionModel = None, actionControl = None, numTrashReads=100, numPointsPerRead=300):
-        """Stop Streaming When we Obtain `stopTimeStreaming` from Arduino"""
+    def analyzeProtocol(self, analysis, dataFinger, predictionModel, actionControl):
+        with self.latencyMonitor.span("analyzeData", analysis.protocolName):
+            analysis.analyzeData(dataFinger, predictionModel = predictionModel, actionControl = actionControl)
+            
+    def streamArduinoData(self, maxVolt, adcResolution, stopTimeStreaming, predictionModel = None, actionControl = None, numTrashReads=100, numPointsPerRead=300, 
+                          useReadingThread = True, readingBufferSize = 2**18, repairPolicy = "interpolate"):
+        """
+        Stop Streaming When we Obtain `stopTimeStreaming` from Arduino
+        
+        useReadingThread: Drain the serial port on a background thread into a circular buffer of
+            'readingBufferSize' points, and analyze whole blocks from it. If False, the port is
+            polled line by line between batches. Several boards are always read on their own threads.
+        repairPolicy: How short runs of points lost from the stream are filled before organizeData
+            ('mark', 'interpolate', or 'hold'; See arduinoInterface.sampleGapRepair). Longer outages and
+            reconnects are only marked. None skips the check.
+        """
         print("Streaming in Data from the Arduino")
         # Reset Global Variable in Case it Was Previously Populated
         self.resetGlobalVariables()
         
         # Prepare the arduino to stream in data
         self.stopTimeStreaming = self.setupArduinoStream(stopTimeStreaming)
-        timePoints = self.analysisList[0].data[0]
+        self.setGapRepair(repairPolicy)
+        timePoints = self.timePoints
         dataFinger = 0
+        
+        # Continuously read the arduino while the data is analyzed
+        useReadingThread = useReadingThread or self.multiBoard
+        if useReadingThread:
+            self.arduinoRead.startReadingThread(self.numChannels, maxVolt, adcResolution, readingBufferSize)
     
         try:
             # Loop Through and Read the Arduino Data in Real-Time
@@ -257,6 +727,9 @@ class mainArduinoRead(streamingFunctions):
                 # When enough data has been collected, analyze the new data in batches.
                 while len(timePoints) - dataFinger >= self.numPointsPerBatch:
                     dataFinger = self.analyzeBatchData(dataFinger, timePoints[-1], predictionModel, actionControl)
+                # Known Boards: Analyze the First Points Without Waiting for a Full Batch
+                if self.timeToFirstBatch is None and self.numWarmUpPoints and len(timePoints) >= self.numWarmUpPoints:
+                    self.analyzeBatchData(dataFinger, timePoints[-1], predictionModel, actionControl)
                 
                # print(self.gsrAnalysis.data[1][0][-1])
                     
@@ -264,13 +737,168 @@ class mainArduinoRead(streamingFunctions):
             dataFinger = self.analyzeBatchData(dataFinger, timePoints[-1], predictionModel, actionControl)
                         
         except Exception as error:
-            self.mainArduino.close();
+            self.closeArduinos()
             print(error)
                 
         finally:
+            # Stop reading in the background
+            if useReadingThread:
+                self.arduinoRead.stopReadingThread()
+                print("\tPoints Lost to Buffer Overruns:", self.arduinoRead.numOverrunPoints())
+            if self.multiBoard:
+                for boardStatistics in self.arduinoRead.boardStatistics():
+                    print("\tBoard %s: %.2f Hz; Clock Drift %.0f ppm; %d Points Overrun; %d Bad Reads; %d Points Lost; %d Repaired" % tuple(boardStatistics.values()))
+            elif self.arduinoRead.gapRepair is not None:
+                print("\tPoints Lost from the Stream:", self.arduinoRead.gapRepair.numLostPoints, "; Repaired:", self.arduinoRead.gapRepair.numRepairedPoints)
+            if not self.multiBoard and self.arduinoRead.frameDecoder is not None:
+                print("\tBinary Frames Dropped:", self.arduinoRead.frameDecoder.numDroppedFrames, "; Corrupt Bytes Skipped:", self.arduinoRead.frameDecoder.numCorruptBytes)
+            if not self.multiBoard and self.arduinoRead.numReconnects:
+                print("\tReconnected to the Arduino", self.arduinoRead.numReconnects, "Time(s)")
+            self.reportFeatureBacklog()
+            if self.batchScheduler is not None:
+                print("\tReal-Time Schedule:", self.batchScheduler)
+            self.reportLatency()
+            self.saveBoardProfiles()
+            self.stopRecording()
              # Close the Arduinos at the End
             print("\nFinished Streaming in Data; Closing Arduino\n")
+            self.closeArduinos()
+        
+    # ---------------------------------------------------------------------- #
+    # ------------------------- Asyncio Streaming -------------------------- #
+    
+    async def streamArduinoDataAsync(self, maxVolt, adcResolution, stopTimeStreaming, predictionModel = None, actionControl = None, plotInterval = 0.1, repairPolicy = "interpolate"):
+        """
+        Asyncio version of streamArduinoData. The serial port is registered with the
+        event loop, so points are read and parsed only when bytes arrive (no polling).
+        Analysis, plotting (every 'plotInterval' seconds), and actionControl commands
+        each run as their own task on the calling event loop.
+        
+        Usage: asyncio.run(readData.streamArduinoDataAsync(...)), or await it inside another service.
+        """
+        assert not self.multiBoard, "Use streamArduinoData to stream from several boards"
+        print("Streaming in Data from the Arduino")
+        # Reset Global Variable in Case it Was Previously Populated
+        self.resetGlobalVariables()
+        
+        # Prepare the arduino to stream in data
+        self.stopTimeStreaming = self.setupArduinoStream(stopTimeStreaming)
+        self.setGapRepair(repairPolicy)
+        loop = asyncio.get_running_loop()
+        self.newDataEvent = asyncio.Event()
+        self.asyncReadingError = None
+        
+        # Send actionControl Commands from Their Own Task
+        actionQueue = asyncio.Queue()
+        queuedControl = queuedActionControl(actionControl, actionQueue) if actionControl else None
+        
+        # Parse the Incoming Bytes Whenever the Port is Readable
+        self.arduinoRead.stopReconnecting.clear()
+        self.arduinoFileNum = self.mainArduino.fileno()
+        loop.add_reader(self.arduinoFileNum, self.readAvailableData, maxVolt, adcResolution)
+        # Start the Tasks
+        helperTasks = [loop.create_task(self.actionTask(actionQueue, actionControl))]
+        if self.plotStreamedData: helperTasks.append(loop.create_task(self.plottingTask(plotInterval)))
+        
+        try:
+            # Analyze the Data Until the Stop Time
+            await self.analysisTask(predictionModel, queuedControl)
+            # Send the Remaining Commands
+            await actionQueue.join()
+            
+        except Exception as error:
+            print(error)
+        
+        finally:
+            # Stop Reading and Cancel the Tasks
+            loop.remove_reader(self.arduinoFileNum)
+            self.arduinoRead.stopReconnecting.set()
+            for helperTask in helperTasks: helperTask.cancel()
+            await asyncio.gather(*helperTasks, return_exceptions = True)
+            self.reportFeatureBacklog()
+            if self.batchScheduler is not None:
+                print("\tReal-Time Schedule:", self.batchScheduler)
+            self.reportLatency()
+            self.saveBoardProfiles()
+            self.stopRecording()
+            # Close the Arduinos at the End
+            print("\nFinished Streaming in Data; Closing Arduino\n")
             self.mainArduino.close();
+    
+    def readAvailableData(self, maxVolt, adcResolution):
+        # Called by the Event Loop When the Port Has Bytes
+        try:
+            Voltages, timePoints = self.arduinoRead.readParsedBlock(self.mainArduino, self.numChannels, maxVolt, adcResolution)
+            self.checkSampleLoss()
+            # Organize the Data for Processing
+            if len(timePoints) != 0:
+                self.organizeData([timePoints], Voltages)
+        except OSError as error:
+            # The Link Dropped: Stop Watching the Old Port and Reconnect in the Background
+            loop = asyncio.get_running_loop()
+            loop.remove_reader(self.arduinoFileNum)
+            self.reconnectingTask = loop.create_task(self.reconnectAsync(error, maxVolt, adcResolution))
+            return
+        except Exception as error:
+            # Let the Analysis Task Know the Stream Failed
+            self.asyncReadingError = error
+            asyncio.get_running_loop().remove_reader(self.arduinoFileNum)
+        # Wake Up the Analysis Task
+        self.newDataEvent.set()
+    
+    async def reconnectAsync(self, error, maxVolt, adcResolution):
+        # Retry the Connection Without Blocking the Event Loop
+        loop = asyncio.get_running_loop()
+        if await loop.run_in_executor(None, self.arduinoRead.reconnectArduino, error):
+            # Watch the New Port
+            self.arduinoFileNum = self.mainArduino.fileno()
+            loop.add_reader(self.arduinoFileNum, self.readAvailableData, maxVolt, adcResolution)
+        else:
+            # Let the Analysis Task Know the Stream Failed
+            self.asyncReadingError = error
+            self.newDataEvent.set()
+        
+    async def analysisTask(self, predictionModel, actionControl):
+        timePoints = self.timePoints
+        dataFinger = 0
+        
+        # Loop Through and Analyze the Arduino Data in Real-Time
+        while len(timePoints) == 0 or (timePoints[-1] - timePoints[0]) < self.stopTimeStreaming:
+            # Wait for New Data
+            await self.newDataEvent.wait()
+            self.newDataEvent.clear()
+            if self.asyncReadingError is not None:
+                raise self.asyncReadingError
+            
+            # When enough data has been collected, analyze the new data in batches.
+            while len(timePoints) - dataFinger >= self.numPointsPerBatch:
+                dataFinger = self.analyzeBatchData(dataFinger, timePoints[-1], predictionModel, actionControl, displayData = False)
+                # Let the Port be Read Between Batches
+                await asyncio.sleep(0)
+            # Known Boards: Analyze the First Points Without Waiting for a Full Batch
+            if self.timeToFirstBatch is None and self.numWarmUpPoints and len(timePoints) >= self.numWarmUpPoints:
+                self.analyzeBatchData(dataFinger, timePoints[-1], predictionModel, actionControl, displayData = False)
+        
+        # At the end, analyze all remaining data
+        dataFinger = self.analyzeBatchData(dataFinger, timePoints[-1], predictionModel, actionControl, displayData = False)
+        
+    async def plottingTask(self, plotInterval):
+        # Redraw the Figure at a Fixed Rate, Independent of the Batches
+        while True:
+            await asyncio.sleep(plotInterval)
+            with self.latencyMonitor.span("displayData"):
+                self.plottingClass.displayData()
+            
+    async def actionTask(self, actionQueue, actionControl):
+        # Send Each Queued Command to the Real actionControl
+        while True:
+            methodName, args, kwargs = await actionQueue.get()
+            try:
+                getattr(actionControl, methodName)(*args, **kwargs)
+            except Exception as error:
+                print("\t !!! actionControl." + methodName + " Failed:", error, "!!!")
+            finally:
+                actionQueue.task_done()
         
     def streamExcelData(self, compiledRawData, experimentTimes, experimentNames, surveyAnswerTimes, 
                         surveyAnswersList, surveyQuestions, subjectInformationAnswers, subjectInformationQuestions, predictionModel = None, actionControl = None):
@@ -298,10 +926,33 @@ class mainArduinoRead(streamingFunctions):
         # At the end, analyze all remaining data
         lastTimePoint = timePoints[min(generalDataFinger+self.moveDataFinger, len(timePoints)) - 1]
         dataFinger = self.analyzeBatchData(dataFinger, lastTimePoint, predictionModel, actionControl)
+        self.reportFeatureBacklog()
+        self.reportLatency()
 
         # Finished Analyzing the Data
         print("\n\tFinished Analyzing Excel Data")
 
-
-
-
+    def analyzeRecording(self, compiledRawData, samplingFreq = None):
+        """
+        Offline replacement for streamExcelData: load the whole recording, then let each protocol filter
+        it once and extract every feature window in one pass (See globalProtocol.analyzeRecording). The
+        windows (EOG: blinks) follow streamExcelData's batches, but the features differ by the edge effects
+        of the streamed buffers (See tests/test_offlineAnalysis.py for the tolerance). Analyzes EEG, GSR,
+        temperature, and EOG; nothing is plotted, and EMG and general are not analyzed.
+        """
+        print("\tAnalyzing the Whole Recording")
+        # Reset Global Variable in Case it Was Previously Populated
+        self.resetGlobalVariables()
+        
+        # Load the Recording at Once
+        timePoints, Voltages = compiledRawData
+        self.organizeData([np.asarray(timePoints)], np.asarray(Voltages))
+        
+        # Analyze the Whole Recording
+        for analysis in self.analysisList:
+            with self.latencyMonitor.span("analyzeRecording", analysis.protocolName):
+                analysis.analyzeRecording(samplingFreq)
+        self.reportFeatureBacklog()
+        self.reportLatency()
+        
+        print("\n\tFinished Analyzing the Recording")
@@ -0,0 +1,159 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Records every parsed block to disk while streaming, so a crash loses at most
+the last 'flushInterval' seconds. The file is a fixed header followed by
+float64 rows of [time, channel 1, channel 2, ...]:
+
+    bytes 0-7:      b"BIOREC01"
+    bytes 8-15:     the number of rows flushed to disk (uint64)
+    bytes 16-4095:  a JSON header (channelNames, streamingOrder, samplingFreq), padded with spaces
+    bytes 4096-:    the rows
+
+Blocks are copied into a memory map of the file (O(block)); a background
+thread flushes it to disk. Use convertToExcel for the usual Excel layout.
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# General Modules
+import os
+import json
+import mmap
+import time
+import threading
+import numpy as np
+
+# Import Modules to Save Data
+import excelProcessing as excelDataProtocol      # Functions to Save Data in Excel
+
+# -------------------------------------------------------------------------- #
+# ----------------------------- Stream Recorder ---------------------------- #
+
+class streamRecorder():
+    # The File Layout
+    fileSignature = b"BIOREC01"
+    headerSize = 4096
+
+    def __init__(self, recordingFile, streamingOrder, samplingFreq = None, flushInterval = 1, growSize = 2**26):
+        # Recording Parameters
+        self.recordingFile = recordingFile
+        self.streamingOrder = list(streamingOrder)
+        self.numColumns = 1 + len(self.streamingOrder)  # The time plus each channel.
+        self.flushInterval = flushInterval              # Seconds between flushes to disk.
+        self.growSize = growSize                        # Bytes added to the file when it is full.
+        self.header = {
+            "channelNames": [streamingType.upper() + " Raw Data" for streamingType in self.streamingOrder],
+            "streamingOrder": self.streamingOrder,
+            "samplingFreq": samplingFreq,
+            "startTime": time.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+        # Create the File
+        os.makedirs(os.path.dirname(os.path.abspath(recordingFile)), exist_ok=True)
+        self.fileObject = open(recordingFile, "w+b")
+        self.fileObject.truncate(self.headerSize + self.growSize)
+        self.mappedFile = mmap.mmap(self.fileObject.fileno(), 0)
+        self.mappedFile[0:len(self.fileSignature)] = self.fileSignature
+        self.writeHeader()
+        self.mapRows()
+        # Recording Information
+        self.numRows = 0            # The rows written to the memory map.
+        self.numFlushedRows = 0     # The rows safely on disk (recorded in the header).
+
+        # Flush in the Background
+        self.fileLock = threading.Lock()
+        self.stopFlushing = threading.Event()
+        self.flushingThread = threading.Thread(target = self.flushingLoop, name = "streamRecorderThread", daemon = True)
+        self.flushingThread.start()
+
+    def mapRows(self):
+        # View the Data Region as Rows
+        numRowsCapacity = (len(self.mappedFile) - self.headerSize) // (8*self.numColumns)
+        self.rowView = np.ndarray((numRowsCapacity, self.numColumns), dtype=np.float64, buffer=self.mappedFile, offset=self.headerSize)
+
+    def writeHeader(self):
+        headerBytes = json.dumps(self.header).encode()
+        assert len(headerBytes) <= self.headerSize - 16, "The recording header is too long"
+        self.mappedFile[16:self.headerSize] = headerBytes.ljust(self.headerSize - 16)
+
+    def setSamplingFreq(self, samplingFreq):
+        with self.fileLock:
+            self.header["samplingFreq"] = samplingFreq
+            self.writeHeader()
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ Recording ----------------------------- #
+
+    def recordBlock(self, timePoints, Voltages):
+        """Append the parsed points: timePoints (numPoints), Voltages (numChannels, numPoints)."""
+        numNewRows = len(timePoints)
+        if numNewRows == 0: return
+        # Grow the File if the Block Does Not Fit
+        if self.numRows + numNewRows > len(self.rowView):
+            self.growFile(numNewRows)
+
+        # Copy the Block Into the Memory Map
+        self.rowView[self.numRows:self.numRows + numNewRows, 0] = timePoints
+        self.rowView[self.numRows:self.numRows + numNewRows, 1:] = np.asarray(Voltages).T
+        self.numRows += numNewRows
+
+    def growFile(self, numNewRows):
+        newFileSize = max(self.headerSize + (self.numRows + numNewRows)*8*self.numColumns, len(self.mappedFile) + self.growSize)
+        with self.fileLock:
+            # Remap the Larger File (No Data is Copied)
+            del self.rowView
+            self.mappedFile.close()
+            self.fileObject.truncate(newFileSize)
+            self.mappedFile = mmap.mmap(self.fileObject.fileno(), 0)
+            self.mapRows()
+
+    def flushingLoop(self):
+        while not self.stopFlushing.wait(self.flushInterval):
+            self.flush()
+
+    def flush(self):
+        with self.fileLock:
+            numRows = self.numRows
+            # Save the Rows, Then Record How Many are Saved
+            self.mappedFile.flush()
+            self.mappedFile[8:16] = np.uint64(numRows).tobytes()
+            self.mappedFile.flush(0, mmap.PAGESIZE)
+            self.numFlushedRows = numRows
+
+    def close(self):
+        """Stop recording: flush the last rows and trim the unused space."""
+        if self.stopFlushing.is_set(): return
+        self.stopFlushing.set()
+        self.flushingThread.join()
+        self.flush()
+        # Trim the File
+        del self.rowView
+        self.mappedFile.close()
+        self.fileObject.truncate(self.headerSize + self.numRows*8*self.numColumns)
+        self.fileObject.close()
+
+# -------------------------------------------------------------------------- #
+# --------------------------- Reading Recordings --------------------------- #
+
+def readRecording(recordingFile):
+    """Returns the header, timePoints (numPoints), and Voltages (numChannels, numPoints) as memory maps of the file."""
+    with open(recordingFile, "rb") as fileObject:
+        fileHeader = fileObject.read(streamRecorder.headerSize)
+    assert fileHeader[0:8] == streamRecorder.fileSignature, "Not a stream recording: " + recordingFile
+    numRows = int(np.frombuffer(fileHeader[8:16], dtype=np.uint64)[0])
+    header = json.loads(fileHeader[16:].decode())
+
+    # Only Read the Rows Saved to Disk
+    numColumns = 1 + len(header["streamingOrder"])
+    if numRows == 0:
+        return header, np.zeros(0), np.zeros((numColumns - 1, 0))
+    rows = np.memmap(recordingFile, dtype=np.float64, mode="r", offset=streamRecorder.headerSize, shape=(numRows, numColumns))
+    return header, rows[:, 0], rows[:, 1:].T
+
+def convertToExcel(recordingFile, saveExcelPath, filteredData = []):
+    """Save a recording in the Excel layout of saveExcelData.saveData (the filtered sheet holds 'filteredData', if given)."""
+    header, timePoints, Voltages = readRecording(recordingFile)
+    excelDataProtocol.saveExcelData().saveData(timePoints.tolist(), Voltages.tolist(), filteredData, [], [], [], [], [],
+                                               [], [], header["streamingOrder"], saveExcelPath)
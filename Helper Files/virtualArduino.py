@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+A virtual Arduino on a Linux pseudo-terminal. It replays a recording (or a
+synthetic signal) in the same format as analogPortMonitoring.ino, so the whole
+acquisition -> organizeData -> analyzeBatchData path can run without a board.
+
+Pass 'devicePath' to arduinoRead/mainArduinoRead in place of the serial number.
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# General Modules
+import os
+import pty
+import tempfile
+import tty
+import time
+import threading
+import numpy as np
+
+# Import Modules to Read in Data
+import arduinoInterface as arduinoInterface      # Binary frame encoder
+import excelProcessing as excelDataProtocol      # Functions to Read in Data from Excel
+
+# --------------------------------------------------------------------------- #
+# ---------------------------- Virtual Arduino ------------------------------ #
+
+class virtualArduino():
+
+    def __init__(self, samplingFreq = 1000, numChannels = 1, streamingFormat = "ascii", maxVolt = 5, adcResolution = 1023, clockDrift = 0, serialNum = None):
+        # Streaming Parameters
+        self.samplingFreq = samplingFreq                # The number of points sent per second.
+        self.clockDrift = clockDrift                    # How fast the board's clock runs (ppm); the points are sent this much faster than their timestamps say.
+        self.numChannels = numChannels                  # The number of ADC readings per point.
+        self.streamingFormat = streamingFormat.lower()  # "ascii" lines or "binary" frames (See analogPortMonitoring.ino)
+        self.maxVolt = maxVolt
+        self.adcResolution = adcResolution
+        self.writeInterval = 0.002                      # Seconds between writes to the port.
+
+        # The Pseudo-Terminal
+        self.masterPort = None
+        self.slavePort = None
+        self.devicePath = None      # A fixed link to the pseudo-terminal, so the host finds it again after a disconnect.
+        self.portDirectory = None
+        self.serialNum = serialNum  # Give the board a fixed device path (its identity for boardProfiles); a new path each run if None.
+        self.portLock = threading.Lock()    # Held while writing, so the ports are never closed (or reused) mid-write.
+
+        # The Encoded Points to Replay
+        self.streamBytes = b""
+        self.pointOffsets = np.zeros(1, dtype=int)      # The byte where each point starts (plus the final end).
+
+        # Streaming Thread
+        self.streamingThread = None
+        self.streamingActive = threading.Event()
+        # Streaming Statistics
+        self.numPointsSent = 0
+        self.numDroppedBytes = 0    # Bytes not accepted by the port (the host fell behind).
+
+    def openPort(self):
+        """Open the pseudo-terminal. Connect to 'self.devicePath' like a serial port."""
+        masterPort, slavePort = pty.openpty()
+        # Pass the Bytes Through Untouched
+        tty.setraw(slavePort)
+        tty.setraw(masterPort)
+        # Drop the Points if the Host Falls Behind, Like a Full OS Buffer
+        os.set_blocking(masterPort, False)
+        with self.portLock:
+            self.masterPort, self.slavePort = masterPort, slavePort
+        
+        # Point the Device Path at the New Pseudo-Terminal
+        if self.portDirectory is None: 
+            self.portDirectory = tempfile.gettempdir() if self.serialNum else tempfile.mkdtemp(prefix = "virtualArduino")
+        self.devicePath = os.path.join(self.portDirectory, "ttyVirtualArduino" + (str(self.serialNum) if self.serialNum else ""))
+        os.symlink(os.ttyname(self.slavePort), self.devicePath + ".new")
+        os.replace(self.devicePath + ".new", self.devicePath)
+
+        return self.devicePath
+
+    def closePort(self, stopStreaming = True):
+        if stopStreaming: self.stopStreaming()
+        # Wait for Any Write in Progress, Then Unplug
+        with self.portLock:
+            masterPort, slavePort = self.masterPort, self.slavePort
+            self.masterPort = None; self.slavePort = None
+            for port in [masterPort, slavePort]:
+                if port is not None: os.close(port)
+
+    def simulateDisconnect(self, downTime = 2):
+        """Unplug the board for 'downTime' seconds. It keeps sampling, but the points are lost until it is back."""
+        self.closePort(stopStreaming = False)
+        time.sleep(downTime)
+        self.openPort()
+
+    # ---------------------------------------------------------------------- #
+    # ---------------------------- Signal Sources -------------------------- #
+
+    def loadExcelData(self, excelFile, testSheetNum = 0):
+        """Returns the voltages (numChannels, numPoints) recorded in an excel file (Ex: Data/*.xlsx)."""
+        compiledRawData = excelDataProtocol.getExcelData().getData(excelFile, numberOfChannels = self.numChannels, testSheetNum = testSheetNum)[0]
+
+        return np.array(compiledRawData[1], dtype=np.float64)
+
+    def syntheticData(self, numPoints, signalFreqs = (1, 10, 60), noiseAmplitude = 0.05):
+        """Returns a sum of sines plus noise around the middle of the ADC range (numChannels, numPoints)."""
+        timePoints = np.arange(numPoints) / self.samplingFreq
+        Voltages = np.zeros((self.numChannels, numPoints))
+        # Give Each Channel a Different Phase
+        for channelIndex in range(self.numChannels):
+            for signalFreq in signalFreqs:
+                Voltages[channelIndex] += 0.5*np.sin(2*np.pi*signalFreq*timePoints + channelIndex)
+        Voltages += noiseAmplitude*np.random.default_rng(0).standard_normal(Voltages.shape)
+
+        return Voltages + self.maxVolt/2
+
+    # ---------------------------------------------------------------------- #
+    # ------------------------------ Encoding ------------------------------ #
+
+    def encodeData(self, Voltages):
+        """
+        Convert the voltages (numChannels, numPoints) into the bytes the Arduino
+        would send at 'samplingFreq'. Every point is encoded up front so replaying
+        only has to slice the bytes.
+        """
+        Voltages = np.asarray(Voltages).reshape(self.numChannels, -1)
+        numPoints = Voltages.shape[1]
+        # Convert Voltage to ADC Counts
+        adcCounts = np.clip(np.round(Voltages * self.adcResolution/self.maxVolt), 0, self.adcResolution).astype(int).T
+        # The Arduino Sends the Time Since the Previous Point
+        deltaMicros = np.full(numPoints, int(round(1E6/self.samplingFreq)))
+
+        if self.streamingFormat == "binary":
+            frameDecoder = arduinoInterface.binaryFrameDecoder(self.numChannels)
+            self.streamBytes = frameDecoder.encodeFrames(deltaMicros, adcCounts)
+            self.pointOffsets = np.arange(numPoints + 1) * frameDecoder.frameSize
+        else:
+            # Format: "SS.MMMMMM,VVVV(,VVVV...)\r\n"
+            lineFormat = "%02d.%06d" + ",%04d"*self.numChannels + "\r\n"
+            streamLines = [(lineFormat % (deltaMicro // 1000000, deltaMicro % 1000000, *adcCount)).encode() for deltaMicro, adcCount in zip(deltaMicros, adcCounts.tolist())]
+            self.streamBytes = b"".join(streamLines)
+            self.pointOffsets = np.concatenate(([0], np.cumsum([len(streamLine) for streamLine in streamLines])))
+
+    # ---------------------------------------------------------------------- #
+    # ----------------------------- Streaming ------------------------------ #
+
+    def startStreaming(self, Voltages, loopData = True):
+        """Send the voltages (numChannels, numPoints) through the port in real time on a background thread."""
+        if self.masterPort is None: self.openPort()
+        self.encodeData(Voltages)
+        # Reset the Statistics
+        self.numPointsSent = 0; self.numDroppedBytes = 0
+
+        # Start Streaming
+        self.streamingActive.set()
+        self.streamingThread = threading.Thread(target = self.streamingLoop, args = (loopData,), name = "virtualArduinoThread", daemon = True)
+        self.streamingThread.start()
+
+    def stopStreaming(self):
+        self.streamingActive.clear()
+        if self.streamingThread is not None:
+            self.streamingThread.join()
+        self.streamingThread = None
+
+    def streamingLoop(self, loopData):
+        numPoints = len(self.pointOffsets) - 1
+        startTime = time.perf_counter()
+        while self.streamingActive.is_set():
+            # Send Every Point Due by Now
+            numPointsDue = int((time.perf_counter() - startTime) * self.samplingFreq*(1 + self.clockDrift*1E-6))
+            if not loopData: numPointsDue = min(numPointsDue, numPoints)
+            self.sendPoints(self.numPointsSent, numPointsDue)
+
+            # Stop at the End of the Recording
+            if not loopData and self.numPointsSent == numPoints:
+                break
+            time.sleep(self.writeInterval)
+
+    def sendPoints(self, startPoint, endPoint):
+        numPoints = len(self.pointOffsets) - 1
+        # Loop Back to the Start of the Recording
+        while startPoint < endPoint:
+            startIndex = startPoint % numPoints
+            stopIndex = min(numPoints, startIndex + endPoint - startPoint)
+            streamBytes = self.streamBytes[self.pointOffsets[startIndex]:self.pointOffsets[stopIndex]]
+
+            # Write to the Port (Nothing Arrives While Unplugged)
+            with self.portLock:
+                try:
+                    numBytesWritten = 0 if self.masterPort is None else os.write(self.masterPort, streamBytes)
+                except BlockingIOError:
+                    numBytesWritten = 0     # The port's buffer is full.
+            self.numDroppedBytes += len(streamBytes) - numBytesWritten
+
+            startPoint += stopIndex - startIndex
+        self.numPointsSent = endPoint
+
+# -------------------------------------------------------------------------- #
+# ------------------------- Streaming Benchmark ---------------------------- #
+
+if __name__ == "__main__":
+    # Import the Streaming Pipeline
+    import asyncio
+    import streamData as streamDataProtocol
+
+    # Benchmark Parameters
+    samplingFreqs = [500, 2000, 10000]  # Points per second sent by the virtual Arduino.
+    streamingTime = 10                  # Seconds of data to analyze at each rate.
+    streamingOrder = ["general"]        # The sensors being streamed in.
+    useAsyncio = False                  # Stream with streamArduinoDataAsync instead of streamArduinoData.
+    replayFile = "../Data/EMG - Yadong/2023-04-06 EMG Trial 2.xlsx"  # Replay this recording (synthetic data if not found)
+
+    for samplingFreq in samplingFreqs:
+        print("\n---------- Streaming at %d Hz ----------" % samplingFreq)
+        # Start the Virtual Arduino
+        device = virtualArduino(samplingFreq, numChannels = len(streamingOrder), serialNum = "Benchmark%d" % samplingFreq)
+        devicePath = device.openPort()
+        if os.path.exists(replayFile):
+            Voltages = device.loadExcelData(replayFile)
+        else:
+            Voltages = device.syntheticData(samplingFreq*60)
+        device.startStreaming(Voltages)
+
+        # Connect the Pipeline to the Virtual Arduino
+        numPointsPerBatch = samplingFreq; moveDataFinger = samplingFreq//10
+        readData = streamDataProtocol.mainArduinoRead(devicePath, None, numPointsPerBatch, moveDataFinger, streamingOrder, streamingOrder, False)
+
+        # Measure How Far the Analysis Runs Behind the Arduino
+        # The Lag is the Wall Time Minus the Arduino Time Since the First Batch
+        analysisLags = []; analyzeBatchData = readData.analyzeBatchData
+        def timedAnalyzeBatchData(dataFinger, lastTimePoint, predictionModel, actionControl, **kwargs):
+            analysisLags.append(time.perf_counter() - lastTimePoint)
+            return analyzeBatchData(dataFinger, lastTimePoint, predictionModel, actionControl, **kwargs)
+        readData.analyzeBatchData = timedAnalyzeBatchData
+
+        # Stream the Data
+        startTime = time.perf_counter(); startCPUTime = time.process_time()
+        if useAsyncio:
+            asyncio.run(readData.streamArduinoDataAsync(device.maxVolt, device.adcResolution, streamingTime))
+        else:
+            readData.streamArduinoData(device.maxVolt, device.adcResolution, streamingTime)
+        streamingDuration = time.perf_counter() - startTime
+        cpuUsage = (time.process_time() - startCPUTime) / streamingDuration
+        device.closePort()
+
+        # Report the Results
+        numPointsAnalyzed = len(readData.timePoints)
+        analysisLags = np.array(analysisLags) - analysisLags[0]
+        print("\tPoints Sent: %d; Analyzed: %d (%.0f Points/Second Including Setup)" % (device.numPointsSent, numPointsAnalyzed, numPointsAnalyzed/streamingDuration))
+        print("\tBytes Dropped by the Port: %d; Bad Reads: %d" % (device.numDroppedBytes, readData.arduinoRead.numBadReads))
+        print("\tCPU Usage (Including the Virtual Arduino): %.0f%%" % (100*cpuUsage))
+        print("\tTime to the First Analyzed Batch: %.0f ms" % (1000*readData.timeToFirstBatch))
+        print("\tAnalysis Lag (ms): Median %.1f; 95th Percentile %.1f; Max %.1f" % tuple(1000*np.percentile(analysisLags, [50, 95, 100])))
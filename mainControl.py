@@ -26,6 +26,7 @@
 
 # Basic Modules
 import sys
+import asyncio
 import numpy as np
 
 sys.path.append('./Helper Files/')
@@ -44,6 +45,10 @@ if __name__ == "__main__":
     
     # User Options During the Run: Any Number Can be True
     plotStreamedData = False        # Graph the Data to Show Incoming Signals + Analysis
+    streamAsync = False             # Stream with asyncio (Read When the Port is Ready) Instead of a Reading Thread
+    numFeatureWorkers = None        # Extract the Window Features (EEG, GSR, EOG Blinks) on This Many Processes; None Extracts Them During the Analysis
+    targetLag = None                # Adapt the Batch Cadence (moveDataFinger) to Keep the Analysis Within This Many Seconds of the Board; None Keeps moveDataFinger
+    monitorLatency = False          # Time Each Stage (Reading, Parsing, Filtering, Features, Plotting); Prints the p50/p95/p99 at the End
     
     # ---------------------------------------------------------------------- #
     
@@ -57,17 +62,22 @@ if __name__ == "__main__":
     # Save the Data as an Excel File (For Later Use)
     if streamData:
         # Arduino Streaming Parameters
-        boardSerialNum = '24230303537351415011'   # Board's Serial Number (port.serial_number)
+        boardSerialNum = '24230303537351415011'   # Board's Serial Number (port.serial_number); A List Streams from Several Boards
+        numChannelsPerBoard = None  # If Streaming from Several Boards: The Number of 'streamingOrder' Channels on Each Board (In Order)
         stopTimeStreaming = 60*1   # If Float/Int: The Number of Seconds to Stream Data; If String, it is the TimeStamp to Stop (Military Time) as "Hours:Minutes:Seconds:MicroSeconds"
         
         # Arduino parameters.
         maxVolt = 5
         adcResolution = 1023
+        streamingFormat = "ascii"   # "ascii" Lines or "binary" Frames; Must Match 'binaryStreaming' in analogPortMonitoring.ino
         
         saveRawSignals = True        # Saves the Data in 'readData.data' in an Excel Named 'saveExcelName'
         saveExcelPath = "./Data/ECG - Yadong/2023-04-06 ECG Trial 1.xlsx"   # Data Folder to Save the Excel Data; MUST END IN '/'
+        recordingFile = saveExcelPath.replace(".xlsx", ".bin")  # Every Point is Saved Here While Streaming (Kept if the Program Crashes); None to Skip. Convert with streamRecorder.convertToExcel
     else:
         boardSerialNum = None
+        numChannelsPerBoard = None
+        streamingFormat = "ascii"
         saveRawSignals = False
         
     # Instead of Arduino Data, Use Test Data from Excel File
@@ -78,6 +88,7 @@ if __name__ == "__main__":
             moveDataFinger = 1048100 
         
         testSheetNum = 0   # The Sheet/Tab Order (Zeroth/First/Second/Third) on the Bottom of the Excel Document
+        analyzeWholeRecording = False   # Filter the Recording Once and Extract Every Window at Once: EEG, GSR, and Temperature Windows, and EOG Blinks (Features Differ From Streaming by Filter Edge Effects; No Plots; EMG and General are Not Analyzed)
         # testDataExcelFile = "./Test.xlsx" # Path to the Test Data
         testDataExcelFile = "./Data/EMG - Yadong/2023-04-06 EMG Trial 1.xlsx"   # Data Folder to Save the Excel Data; MUST END IN '/'
 
@@ -87,10 +98,19 @@ if __name__ == "__main__":
     # ---------------------------------------------------------------------- #
     # ---------------------------------------------------------------------- #
     # Initialize instance to analyze the data
-    readData = streamDataProtocol.mainArduinoRead(boardSerialNum, None, numPointsPerBatch, moveDataFinger, streamingOrder, streamingOrder, plotStreamedData)
+    readData = streamDataProtocol.mainArduinoRead(boardSerialNum, None, numPointsPerBatch, moveDataFinger, streamingOrder, streamingOrder, plotStreamedData, streamingFormat, numChannelsPerBoard)
+    readData.setFeatureWorkers(numFeatureWorkers)
+    readData.setRealTimeTarget(targetLag)
+    readData.setLatencyMonitoring(monitorLatency, latencyFile = saveExcelPath.replace(".xlsx", " Latency.json") if streamData else None)
+
+    # Save the Data to Disk as it Arrives
+    if streamData and recordingFile:
+        readData.startRecording(recordingFile)
 
     # Stream in the data from the circuit board
-    if streamData:
+    if streamData and streamAsync:
+        asyncio.run(readData.streamArduinoDataAsync(maxVolt, adcResolution, stopTimeStreaming, predictionModel = None, actionControl = None))
+    elif streamData:
         readData.streamArduinoData(maxVolt, adcResolution, stopTimeStreaming, predictionModel = None, actionControl = None)
     
     # Take Data from Excel Sheet
@@ -98,14 +118,17 @@ if __name__ == "__main__":
         # Collect the Data from Excel
         compiledRawData, experimentTimes, experimentNames, surveyAnswerTimes, surveyAnswersList, surveyQuestions, subjectInformationAnswers, subjectInformationQuestions = excelDataProtocol.getExcelData().getData(testDataExcelFile, numberOfChannels = len(streamingOrder), testSheetNum = testSheetNum)
         # Analyze the Data using the Correct Protocol
-        readData.streamExcelData(compiledRawData, experimentTimes, experimentNames, surveyAnswerTimes, surveyAnswersList, 
-                                 surveyQuestions, subjectInformationAnswers, subjectInformationQuestions, predictionModel = None, actionControl = None)
+        if analyzeWholeRecording:
+            readData.analyzeRecording(compiledRawData)
+        else:
+            readData.streamExcelData(compiledRawData, experimentTimes, experimentNames, surveyAnswerTimes, surveyAnswersList, 
+                                     surveyQuestions, subjectInformationAnswers, subjectInformationQuestions, predictionModel = None, actionControl = None)
     
     # ---------------------------------------------------------------------- #
     # ------------------ Extract Data into this Namespace ------------------ #
 
     # Extract the data
-    timePoints = np.array(readData.analysisList[0].data[0])
+    timePoints = np.asarray(readData.timePoints)  # The Time Points Shared by Every Protocol
     if "emg" in streamingOrder: emgReadings = np.array(readData.emgAnalysis.data[1][0])
     if "general" in streamingOrder: generalReadings = np.array(readData.generalAnalysis.data[1][0])
     
@@ -0,0 +1,14 @@
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import os
+import sys
+
+# Import the Helper Files Like mainControl (And the Protocols Like streamData)
+repositoryFolder = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(os.path.join(repositoryFolder, "Helper Files"))
+sys.path.append(os.path.join(repositoryFolder, "Helper Files", "Biolectric Protocols"))
+
+# The Recordings in Data/ Used by the Tests
+dataFolder = os.path.join(repositoryFolder, "Data")
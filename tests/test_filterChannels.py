@@ -0,0 +1,40 @@
+"""
+    Filtering every channel at once (globalProtocol.filterChannels) against filtering each channel (filterData).
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import numpy as np
+import pytest
+
+# Import Analysis Files
+import conftest
+from emgAnalysis import emgProtocol
+from eogAnalysis import eogProtocol
+from eegAnalysis import eegProtocol
+from gsrAnalysis import gsrProtocol
+from temperatureAnalysis import tempProtocol
+
+# -------------------------------------------------------------------------- #
+# --------------------------------- Tests ---------------------------------- #
+
+@pytest.mark.parametrize("protocolClass", [eegProtocol, emgProtocol, eogProtocol, gsrProtocol, tempProtocol])
+def test_filterChannelsMatchesEachChannel(protocolClass):
+    samplingFreq = 1000; numChannels = 4
+    analysis = protocolClass(numChannels = numChannels); analysis.samplingFreq = samplingFreq
+    analysis.setSamplingFrequencyParams()
+    
+    # A Noisy Sine on Each Channel, With Points Out of Range on One (Removed as Bad Points)
+    timePoints = np.arange(20*samplingFreq) / samplingFreq
+    randomGenerator = np.random.default_rng(0)
+    dataBuffers = [1.5 + 0.3*np.sin(2*np.pi*(5 + channelIndex)*timePoints) + 0.05*randomGenerator.standard_normal(len(timePoints)) for channelIndex in range(numChannels)]
+    dataBuffers[1][5000:5100] = 0
+    
+    # Filtering the Channels Together Gives Each Channel's Data
+    channelsFilteredData, channelsGoodIndicesMask = analysis.filterChannels(timePoints, dataBuffers)[1:]
+    for channelIndex, dataBuffer in enumerate(dataBuffers):
+        filteredData, goodIndicesMask = analysis.filterData(timePoints, dataBuffer)[1:]
+        np.testing.assert_allclose(channelsFilteredData[channelIndex], filteredData)
+        np.testing.assert_array_equal(channelsGoodIndicesMask[channelIndex], goodIndicesMask)
@@ -0,0 +1,63 @@
+"""
+    The lookaheadFilter (_filteringProtocols) against filtering the whole recording forward-backward.
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import numpy as np
+import scipy.signal
+import pytest
+
+# Import Analysis Files
+import conftest
+import _filteringProtocols
+
+# -------------------------------------------------------------------------- #
+# ------------------------------ Test Helpers ------------------------------ #
+
+samplingFreq = 1000             # Points per second.
+lowPassSOS = scipy.signal.butter(3, 20, btype = 'low', fs = samplingFreq, output = 'sos')
+
+def streamPoints(recordedData, lookaheadPoints, numBatchPoints):
+    # Stream the Recording Through a lookaheadFilter; Returns the Final Points and Each Batch's Provisional Points
+    lookaheadFilter = _filteringProtocols.lookaheadFilter(lowPassSOS, lookaheadPoints)
+    finalData = []; provisionalData = []
+    for startPoint in range(0, len(recordedData), numBatchPoints):
+        finalPoints, provisionalPoints = lookaheadFilter.filterPoints(recordedData[startPoint:startPoint + numBatchPoints])
+        finalData.extend(finalPoints); provisionalData.append(provisionalPoints)
+    
+    return np.array(finalData), provisionalData
+
+@pytest.fixture(scope = "module")
+def recordedData():
+    # A Noisy Sum of Sines Around the Middle of the Range
+    timePoints = np.arange(30*samplingFreq) / samplingFreq
+    randomGenerator = np.random.default_rng(0)
+    return 1.5 + 0.3*np.sin(2*np.pi*2*timePoints) + 0.1*np.sin(2*np.pi*25*timePoints) + 0.05*randomGenerator.standard_normal(len(timePoints))
+
+# -------------------------------------------------------------------------- #
+# --------------------------------- Tests ---------------------------------- #
+
+@pytest.mark.parametrize("numBatchPoints", [20, 100, 200])
+def test_finalPointsMatchWholeRecording(recordedData, numBatchPoints):
+    # The Final Points Match sosfiltfilt Over the Whole Recording Once the Backward Start-Up Fades (Including the Start)
+    referenceData = scipy.signal.sosfiltfilt(lowPassSOS, recordedData)
+    finalData, provisionalData = streamPoints(recordedData, 500, numBatchPoints)
+    assert len(finalData) == len(recordedData) - 500
+    
+    if numBatchPoints > 3*(2*len(lowPassSOS) + 1):
+        np.testing.assert_allclose(finalData, referenceData[:len(finalData)], rtol = 0, atol = 1e-6)
+    else:
+        # A First Batch Shorter Than the Edge Extension Leaves a Forward Start-Up Error (See lookaheadFilter)
+        np.testing.assert_allclose(finalData[samplingFreq:], referenceData[samplingFreq:len(finalData)], rtol = 0, atol = 1e-6)
+
+def test_provisionalPointsMatchRefilteredBuffer(recordedData):
+    # The Newest Points Match Re-Filtering the Points Streamed so Far
+    numBatchPoints = 100
+    finalData, provisionalData = streamPoints(recordedData, 500, numBatchPoints)
+    for batchInd in [10, 50, 150]:
+        endPoint = (batchInd + 1)*numBatchPoints
+        bufferData = scipy.signal.sosfiltfilt(lowPassSOS, recordedData[:endPoint])
+        np.testing.assert_allclose(provisionalData[batchInd], bufferData[-len(provisionalData[batchInd]):], rtol = 0, atol = 1e-6)
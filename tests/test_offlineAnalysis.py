@@ -0,0 +1,70 @@
+"""
+    Offline analysis (streamData.analyzeRecording) against streaming the same recording (streamExcelData).
+"""
+
+# -------------------------------------------------------------------------- #
+# ---------------------------- Imported Modules ---------------------------- #
+
+# Basic Modules
+import os
+import numpy as np
+import pytest
+
+# Import Data Aquisition and Analysis Files
+import conftest
+import excelProcessing
+import streamData
+
+# -------------------------------------------------------------------------- #
+# ------------------------------ Test Helpers ------------------------------ #
+
+testDataExcelFile = os.path.join(conftest.dataFolder, "ECG - Yadong", "2023-04-06 ECG Trial 3.xlsx")
+streamingOrder = ["eeg", "gsr", "temp", "eog"]
+
+# The Largest Feature Difference, in Units of the Feature's RMS Over the Streamed Windows. Streaming filters a buffer
+# that ends at each window, so the filters' edge effects change the newest points (Most in the Slope and Noise Features).
+featureTolerances = {"eeg": 1, "gsr": 4, "temp": 2.5, "eog": 0.25}
+medianTolerance = 0.15          # The median difference over every feature of every window (Same Units).
+minSharedWindows = 0.8          # The fraction of windows both paths extract (The Motion Masks Also Change at the Edges).
+
+@pytest.fixture(scope = "module")
+def recording():
+    # Feed the Same Recorded Channel to Every Protocol
+    compiledRawData = excelProcessing.getExcelData().getData(testDataExcelFile, numberOfChannels = 1, testSheetNum = 0)[0]
+    return np.asarray(compiledRawData[0]), np.repeat(np.asarray(compiledRawData[1]), len(streamingOrder), axis = 0)
+
+def analyzeFeatures(recording, numPointsPerBatch, moveDataFinger, analyzeWholeRecording):
+    timePoints, Voltages = recording
+    readData = streamData.mainArduinoRead(None, None, numPointsPerBatch, moveDataFinger, streamingOrder, streamingOrder, False)
+    for analysis in readData.analysisList:
+        analysis.collectFeatures = True
+    
+    # Analyze the Recording Offline or Stream it Batch by Batch
+    if analyzeWholeRecording:
+        readData.analyzeRecording([timePoints, Voltages])
+    else:
+        readData.streamExcelData([timePoints.tolist(), Voltages.tolist()], [], [], [], [], [], [], [])
+    
+    return {analysis.protocolName: (np.asarray(analysis.featureTimes), np.asarray(analysis.rawFeatures, dtype = float)) for analysis in readData.analysisList}
+
+# -------------------------------------------------------------------------- #
+# --------------------------------- Tests ---------------------------------- #
+
+@pytest.mark.parametrize("numPointsPerBatch, moveDataFinger", [(10000, 1000), (20000, 2000)])
+def test_offlineMatchesStreaming(recording, numPointsPerBatch, moveDataFinger):
+    offlineFeatures = analyzeFeatures(recording, numPointsPerBatch, moveDataFinger, analyzeWholeRecording = True)
+    streamedFeatures = analyzeFeatures(recording, numPointsPerBatch, moveDataFinger, analyzeWholeRecording = False)
+    
+    for protocolName in streamingOrder:
+        offlineTimes, offlineRawFeatures = offlineFeatures[protocolName]
+        streamedTimes, streamedRawFeatures = streamedFeatures[protocolName]
+        # Both Paths Extract (Mostly) the Same Windows (EOG: Blinks)
+        sharedTimes, offlineInds, streamedInds = np.intersect1d(offlineTimes, streamedTimes, return_indices = True)
+        assert len(sharedTimes) >= minSharedWindows*max(len(offlineTimes), len(streamedTimes)) > 0, protocolName
+        
+        # The Shared Windows Have the Same Features, Up to the Streamed Buffers' Edge Effects
+        featureScales = np.sqrt(np.mean(streamedRawFeatures[streamedInds]**2, axis = 0))
+        featureScales[featureScales == 0] = 1
+        offlineScaled = offlineRawFeatures[offlineInds]/featureScales; streamedScaled = streamedRawFeatures[streamedInds]/featureScales
+        np.testing.assert_allclose(offlineScaled, streamedScaled, rtol = 0, atol = featureTolerances[protocolName], err_msg = protocolName)
+        assert np.median(np.abs(offlineScaled - streamedScaled)) <= medianTolerance, protocolName